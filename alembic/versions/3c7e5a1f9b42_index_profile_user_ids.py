@@ -0,0 +1,28 @@
+"""index user_id on enrolled_students and enrolled_employees
+
+Revision ID: 3c7e5a1f9b42
+Revises: 8bd1ebbaccb2
+Create Date: 2026-10-17 10:12:40.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7e5a1f9b42'
+down_revision: Union[str, Sequence[str], None] = '8bd1ebbaccb2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_enrolled_students_user_id'), 'enrolled_students', ['user_id'], unique=False)
+    op.create_index(op.f('ix_enrolled_employees_user_id'), 'enrolled_employees', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_enrolled_employees_user_id'), table_name='enrolled_employees')
+    op.drop_index(op.f('ix_enrolled_students_user_id'), table_name='enrolled_students')
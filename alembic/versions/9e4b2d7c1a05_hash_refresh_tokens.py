@@ -0,0 +1,43 @@
+"""store refresh tokens as sha256 hashes; index user_sessions user_id and expires_at
+
+Revision ID: 9e4b2d7c1a05
+Revises: 3c7e5a1f9b42
+Create Date: 2026-10-17 11:02:15.427961
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b2d7c1a05'
+down_revision: Union[str, Sequence[str], None] = '3c7e5a1f9b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Expired sessions are dead weight; drop them before rewriting the table
+    op.execute("DELETE FROM user_sessions WHERE expires_at <= now()")
+    op.add_column('user_sessions', sa.Column('token_hash', sa.String(length=64), nullable=True))
+    # Same digest as app.core.security.hash_refresh_token, so live sessions keep working
+    op.execute("UPDATE user_sessions SET token_hash = encode(sha256(convert_to(refresh_token, 'UTF8')), 'hex')")
+    op.alter_column('user_sessions', 'token_hash', nullable=False)
+    # Dropping the column drops its unique index with it
+    op.drop_column('user_sessions', 'refresh_token')
+    op.create_index(op.f('ix_user_sessions_token_hash'), 'user_sessions', ['token_hash'], unique=True)
+    op.create_index(op.f('ix_user_sessions_user_id'), 'user_sessions', ['user_id'], unique=False)
+    op.create_index(op.f('ix_user_sessions_expires_at'), 'user_sessions', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    # Raw tokens cannot be recovered from their hashes: existing sessions are revoked
+    op.execute("DELETE FROM user_sessions")
+    op.drop_index(op.f('ix_user_sessions_expires_at'), table_name='user_sessions')
+    op.drop_index(op.f('ix_user_sessions_user_id'), table_name='user_sessions')
+    op.drop_index(op.f('ix_user_sessions_token_hash'), table_name='user_sessions')
+    op.drop_column('user_sessions', 'token_hash')
+    op.add_column('user_sessions', sa.Column('refresh_token', sa.String(), nullable=False))
+    op.create_index(op.f('ix_user_sessions_refresh_token'), 'user_sessions', ['refresh_token'], unique=True)
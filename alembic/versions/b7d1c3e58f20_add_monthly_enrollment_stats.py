@@ -0,0 +1,46 @@
+"""add monthly_enrollment_stats summary table for the admin dashboard
+
+Revision ID: b7d1c3e58f20
+Revises: 9e4b2d7c1a05
+Create Date: 2026-10-17 12:20:48.553102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d1c3e58f20'
+down_revision: Union[str, Sequence[str], None] = '9e4b2d7c1a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# kind -> (table, timestamp column); mirrors app.services.dashboard_stats.STAT_SOURCES
+STAT_SOURCES = {
+    'student_applications': ('student_applications', 'applied_at'),
+    'students_enrolled': ('enrolled_students', 'enrolled_at'),
+    'employee_applications': ('employee_applications', 'applied_at'),
+    'employees': ('enrolled_employees', 'joined_at'),
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        'monthly_enrollment_stats',
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('month', 'kind'),
+    )
+    for kind, (table, column) in STAT_SOURCES.items():
+        op.execute(
+            f"INSERT INTO monthly_enrollment_stats (month, kind, count) "
+            f"SELECT date_trunc('month', coalesce({column}, now()))::date, '{kind}', count(*) "
+            f"FROM {table} GROUP BY 1"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('monthly_enrollment_stats')
@@ -0,0 +1,42 @@
+"""index enrolled_students class_id, section_id and (enrolled_at, id) for the student listing
+
+enrolled_at becomes NOT NULL so every row has a keyset position; rows without one get
+now(), the month monthly_enrollment_stats already counted them in.
+
+Revision ID: c4f8a2e6d913
+Revises: b7d1c3e58f20
+Create Date: 2026-10-17 13:05:31.902274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f8a2e6d913'
+down_revision: Union[str, Sequence[str], None] = 'b7d1c3e58f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE enrolled_students SET enrolled_at = now() WHERE enrolled_at IS NULL")
+    op.alter_column(
+        'enrolled_students', 'enrolled_at',
+        existing_type=sa.DateTime(timezone=True), existing_server_default=sa.text('now()'), nullable=False,
+    )
+    op.create_index(op.f('ix_enrolled_students_class_id'), 'enrolled_students', ['class_id'], unique=False)
+    op.create_index(op.f('ix_enrolled_students_section_id'), 'enrolled_students', ['section_id'], unique=False)
+    op.create_index('ix_enrolled_students_enrolled_at_id', 'enrolled_students', ['enrolled_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_enrolled_students_enrolled_at_id', table_name='enrolled_students')
+    op.drop_index(op.f('ix_enrolled_students_section_id'), table_name='enrolled_students')
+    op.drop_index(op.f('ix_enrolled_students_class_id'), table_name='enrolled_students')
+    op.alter_column(
+        'enrolled_students', 'enrolled_at',
+        existing_type=sa.DateTime(timezone=True), existing_server_default=sa.text('now()'), nullable=True,
+    )
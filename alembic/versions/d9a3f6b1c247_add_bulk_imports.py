@@ -0,0 +1,46 @@
+"""add bulk_imports checkpoint table for chunked bulk-enroll imports
+
+Revision ID: d9a3f6b1c247
+Revises: c4f8a2e6d913
+Create Date: 2026-10-17 14:02:19.448106
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9a3f6b1c247'
+down_revision: Union[str, Sequence[str], None] = 'c4f8a2e6d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'bulk_imports',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('file_format', sa.String(length=10), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('job_id', sa.String(length=36), nullable=True),
+        sa.Column('total_rows', sa.Integer(), nullable=True),
+        sa.Column('rows_done', sa.Integer(), nullable=False),
+        sa.Column('created_count', sa.Integer(), nullable=False),
+        sa.Column('skipped_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('issues', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('bulk_imports')
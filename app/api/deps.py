@@ -1,14 +1,20 @@
+from dataclasses import dataclass
 from typing import Optional, List
+from uuid import UUID
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core import security
+from app.core.auth_cache import Principal, cache_principal, get_cached_principal
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db, read_db
 from app.models.auth import User
+from app.models.users import EnrolledEmployee, EnrolledStudent
 from app.schemas.auth import TokenPayload
 
 # OAuth2PasswordBearer allows for token extraction from header
@@ -18,11 +24,7 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
-def get_current_user(
-    request: Request,
-    db: Session = Depends(get_db),
-    token: Optional[str] = Depends(reusable_oauth2)
-) -> User:
+def _token_user_id(request: Request, token: Optional[str]) -> UUID:
     if not token:
         # Fallback to cookie
         token = request.cookies.get("access_token")
@@ -38,23 +40,145 @@ def get_current_user(
         payload = jwt.decode(
             token, security.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
-    except (JWTError, ValidationError):
+        return UUID(TokenPayload(**payload).sub)
+    except (JWTError, ValidationError, TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = db.query(User).filter(User.id == token_data.sub).first()
-    if not user:
+
+
+def _check_principal(principal: Optional[Principal]) -> Principal:
+    if not principal:
         raise HTTPException(status_code=404, detail="User not found")
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return user
+    return principal
+
+
+def user_with_profiles(user_id: UUID):
+    """One query for a user and their linked student and employee profiles (either may be None)."""
+    return (
+        select(User, EnrolledStudent, EnrolledEmployee)
+        .outerjoin(EnrolledStudent, EnrolledStudent.user_id == User.id)
+        .outerjoin(EnrolledEmployee, EnrolledEmployee.user_id == User.id)
+        .where(User.id == user_id)
+        .limit(1)
+    )
+
+
+def _profile_query(principal: Principal):
+    """The one profile table this role reads from: students -> EnrolledStudent, others -> EnrolledEmployee."""
+    model = EnrolledStudent if principal.role == "student" else EnrolledEmployee
+    return select(model).where(model.user_id == principal.id).limit(1)
+
+
+@dataclass
+class CurrentPrincipal:
+    """
+    The authenticated user together with their linked profile, attached to the request's
+    session so handlers can follow its relationships.
+    """
+
+    user: Principal
+    student: Optional[EnrolledStudent] = None
+    employee: Optional[EnrolledEmployee] = None
+
+    @classmethod
+    def build(cls, principal: Principal, profile) -> "CurrentPrincipal":
+        if isinstance(profile, EnrolledStudent):
+            return cls(principal, student=profile)
+        return cls(principal, employee=profile)
+
+
+def _principal_from_row(request: Request, db, row) -> Optional[Principal]:
+    if row is None:
+        return None
+    principal = Principal.from_user(row[0])
+    cache_principal(principal)
+    # Keep the profile from the joined row for get_current_principal on the same session
+    profile = row[1] if principal.role == "student" else row[2]
+    request.state.principal_profile = (principal.id, db, profile)
+    return principal
+
+
+def get_current_user(
+    request: Request,
+    db: Session = Depends(get_db),
+    token: Optional[str] = Depends(reusable_oauth2)
+) -> Principal:
+    """
+    The authenticated user as a Principal (id, email, role, is_active). Served from the
+    principal cache when possible, so most requests skip the users lookup; on a miss the
+    user's profile comes back in the same query for get_current_principal.
+    """
+    user_id = _token_user_id(request, token)
+    principal = get_cached_principal(user_id)
+    if principal is None:
+        principal = _principal_from_row(request, db, db.execute(user_with_profiles(user_id)).first())
+    return _check_principal(principal)
+
+
+async def get_current_user_async(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    token: Optional[str] = Depends(reusable_oauth2)
+) -> Principal:
+    """get_current_user for async handlers: same cache and checks, loaded on the async session."""
+    user_id = _token_user_id(request, token)
+    principal = get_cached_principal(user_id)
+    if principal is None:
+        row = (await db.execute(user_with_profiles(user_id))).first()
+        principal = _principal_from_row(request, db, row)
+    return _check_principal(principal)
+
+
+def _preloaded_profile(request: Request, db, principal: Principal):
+    preloaded = getattr(request.state, "principal_profile", None)
+    if preloaded is not None and preloaded[0] == principal.id and preloaded[1] is db:
+        return True, preloaded[2]
+    return False, None
+
+
+def get_current_principal(
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> CurrentPrincipal:
+    """
+    Request-scoped user + profile. FastAPI resolves it once per request however many
+    dependencies ask for it; the profile costs no extra query when get_current_user had
+    to load the user, and one query when the user came from the principal cache.
+    """
+    found, profile = _preloaded_profile(request, db, current_user)
+    if not found:
+        profile = db.execute(_profile_query(current_user)).scalars().first()
+    return CurrentPrincipal.build(current_user, profile)
+
+
+async def get_current_principal_async(
+    request: Request,
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> CurrentPrincipal:
+    """get_current_principal for async handlers. Relationships of the profile are not lazy-loadable."""
+    found, profile = _preloaded_profile(request, db, current_user)
+    if not found:
+        profile = (await db.scalars(_profile_query(current_user))).first()
+    return CurrentPrincipal.build(current_user, profile)
+
+
+def token_user_id(request: Request, token: Optional[str]) -> Optional[UUID]:
+    """User id from a request's bearer token or cookie, or None when absent or invalid."""
+    try:
+        return _token_user_id(request, token)
+    except HTTPException:
+        return None
 
 
 def get_current_active_superuser(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     if current_user.role != "admin":
         raise HTTPException(
             status_code=403, detail="The user doesn't have enough privileges"
@@ -66,7 +190,7 @@ class RoleChecker:
     def __init__(self, allowed_roles: List[str]):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)) -> User:
+    def __call__(self, current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.role not in self.allowed_roles and current_user.role != "admin":
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -78,7 +202,7 @@ class RoleChecker:
 class TeacherChecker:
     """Dependency to verify user is a teacher"""
     
-    def __call__(self, current_user: User = Depends(get_current_user)) -> User:
+    def __call__(self, current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.role not in ["teacher", "admin"]:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -90,7 +214,7 @@ class TeacherChecker:
 class StudentChecker:
     """Dependency to verify user is a student"""
     
-    def __call__(self, current_user: User = Depends(get_current_user)) -> User:
+    def __call__(self, current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.role not in ["student", "admin"]:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -105,7 +229,7 @@ class OwnershipChecker:
     def __init__(self, owner_field: str = "user_id"):
         self.owner_field = owner_field
     
-    def __call__(self, resource_owner_id: str, current_user: User = Depends(get_current_user)) -> User:
+    def __call__(self, resource_owner_id: str, current_user: Principal = Depends(get_current_user)) -> Principal:
         # Admin can access any resource
         if current_user.role == "admin":
             return current_user
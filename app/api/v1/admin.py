@@ -7,19 +7,31 @@ from fastapi import (
     File,
     Form,
     Body,
+    Query,
 )
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, literal, or_, select, tuple_, union_all
 from sqlalchemy.exc import IntegrityError
 from typing import List, Optional, Any
+import base64
 import uuid
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import io
 import os
 import shutil
 
-from app.core.database import get_db
+from app.core.database import (
+    ReadSessionLocal,
+    async_engine,
+    get_db,
+    pool_metrics,
+    read_db,
+    read_engine,
+)
+from app.core.hashing_pool import hashing_pool
+from app.api import deps
 from app.models import (
     StudentApplication,
     EmployeeApplication,
@@ -31,11 +43,16 @@ from app.models import (
     EnrolledStudent,
     EnrolledEmployee,
     FeePayment,
+    MonthlyEnrollmentStat,
+    BulkImport,
 )
 from app.models.applications import StudentApplicationStatus, EmployeeApplicationStatus
 from app.models.auth import User
 from app.models.users import UserRole
 from app.core import security
+from app.services import bulk_enrollment, dashboard_stats
+from app.services.background_jobs import JobStatus, job_runner
+from app.services.exports import EXPORT_FORMATS, stream_export
 from app.schemas import (
     StudentApplicationCreate,
     StudentApplicationUpdate,
@@ -54,6 +71,8 @@ from app.schemas import (
     JobPositionBase,
     JobPositionCreate,
     JobPositionResponse,
+    BackgroundJobResponse,
+    BulkImportResponse,
 )
 from app.schemas.users import (
     EnrolledStudentUpdate,
@@ -139,6 +158,7 @@ from app.schemas.lms import (
     StudentExamStatus,
     PromoteStudentsRequest,
     APIResponse,
+    PaginatedResponse,
 )
 
 router = APIRouter()
@@ -183,61 +203,70 @@ def get_current_academic_year(db: Session):
     return db.query(AcademicYear).filter(AcademicYear.is_current == True).first()
 
 
-@router.get("/dashboard/overview", response_model=DashboardOverviewResponse)
-def get_dashboard_overview(db: Session = Depends(get_db)):
-    # 1. Stats - All applications (not just pending)
-    student_applications = db.query(StudentApplication).count()
-    total_students_enrolled = db.query(EnrolledStudent).count()
-    employee_applications = db.query(EmployeeApplication).count()
-    total_employees = db.query(EnrolledEmployee).count()
+def _dashboard_overview(db: Session) -> dict:
+    # 1. Stats and chart from the monthly summary table (a few rows per month, not per student)
+    totals = {kind: 0 for kind in dashboard_stats.STAT_SOURCES}
+    enrolled_by_month = {}
+    for kind, month, count in db.execute(
+        select(MonthlyEnrollmentStat.kind, MonthlyEnrollmentStat.month, MonthlyEnrollmentStat.count)
+    ):
+        totals[kind] += count
+        if kind == "students_enrolled":
+            enrolled_by_month[month] = count
 
     stats = DashboardStatsResponse(
-        student_applications=student_applications,
-        total_students_enrolled=total_students_enrolled,
-        employee_applications=employee_applications,
-        total_employees=total_employees,
+        student_applications=totals["student_applications"],
+        total_students_enrolled=totals["students_enrolled"],
+        employee_applications=totals["employee_applications"],
+        total_employees=totals["employees"],
         student_app_trend="+0%",
         student_enrolled_trend="+0%",
         employee_app_trend="+0%",
         employee_trend="+0%",
     )
 
-    # 2. Recent Activity (Last 5 items from applications and enrollments)
-    recent_activity = []
-
-    # New Student Applications
+    # 2. Recent Activity: latest 5 applications and latest 5 enrollments in one query
     latest_apps = (
-        db.query(StudentApplication)
+        select(
+            StudentApplication.id,
+            StudentApplication.first_name,
+            StudentApplication.last_name,
+            StudentApplication.applying_for_class,
+            StudentApplication.applied_at.label("timestamp"),
+            literal("application").label("type"),
+        )
         .order_by(StudentApplication.applied_at.desc())
         .limit(5)
-        .all()
+        .subquery()
     )
-    for app in latest_apps:
-        recent_activity.append(
-            ActivityItem(
-                id=str(app.id),
-                type="application",
-                title="New Student Application",
-                description=f"{app.first_name} {app.last_name} applied for {app.applying_for_class}",
-                timestamp=app.applied_at,
-            )
-        )
-
-    # Recent Enrollments
     latest_enrolls = (
-        db.query(EnrolledStudent)
+        select(
+            EnrolledStudent.id,
+            EnrolledStudent.first_name,
+            EnrolledStudent.last_name,
+            EnrolledStudent.applying_for_class,
+            EnrolledStudent.enrolled_at.label("timestamp"),
+            literal("enrollment").label("type"),
+        )
         .order_by(EnrolledStudent.enrolled_at.desc())
         .limit(5)
-        .all()
+        .subquery()
     )
-    for enroll in latest_enrolls:
+    recent_activity = []
+    for row in db.execute(union_all(select(latest_apps), select(latest_enrolls))):
+        if row.type == "application":
+            title = "New Student Application"
+            description = f"{row.first_name} {row.last_name} applied for {row.applying_for_class}"
+        else:
+            title = "Student Enrolled"
+            description = f"{row.first_name} {row.last_name} officially enrolled."
         recent_activity.append(
             ActivityItem(
-                id=str(enroll.id),
-                type="enrollment",
-                title="Student Enrolled",
-                description=f"{enroll.first_name} {enroll.last_name} officially enrolled.",
-                timestamp=enroll.enrolled_at,
+                id=str(row.id),
+                type=row.type,
+                title=title,
+                description=description,
+                timestamp=row.timestamp,
             )
         )
 
@@ -245,36 +274,16 @@ def get_dashboard_overview(db: Session = Depends(get_db)):
     recent_activity.sort(key=lambda x: x.timestamp, reverse=True)
     recent_activity = recent_activity[:8]
 
-    # 3. Enrollment Chart (Last 12 months)
-    enrollment_chart = []
-    for i in range(12):
-        # Calculate month
-        month_offset = -i
-        target_date = datetime.utcnow().month + month_offset
-        year_offset = 0
-        if target_date <= 0:
-            target_date += 12
-            year_offset = -1
-        elif target_date > 12:
-            target_date -= 12
-            year_offset = 1
-
-        target_year = datetime.utcnow().year + year_offset
-        month_name = datetime(target_year, target_date, 1).strftime("%b")
-
-        # Count enrollments for this month
-        count = (
-            db.query(EnrolledStudent)
-            .filter(
-                func.extract("year", EnrolledStudent.enrolled_at) == target_year,
-                func.extract("month", EnrolledStudent.enrolled_at) == target_date,
-            )
-            .count()
-        )
-        enrollment_chart.append({"month": month_name, "count": count})
-
-    # Reverse to show oldest first
-    enrollment_chart = list(reversed(enrollment_chart))
+    # 3. Enrollment Chart (Last 12 months, oldest first)
+    month = dashboard_stats.month_start(datetime.utcnow())
+    months = []
+    for _ in range(12):
+        months.append(month)
+        month = (month - timedelta(days=1)).replace(day=1)
+    enrollment_chart = [
+        {"month": m.strftime("%b"), "count": enrolled_by_month.get(m, 0)}
+        for m in reversed(months)
+    ]
 
     return {
         "stats": stats,
@@ -283,6 +292,37 @@ def get_dashboard_overview(db: Session = Depends(get_db)):
     }
 
 
+@router.get("/dashboard/overview", response_model=DashboardOverviewResponse)
+def get_dashboard_overview(db: Session = Depends(get_db)):
+    return dashboard_stats.cached_overview(lambda: _dashboard_overview(db))
+
+
+@router.post("/dashboard/stats/rebuild")
+def rebuild_dashboard_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_active_superuser),
+):
+    """Recompute the dashboard counters from the source tables (backfill / drift repair)."""
+    rows = dashboard_stats.rebuild_monthly_stats(db)
+    db.commit()
+    return {"message": "Dashboard statistics rebuilt", "rows": rows}
+
+
+@router.get("/system/db-pool")
+def get_db_pool_metrics(current_user: User = Depends(deps.get_current_active_superuser)):
+    """Connection pool usage and checkout wait times for this worker process."""
+    metrics = {"sync": pool_metrics(), "async": pool_metrics(async_engine.sync_engine)}
+    if read_engine is not None:
+        metrics["read_replica"] = pool_metrics(read_engine)
+    return metrics
+
+
+@router.get("/system/hashing-pool")
+def get_hashing_pool_metrics(current_user: User = Depends(deps.get_current_active_superuser)):
+    """Password hashing queue depth and per-call latency for this worker process."""
+    return hashing_pool.metrics()
+
+
 # --- LMS & Academic Endpoints ---
 
 
@@ -1422,69 +1462,205 @@ def enroll_student_manual(
 # --- Enrolled Student Management ---
 
 
+# Fields of an enrolled-student row, in response order; ``fields=`` selects a subset
+STUDENT_LIST_COLUMNS = (
+    "id",
+    "reg_id",
+    "system_student_id",
+    "admission_number",
+    "first_name",
+    "last_name",
+    "gender",
+    "date_of_birth",
+    "student_photo_url",
+    "b_form_number",
+    "student_cnic",
+    "guardian_name",
+    "guardian_cnic",
+    "guardian_phone",
+    "guardian_email",
+    "class_id",
+    "section_id",
+    "group_id",
+    "applying_for_class",
+    "city",
+    "address",
+    "user_id",
+    "lms_email",
+    "lms_login",
+    "lms_password",
+    "enrolled_at",
+    "is_active",
+)
+# Joined names; omitted from a row when the student has no class/section/group
+STUDENT_LIST_NAMES = {
+    "class_name": (Class, Class.id == EnrolledStudent.class_id),
+    "section_name": (Section, Section.id == EnrolledStudent.section_id),
+    "group_name": (AcademicGroup, AcademicGroup.id == EnrolledStudent.group_id),
+}
+
+
+def _student_list_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(STUDENT_LIST_COLUMNS) + list(STUDENT_LIST_NAMES)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in STUDENT_LIST_COLUMNS and f not in STUDENT_LIST_NAMES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # id is always returned so rows can be addressed
+    return ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+
+
+def _enrolled_students_query(
+    fields: List[str],
+    class_id: Optional[uuid.UUID],
+    section_id: Optional[uuid.UUID],
+    group_id: Optional[uuid.UUID],
+    is_active: Optional[bool],
+    search: Optional[str],
+):
+    """One SELECT for the requested fields, joining only the name tables it needs."""
+    columns = []
+    for field in fields:
+        if field in STUDENT_LIST_NAMES:
+            columns.append(STUDENT_LIST_NAMES[field][0].name.label(field))
+        else:
+            columns.append(getattr(EnrolledStudent, field).label(field))
+    query = select(*columns).select_from(EnrolledStudent)
+    for field, (model, onclause) in STUDENT_LIST_NAMES.items():
+        if field in fields:
+            query = query.outerjoin(model, onclause)
+
+    if class_id:
+        query = query.where(EnrolledStudent.class_id == class_id)
+    if section_id:
+        query = query.where(EnrolledStudent.section_id == section_id)
+    if group_id:
+        query = query.where(EnrolledStudent.group_id == group_id)
+    if is_active is not None:
+        query = query.where(EnrolledStudent.is_active == is_active)
+    if search and search.strip():
+        pattern = f"%{search.strip()}%"
+        query = query.where(
+            or_(
+                (EnrolledStudent.first_name + " " + EnrolledStudent.last_name).ilike(pattern),
+                EnrolledStudent.system_student_id.ilike(pattern),
+                EnrolledStudent.admission_number.ilike(pattern),
+            )
+        )
+    return query.order_by(EnrolledStudent.enrolled_at, EnrolledStudent.id)
+
+
+def _student_row(row) -> dict:
+    return {
+        key: value
+        for key, value in row._mapping.items()
+        if not key.startswith("_") and not (key in STUDENT_LIST_NAMES and value is None)
+    }
+
+
+def _encode_student_cursor(enrolled_at: datetime, student_id: uuid.UUID) -> str:
+    raw = f"{enrolled_at.isoformat()}|{student_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_student_cursor(cursor: str):
+    try:
+        enrolled_at, student_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(enrolled_at), uuid.UUID(student_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/enrolled-students", response_model=List[dict])
-def get_enrolled_students(db: Session = Depends(get_db)):
-    students = db.query(EnrolledStudent).all()
+def get_enrolled_students(
+    class_id: Optional[uuid.UUID] = None,
+    section_id: Optional[uuid.UUID] = None,
+    group_id: Optional[uuid.UUID] = None,
+    is_active: Optional[bool] = None,
+    search: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    db: Session = Depends(read_db()),
+):
+    """All matching students in one query; see /enrolled-students/page for paging."""
+    query = _enrolled_students_query(
+        _student_list_fields(fields), class_id, section_id, group_id, is_active, search
+    )
+    return [_student_row(row) for row in db.execute(query)]
+
+
+@router.get("/enrolled-students/page", response_model=PaginatedResponse)
+def get_enrolled_students_page(
+    class_id: Optional[uuid.UUID] = None,
+    section_id: Optional[uuid.UUID] = None,
+    group_id: Optional[uuid.UUID] = None,
+    is_active: Optional[bool] = None,
+    search: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(read_db()),
+):
+    """
+    Students in enrollment order, one page at a time. Keyset pagination on
+    (enrolled_at, id), so a page costs the same however deep into the list it is.
+    """
+    query = _enrolled_students_query(
+        _student_list_fields(fields), class_id, section_id, group_id, is_active, search
+    ).add_columns(
+        EnrolledStudent.enrolled_at.label("_enrolled_at"),
+        EnrolledStudent.id.label("_id"),
+    )
+    if cursor:
+        query = query.where(
+            tuple_(EnrolledStudent.enrolled_at, EnrolledStudent.id)
+            > tuple_(*_decode_student_cursor(cursor))
+        )
 
-    result = []
-    for student in students:
-        student_dict = {
-            "id": student.id,
-            "reg_id": student.reg_id,
-            "system_student_id": student.system_student_id,
-            "admission_number": student.admission_number,
-            "first_name": student.first_name,
-            "last_name": student.last_name,
-            "gender": student.gender,
-            "date_of_birth": student.date_of_birth,
-            "student_photo_url": student.student_photo_url,
-            "b_form_number": student.b_form_number,
-            "student_cnic": student.student_cnic,
-            "guardian_name": student.guardian_name,
-            "guardian_cnic": student.guardian_cnic,
-            "guardian_phone": student.guardian_phone,
-            "guardian_email": student.guardian_email,
-            "class_id": student.class_id,
-            "section_id": student.section_id,
-            "group_id": student.group_id,
-            "applying_for_class": student.applying_for_class,
-            "city": student.city,
-            "address": student.address,
-            "user_id": student.user_id,
-            "lms_email": student.lms_email,
-            "lms_login": student.lms_login,
-            "lms_password": student.lms_password,
-            "enrolled_at": student.enrolled_at,
-            "is_active": student.is_active,
-        }
+    rows = db.execute(query.limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = (
+        _encode_student_cursor(rows[-1]._enrolled_at, rows[-1]._id) if has_more else None
+    )
+    return {
+        "success": True,
+        "message": "Students retrieved successfully",
+        "data": [_student_row(row) for row in rows],
+        "pagination": {"limit": limit, "has_more": has_more, "next_cursor": next_cursor},
+    }
 
-        # Get class name
-        if student.class_id:
-            class_obj = db.query(Class).filter(Class.id == student.class_id).first()
-            if class_obj:
-                student_dict["class_name"] = class_obj.name
 
-        # Get section name
-        if student.section_id:
-            section_obj = (
-                db.query(Section).filter(Section.id == student.section_id).first()
-            )
-            if section_obj:
-                student_dict["section_name"] = section_obj.name
-
-        # Get group name
-        if student.group_id:
-            group_obj = (
-                db.query(AcademicGroup)
-                .filter(AcademicGroup.id == student.group_id)
-                .first()
-            )
-            if group_obj:
-                student_dict["group_name"] = group_obj.name
+def _export_response(query, header: List[str], export_format: str, name: str) -> StreamingResponse:
+    filename = f"{name}_{datetime.utcnow():%Y%m%d}.{export_format}"
+    return StreamingResponse(
+        stream_export(ReadSessionLocal, query, header, export_format, title=name),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
-        result.append(student_dict)
 
-    return result
+@router.get("/enrolled-students/export")
+def export_enrolled_students(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|xlsx)$"),
+    class_id: Optional[uuid.UUID] = None,
+    section_id: Optional[uuid.UUID] = None,
+    group_id: Optional[uuid.UUID] = None,
+    is_active: Optional[bool] = None,
+    search: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export"),
+    current_user: User = Depends(deps.get_current_active_superuser),
+):
+    """
+    Roster download as CSV or XLSX, streamed from a server-side cursor in constant
+    memory. Same filters and fields as the list; LMS passwords only when asked for.
+    """
+    if fields:
+        selected = _student_list_fields(fields)
+    else:
+        selected = [f for f in _student_list_fields(None) if f != "lms_password"]
+    query = _enrolled_students_query(selected, class_id, section_id, group_id, is_active, search)
+    return _export_response(query, selected, export_format, "enrolled_students")
 
 
 @router.patch("/enrolled-students/{student_id}")
@@ -1736,6 +1912,31 @@ def get_enrolled_employees(db: Session = Depends(get_db)):
     return db.query(EnrolledEmployee).all()
 
 
+EMPLOYEE_EXPORT_COLUMNS = [
+    column.key for column in EnrolledEmployee.__table__.columns if column.key != "lms_password"
+]
+
+
+@router.get("/enrolled-employees/export")
+def export_enrolled_employees(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|xlsx)$"),
+    is_active: Optional[bool] = None,
+    employee_type: Optional[str] = None,
+    system_role: Optional[str] = None,
+    current_user: User = Depends(deps.get_current_active_superuser),
+):
+    """Staff roster download as CSV or XLSX, streamed in constant memory."""
+    query = select(*(getattr(EnrolledEmployee, c) for c in EMPLOYEE_EXPORT_COLUMNS))
+    if is_active is not None:
+        query = query.where(EnrolledEmployee.is_active == is_active)
+    if employee_type:
+        query = query.where(EnrolledEmployee.employee_type == employee_type)
+    if system_role:
+        query = query.where(EnrolledEmployee.system_role == system_role)
+    query = query.order_by(EnrolledEmployee.joined_at, EnrolledEmployee.id)
+    return _export_response(query, EMPLOYEE_EXPORT_COLUMNS, export_format, "enrolled_employees")
+
+
 @router.get(
     "/enrolled-employees/{employee_id}", response_model=EnrolledEmployeeResponse
 )
@@ -1851,156 +2052,104 @@ def remove_enrolled_employee(employee_id: uuid.UUID, db: Session = Depends(get_d
 
 
 @router.post("/users/bulk-enroll")
-async def bulk_enroll(
+def bulk_enroll(
     file: UploadFile = File(...), role: str = Form(...), db: Session = Depends(get_db)
 ):
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only CSV files allowed")
-    content = await file.read()
-    df = pd.read_csv(io.BytesIO(content))
-    year = datetime.utcnow().year
+    """
+    Enroll every row of a CSV/XLSX file as a student or employee in one transaction.
+    Rows that cannot be enrolled are reported (``skipped`` / ``failed``) instead of
+    aborting the upload; the response lists one result per data row. For large files
+    use POST /users/bulk-enroll/jobs.
+    """
+    results = []
+    try:
+        file_format = bulk_enrollment.import_format(file.filename)
+        importer = bulk_enrollment.create_importer(db, role)
+        # Values are read as text so phone/CNIC numbers keep their leading zeros
+        for chunk in bulk_enrollment.read_chunks(
+            file.file, file_format, settings.BULK_ENROLL_CHUNK_ROWS
+        ):
+            results.extend(importer.import_frame(chunk, first_row=len(results) + 1))
+    except bulk_enrollment.BulkEnrollmentError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    return {
+        "message": f"Processed {len(results)} entries from {file_format.upper()}.",
+        **bulk_enrollment.summarize(results),
+        "results": results,
+    }
 
-    # Fill NaN values for optional fields
-    df = df.where(pd.notnull(df), None)
 
-    if role == "student":
-        count = (
-            db.query(EnrolledStudent)
-            .filter(func.extract("year", EnrolledStudent.enrolled_at) == year)
-            .count()
-        )
-        for _, row in df.iterrows():
-            count += 1
-            sys_id = f"STU-{year}-{count:03d}"
-            adm_num = (
-                f"{settings.SCHOOL_NAME_ABBR}-{year}-{uuid.uuid4().hex[:3].upper()}"
-            )
-            lms_login = sys_id
-            lms_password_plain = f"{settings.SCHOOL_NAME_ABBR}@{sys_id}"
+@router.post(
+    "/users/bulk-enroll/jobs", response_model=BackgroundJobResponse, status_code=202
+)
+def submit_bulk_enroll_job(
+    file: UploadFile = File(...), role: str = Form(...), db: Session = Depends(get_db)
+):
+    """
+    Import a large CSV/XLSX in the background, streamed in chunks of
+    BULK_ENROLL_CHUNK_ROWS rows with a commit and checkpoint per chunk. Poll
+    GET /users/bulk-enroll/jobs/{job_id}; ``progress.import_id`` identifies the import
+    for GET /users/bulk-enroll/imports/{import_id} and resuming.
+    """
+    try:
+        record = bulk_enrollment.create_import(db, file.file, file.filename, role)
+    except bulk_enrollment.BulkEnrollmentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job = bulk_enrollment.start_import(db, record)
+    if not job:
+        raise HTTPException(status_code=409, detail="Import is already running")
+    return job.to_dict()
 
-            # Use guardian_email or a default
-            email = (
-                row.get("email") or row.get("guardian_email") or f"{sys_id}@school.com"
-            )
 
-            # Create User
-            user = User(
-                email=email,
-                password_hash=security.get_password_hash(lms_password_plain),
-                role=UserRole.student,
-                is_active=True,
-            )
-            db.add(user)
-            db.flush()
+@router.get("/users/bulk-enroll/jobs/{job_id}", response_model=BackgroundJobResponse)
+def get_bulk_enroll_job(job_id: str):
+    job = job_runner.get(job_id)
+    if not job or job.kind != "bulk_enrollment":
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
-            # Automatic Class & Section finding
-            applying_class_name = str(row.get("class") or row.get("applying_for_class"))
-            target_class = (
-                db.query(Class).filter(Class.name == applying_class_name).first()
-            )
-            if not target_class:
-                target_class = (
-                    db.query(Class).filter(Class.code == applying_class_name).first()
-                )
 
-            if not target_class:
-                continue  # Skip if class not found
+@router.delete("/users/bulk-enroll/jobs/{job_id}", response_model=BackgroundJobResponse)
+def cancel_bulk_enroll_job(job_id: str, db: Session = Depends(get_db)):
+    """Stop after the chunk in progress; the import can be resumed later."""
+    job = job_runner.get(job_id)
+    if not job or job.kind != "bulk_enrollment":
+        raise HTTPException(status_code=404, detail="Job not found")
+    return bulk_enrollment.cancel_import(db, job_id).to_dict()
 
-            available_section = None
-            for section in target_class.sections:
-                curr_cnt = (
-                    db.query(EnrolledStudent)
-                    .filter(EnrolledStudent.section_id == section.id)
-                    .count()
-                )
-                if curr_cnt < (section.capacity or 30):
-                    available_section = section
-                    break
 
-            if not available_section:
-                continue  # Skip if no section available
-
-            student = EnrolledStudent(
-                system_student_id=sys_id,
-                admission_number=adm_num,
-                first_name=row["first_name"],
-                last_name=row["last_name"],
-                gender=row.get("gender", "Other"),
-                date_of_birth=str(row["date_of_birth"]),
-                b_form_number=str(row.get("b_form_number", "N/A")),
-                guardian_name=row["guardian_name"],
-                guardian_cnic=str(row.get("guardian_cnic", "N/A")),
-                guardian_phone=str(row.get("guardian_phone", "N/A")),
-                guardian_email=str(row.get("guardian_email", "N/A")),
-                class_id=target_class.id,
-                section_id=available_section.id,
-                applying_for_class=applying_class_name,
-                lms_email=email,
-                lms_login=lms_login,
-                lms_password=lms_password_plain,
-                user_id=user.id,
-                is_active=True,
-                student_photo_url=row.get("photo_url"),
-            )
-            db.add(student)
-            db.flush()
+@router.get("/users/bulk-enroll/imports/{import_id}", response_model=BulkImportResponse)
+def get_bulk_import(import_id: uuid.UUID, db: Session = Depends(get_db)):
+    """The stored checkpoint of an import; survives restarts, unlike the job status."""
+    record = db.get(BulkImport, import_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return record
 
-            current_year = get_current_academic_year(db)
-            auto_enroll_student_subjects(
-                db,
-                student.id,
-                target_class.id,
-                current_year.id if current_year else None,
-            )
-    elif role in ["teacher", "staff"]:
-        count = (
-            db.query(EnrolledEmployee)
-            .filter(func.extract("year", EnrolledEmployee.joined_at) == year)
-            .count()
-        )
-        for _, row in df.iterrows():
-            count += 1
-            emp_id = f"EMP-{year}-{count:03d}"
-            lms_login = emp_id
-            lms_password_plain = f"{settings.SCHOOL_NAME_ABBR}@{emp_id}"
-
-            # Create User (Only for teachers)
-            system_role_val = str(row.get("system_role", role)).lower()
-            user = None
-            if system_role_val == "teacher":
-                user = User(
-                    email=row["email"],
-                    password_hash=security.get_password_hash(lms_password_plain),
-                    role=UserRole.teacher,
-                    is_active=True,
-                )
-                db.add(user)
-                db.flush()
-
-            employee = EnrolledEmployee(
-                employee_id=emp_id,
-                first_name=row["first_name"],
-                last_name=row["last_name"],
-                gender=row.get("gender", "Other"),
-                date_of_birth=str(row["date_of_birth"]),
-                phone=str(row["phone"]),
-                email=row["email"],
-                cnic=str(row["cnic"]),
-                employee_type=row.get("employee_type", "teaching"),
-                functional_role=row.get("functional_role", "Teacher"),
-                system_role=row.get("system_role", role),
-                highest_qualification=row.get("highest_qualification", "N/A"),
-                experience_years=str(row.get("experience_years", "0")),
-                lms_email=row["email"],
-                lms_login=emp_id,
-                lms_password=lms_password_plain,
-                user_id=user.id if user else None,
-                is_active=True,
-                photo_url=row.get("photo_url"),  # Handle picture from excel
-            )
-            db.add(employee)
-    db.commit()
-    return {"message": f"Processed {len(df)} entries from CSV."}
+
+@router.post(
+    "/users/bulk-enroll/imports/{import_id}/resume",
+    response_model=BackgroundJobResponse,
+    status_code=202,
+)
+def resume_bulk_import(import_id: uuid.UUID, db: Session = Depends(get_db)):
+    """Continue a failed, cancelled or interrupted import after its last committed chunk."""
+    record = db.get(BulkImport, import_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Import not found")
+    if record.status == JobStatus.completed:
+        raise HTTPException(status_code=400, detail="Import already completed")
+    job = job_runner.get(record.job_id) if record.job_id else None
+    if job and job.status not in JobStatus.FINISHED:
+        raise HTTPException(status_code=409, detail="Import is already running")
+    if not os.path.exists(record.file_path):
+        raise HTTPException(status_code=400, detail="The staged file is no longer available")
+    job = bulk_enrollment.start_import(db, record)
+    if not job:
+        raise HTTPException(status_code=409, detail="Import is already running")
+    return job.to_dict()
 
 
 # --- Website Content Management ---
@@ -3282,7 +3431,7 @@ def undo_promotion(promotion_id: uuid.UUID, db: Session = Depends(get_db)):
 
 @router.get("/lms/promotions/history")
 def get_promotion_history(
-    class_id: Optional[uuid.UUID] = None, db: Session = Depends(get_db)
+    class_id: Optional[uuid.UUID] = None, db: Session = Depends(read_db())
 ):
     query = db.query(PromotionHistory)
 
@@ -1,12 +1,17 @@
 from datetime import datetime, timedelta
-from typing import Any, Optional
-from fastapi import APIRouter, Depends, HTTPException, Body, Response, status
+from typing import Any, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Body, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError, jwt
+from sqlalchemy import delete, literal, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.core import security
+from app.core.auth_cache import invalidate_principal
 from app.core.config import settings
+from app.core.database import get_async_db
 from app.models.auth import User, UserSession
 from app.models.users import EnrolledStudent, EnrolledEmployee
 from app.schemas.auth import Token, Login, RefreshTokenRequest
@@ -15,72 +20,100 @@ from app.utils.audit_logger import audit_logger
 router = APIRouter()
 
 
-def authenticate_user(
-    db: Session, email_or_login: str, password: str
-) -> Optional[User]:
-    print(f"Authenticating: {email_or_login}")
+def _login_user_id(email_or_login: str):
+    """
+    Scalar subquery for the user a login identifier belongs to: ``users.email`` first, then
+    a student's LMS email/login, then an employee's. Every branch is a lookup on a unique
+    index, so this resolves in one round trip together with the profile joins.
+    """
+    candidates = union_all(
+        select(User.id.label("user_id"), literal(0).label("rank")).where(
+            User.email == email_or_login
+        ),
+        select(EnrolledStudent.user_id, literal(1)).where(
+            (EnrolledStudent.lms_email == email_or_login)
+            | (EnrolledStudent.lms_login == email_or_login),
+            EnrolledStudent.user_id.is_not(None),
+        ),
+        select(EnrolledEmployee.user_id, literal(2)).where(
+            (EnrolledEmployee.lms_email == email_or_login)
+            | (EnrolledEmployee.lms_login == email_or_login),
+            EnrolledEmployee.user_id.is_not(None),
+        ),
+    ).subquery()
+    return (
+        select(candidates.c.user_id)
+        .order_by(candidates.c.rank)
+        .limit(1)
+        .scalar_subquery()
+    )
 
-    # 1. Check User table (Centralized auth)
-    user = db.query(User).filter(User.email == email_or_login).first()
-    print(f"User from email query: {user}")
-
-    # 2. If not found, check LMS credentials in EnrolledStudent
-    if not user:
-        student = (
-            db.query(EnrolledStudent)
-            .filter(
-                (EnrolledStudent.lms_email == email_or_login)
-                | (EnrolledStudent.lms_login == email_or_login)
-            )
-            .first()
-        )
-        print(f"Student found: {student}")
-        if student and student.user_id:
-            user = db.query(User).filter(User.id == student.user_id).first()
-
-    # 3. Check EnrolledEmployee (Teachers/Staff)
-    if not user:
-        employee = (
-            db.query(EnrolledEmployee)
-            .filter(
-                (EnrolledEmployee.lms_email == email_or_login)
-                | (EnrolledEmployee.lms_login == email_or_login)
-            )
-            .first()
-        )
-        print(f"Employee found: {employee}")
-        if employee and employee.user_id:
-            user = db.query(User).filter(User.id == employee.user_id).first()
 
-    if not user:
+def _display_name(
+    user: User,
+    student: Optional[EnrolledStudent],
+    employee: Optional[EnrolledEmployee],
+) -> str:
+    profile = student or employee
+    if profile:
+        return f"{profile.first_name} {profile.last_name}".strip()
+    return user.email
+
+
+async def _cap_user_sessions(db: AsyncSession, user_id) -> None:
+    """Delete the user's sessions beyond AUTH_MAX_SESSIONS_PER_USER, least recently refreshed first."""
+    if not settings.AUTH_MAX_SESSIONS_PER_USER:
+        return
+    newest = (
+        select(UserSession.id)
+        .where(UserSession.user_id == user_id)
+        .order_by(UserSession.expires_at.desc())
+        .limit(settings.AUTH_MAX_SESSIONS_PER_USER)
+    )
+    await db.execute(
+        delete(UserSession)
+        .where(UserSession.user_id == user_id, UserSession.id.not_in(newest))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def authenticate_user(
+    db: AsyncSession, email_or_login: str, password: str
+) -> Optional[Tuple[User, str]]:
+    """The user and their display name if the credentials match, else None."""
+    print(f"Authenticating: {email_or_login}")
+
+    row = (await db.execute(deps.user_with_profiles(_login_user_id(email_or_login)))).first()
+    if not row:
         print("No user found")
         return None
 
+    user, student_profile, employee_profile = row
     print(f"Found user: {user.email}, verifying password")
 
     # Simple password check
-    if not security.verify_password(password, user.password_hash):
+    if not await security.verify_password_async(password, user.password_hash):
         print("Password mismatch")
         return None
 
     print("Password verified, returning user")
-    return user
+    return user, _display_name(user, student_profile, employee_profile)
 
 
 @router.post("/login")
-def login_access_token(
+async def login_access_token(
     response: Response,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     print(f"\n=== LOGIN DEBUG ===")
     print(f"Username: {form_data.username}")
     print(f"==================\n")
 
-    user = authenticate_user(db, form_data.username, form_data.password)
-    print(f"User after authenticate: {user}")
+    authenticated = await authenticate_user(db, form_data.username, form_data.password)
+    print(f"User after authenticate: {authenticated}")
 
-    if not user:
+    if not authenticated:
         # Log failed login attempt
         audit_logger.log_login(
             user_id="unknown", email=form_data.username, role="unknown", success=False
@@ -94,6 +127,8 @@ def login_access_token(
             },
         )
 
+    user, display_name = authenticated
+
     # Check is_active
     is_active = getattr(user, "is_active", True)
     if is_active == False:
@@ -108,18 +143,24 @@ def login_access_token(
             detail={"success": False, "message": "Account is inactive", "data": None},
         )
 
+    # Read what the response needs before commit() expires the instance
+    user_id, user_email = user.id, user.email
+    user_role = user.role.value if hasattr(user.role, "value") else user.role
+
     access_token = security.create_access_token(str(user.id))
     refresh_token = security.create_refresh_token(str(user.id))
 
-    # Store refresh token in session
+    # Store refresh token in session (by hash), then drop the user's oldest sessions over the cap
     session = UserSession(
         user_id=user.id,
-        refresh_token=refresh_token,
+        token_hash=security.hash_refresh_token(refresh_token),
         expires_at=datetime.utcnow()
         + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
     )
     db.add(session)
-    db.commit()
+    await db.flush()
+    await _cap_user_sessions(db, user_id)
+    await db.commit()
 
     # Set HTTP-only cookies
     response.set_cookie(
@@ -140,7 +181,6 @@ def login_access_token(
     )
 
     # Determine redirect based on role
-    user_role = user.role.value if hasattr(user.role, "value") else user.role
     if user_role == "teacher":
         redirect_to = "/lms/teacher/dashboard"
     elif user_role == "student":
@@ -150,31 +190,11 @@ def login_access_token(
     else:
         redirect_to = "/"
 
-    # Try to derive a display name from linked student/employee records
-    display_name = user.email
-    student_profile = (
-        db.query(EnrolledStudent).filter(EnrolledStudent.user_id == user.id).first()
-    )
-    if student_profile:
-        display_name = (
-            f"{student_profile.first_name} {student_profile.last_name}".strip()
-        )
-    else:
-        employee_profile = (
-            db.query(EnrolledEmployee)
-            .filter(EnrolledEmployee.user_id == user.id)
-            .first()
-        )
-        if employee_profile:
-            display_name = (
-                f"{employee_profile.first_name} {employee_profile.last_name}".strip()
-            )
-
-    print(f"Login SUCCESS for: {user.email}, role: {user_role}")
+    print(f"Login SUCCESS for: {user_email}, role: {user_role}")
 
     # Log successful login
     audit_logger.log_login(
-        user_id=str(user.id), email=user.email, role=user_role, success=True
+        user_id=str(user_id), email=user_email, role=user_role, success=True
     )
 
     return {
@@ -185,7 +205,7 @@ def login_access_token(
             "role": user_role,
             "redirect_to": redirect_to,
             "name": display_name,
-            "email": user.email,
+            "email": user_email,
         },
     }
 
@@ -197,22 +217,43 @@ def refresh_token(
     db: Session = Depends(deps.get_db),
 ) -> Any:
     """
-    Refresh access token using refresh token
+    Exchange a refresh token for a new access token and a new refresh token. The old
+    refresh token stops working: the session row is rotated to the new token's hash in
+    one conditional UPDATE, so two concurrent refreshes with the same token cannot both win.
     """
-    session = (
-        db.query(UserSession)
-        .filter(
-            UserSession.refresh_token == refresh_data.refresh_token,
+    invalid = HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    try:
+        payload = jwt.decode(
+            refresh_data.refresh_token, security.SECRET_KEY, algorithms=[security.ALGORITHM]
+        )
+    except JWTError:
+        raise invalid
+    if payload.get("type") != "refresh" or not payload.get("sub"):
+        raise invalid
+
+    user_id = payload["sub"]
+    new_refresh_token = security.create_refresh_token(user_id)
+    rotated = db.execute(
+        update(UserSession)
+        .where(
+            UserSession.token_hash == security.hash_refresh_token(refresh_data.refresh_token),
             UserSession.expires_at > datetime.utcnow(),
         )
-        .first()
-    )
-
-    if not session:
-        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
-
-    new_access_token = security.create_access_token(str(session.user_id))
+        .values(
+            token_hash=security.hash_refresh_token(new_refresh_token),
+            expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+        .returning(UserSession.user_id)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    if rotated is None or str(rotated) != user_id:
+        db.rollback()
+        raise invalid
+
+    role = db.query(User.role).filter(User.id == rotated).scalar()
+    db.commit()
 
+    new_access_token = security.create_access_token(user_id)
     response.set_cookie(
         key="access_token",
         value=new_access_token,
@@ -221,28 +262,43 @@ def refresh_token(
         samesite="lax",
         max_age=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
     )
+    response.set_cookie(
+        key="refresh_token",
+        value=new_refresh_token,
+        httponly=True,
+        secure=True,
+        samesite="lax",
+        max_age=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600,
+    )
 
-    user = db.query(User).filter(User.id == session.user_id).first()
-
+    role = role.value if hasattr(role, "value") else (role or "student")
     return {
+        "data": {"token": new_access_token, "role": role},
         "access_token": new_access_token,
-        "refresh_token": session.refresh_token,
+        "refresh_token": new_refresh_token,
         "token_type": "bearer",
-        "role": user.role if user else "student",
     }
 
 
 @router.post("/logout")
 def logout(
+    request: Request,
     response: Response,
     refresh_token: Optional[str] = Body(None),
     db: Session = Depends(deps.get_db),
+    token: Optional[str] = Depends(deps.reusable_oauth2),
 ):
+    invalidate_principal(deps.token_user_id(request, token))
     if refresh_token:
-        db.query(UserSession).filter(
-            UserSession.refresh_token == refresh_token
-        ).delete()
-        db.commit()
+        session = (
+            db.query(UserSession)
+            .filter(UserSession.token_hash == security.hash_refresh_token(refresh_token))
+            .first()
+        )
+        if session:
+            invalidate_principal(session.user_id)
+            db.delete(session)
+            db.commit()
 
     response.delete_cookie("access_token")
     response.delete_cookie("refresh_token")
@@ -349,62 +405,59 @@ def verify_otp(data: PasswordResetVerify, db: Session = Depends(deps.get_db)) ->
 
 
 @router.post("/password-reset/reset")
-def reset_password(
-    data: PasswordResetConfirm, db: Session = Depends(deps.get_db)
+async def reset_password(
+    data: PasswordResetConfirm, db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Reset password after OTP verification
     """
+    email = data.email.lower()
     # Verify OTP again to be sure
     otp = (
-        db.query(PasswordResetOTP)
-        .filter(
-            PasswordResetOTP.email == data.email.lower(),
-            PasswordResetOTP.otp_code == data.otp_code,
-            PasswordResetOTP.expires_at > datetime.utcnow(),
-            PasswordResetOTP.is_used == False,
+        await db.scalars(
+            select(PasswordResetOTP)
+            .where(
+                PasswordResetOTP.email == email,
+                PasswordResetOTP.otp_code == data.otp_code,
+                PasswordResetOTP.expires_at > datetime.utcnow(),
+                PasswordResetOTP.is_used == False,
+            )
+            .limit(1)
         )
-        .first()
-    )
+    ).first()
 
     if not otp:
         raise HTTPException(status_code=400, detail="Invalid or expired OTP")
 
     # Hash new password
-    hashed_password = security.get_password_hash(data.new_password)
+    hashed_password = await security.get_password_hash_async(data.new_password)
 
     # Update User(s) associated with this email
-    users = db.query(User).filter(User.email == data.email.lower()).all()
+    users = (await db.scalars(select(User).where(User.email == email))).all()
 
     # Also Check Students/Employees for this email and update their lms_password
     students = (
-        db.query(EnrolledStudent)
-        .filter(EnrolledStudent.lms_email == data.email.lower())
-        .all()
-    )
+        await db.scalars(select(EnrolledStudent).where(EnrolledStudent.lms_email == email))
+    ).all()
     employees = (
-        db.query(EnrolledEmployee)
-        .filter(EnrolledEmployee.lms_email == data.email.lower())
-        .all()
-    )
+        await db.scalars(select(EnrolledEmployee).where(EnrolledEmployee.lms_email == email))
+    ).all()
 
     for user in users:
         user.password_hash = hashed_password
         # Invalidate existing sessions
-        db.query(UserSession).filter(UserSession.user_id == user.id).delete()
+        await db.execute(delete(UserSession).where(UserSession.user_id == user.id))
 
-    # Hash and update lms_password for students
-    lms_hashed_password = security.get_password_hash(data.new_password)
+    # Update lms_password for students and employees (same hash; bcrypt salts are per-hash anyway)
     for s in students:
-        s.lms_password = lms_hashed_password
+        s.lms_password = hashed_password
 
-    # Hash and update lms_password for employees
     for e in employees:
-        e.lms_password = lms_hashed_password
+        e.lms_password = hashed_password
 
     # Mark OTP as used
     otp.is_used = True
-    db.commit()
+    await db.commit()
 
     return {
         "message": "Password reset successfully. You can now log in with your new password."
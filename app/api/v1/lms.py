@@ -1,10 +1,11 @@
 from typing import List, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import uuid
 import os
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, select
 from collections import defaultdict
 
 from app.api import deps
@@ -1009,7 +1010,7 @@ def get_student_grades(
 @router.get("/grades/class/{class_subject_id}", response_model=APIResponse)
 def get_class_grades(
     class_subject_id: uuid.UUID,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.read_db()),
     current_user: User = Depends(deps.RoleChecker(["teacher", "admin"])),
 ):
     """Get all grades for a specific subject (Teacher view)"""
@@ -1728,17 +1729,17 @@ def get_notifications(
 
 
 @router.get("/notifications/unread-count", response_model=APIResponse)
-def get_unread_count(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def get_unread_count(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user_async),
 ):
     """Get count of unread notifications"""
     from app.models.communication import Message
 
-    count = (
-        db.query(Message)
-        .filter(Message.receiver_id == current_user.id, Message.is_read == False)
-        .count()
+    count = await db.scalar(
+        select(func.count(Message.id)).where(
+            Message.receiver_id == current_user.id, Message.is_read == False
+        )
     )
 
     return {
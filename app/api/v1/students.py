@@ -24,14 +24,10 @@ router = APIRouter()
 
 @router.get("/dashboard")
 def get_student_dashboard(
-    current_user: Any = Depends(deps.get_current_user),
+    principal: deps.CurrentPrincipal = Depends(deps.get_current_principal),
     db: Session = Depends(get_db),
 ):
-    student = (
-        db.query(EnrolledStudent)
-        .filter(EnrolledStudent.user_id == current_user.id)
-        .first()
-    )
+    student = principal.student
     if not student:
         raise HTTPException(status_code=404, detail="Student profile not found")
 
@@ -49,14 +45,10 @@ def get_student_dashboard(
 
 @router.get("/academic-info")
 def get_academic_info(
-    current_user: Any = Depends(deps.get_current_user),
+    principal: deps.CurrentPrincipal = Depends(deps.get_current_principal),
     db: Session = Depends(get_db),
 ):
-    student = (
-        db.query(EnrolledStudent)
-        .filter(EnrolledStudent.user_id == current_user.id)
-        .first()
-    )
+    student = principal.student
     if not student:
         raise HTTPException(status_code=404, detail="Student profile not found")
 
@@ -81,14 +73,10 @@ def get_academic_info(
 
 @router.get("/fee-history", response_model=List[FeePaymentResponse])
 def get_fee_history(
-    current_user: Any = Depends(deps.get_current_user),
+    principal: deps.CurrentPrincipal = Depends(deps.get_current_principal),
     db: Session = Depends(get_db),
 ):
-    student = (
-        db.query(EnrolledStudent)
-        .filter(EnrolledStudent.user_id == current_user.id)
-        .first()
-    )
+    student = principal.student
     if not student:
         raise HTTPException(status_code=404, detail="Student profile not found")
 
@@ -99,14 +87,10 @@ def get_fee_history(
     "/results", response_model=List[Any]
 )  # Create a proper Result schema if needed
 def get_results(
-    current_user: Any = Depends(deps.get_current_user),
+    principal: deps.CurrentPrincipal = Depends(deps.get_current_principal),
     db: Session = Depends(get_db),
 ):
-    student = (
-        db.query(EnrolledStudent)
-        .filter(EnrolledStudent.user_id == current_user.id)
-        .first()
-    )
+    student = principal.student
     if not student:
         raise HTTPException(status_code=404, detail="Student profile not found")
 
@@ -115,14 +99,10 @@ def get_results(
 
 @router.get("/personal-info", response_model=EnrolledStudentResponse)
 def get_personal_info(
-    current_user: Any = Depends(deps.get_current_user),
+    principal: deps.CurrentPrincipal = Depends(deps.get_current_principal),
     db: Session = Depends(get_db),
 ):
-    student = (
-        db.query(EnrolledStudent)
-        .filter(EnrolledStudent.user_id == current_user.id)
-        .first()
-    )
+    student = principal.student
     if not student:
         raise HTTPException(status_code=404, detail="Student profile not found")
     return student
@@ -1,14 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db, SessionLocal
 from app.api import deps
 from app.models.auth import User
+from app.models.users import EnrolledEmployee
 from app.schemas import timetable as schemas
+from app.schemas.jobs import BackgroundJobResponse
+from app.schemas.users import EnrolledEmployeeResponse
 from app.models import timetable as models
-from app.services.scheduling_engine import SchedulingEngine
+from app.services.background_jobs import Job, JobStatus, job_runner
+from app.services.scheduling_engine import SchedulingEngine, GenerationCancelled
+from app.services.teacher_matching import get_teacher_subject_index
+from app.services.timetable_solver import TimetableSolver
+from app.services.timetable_whatif import persist_candidate, run_what_if
 
 router = APIRouter()
 
@@ -166,19 +175,37 @@ def set_subject_constraint(
 # --- Generation Endpoints ---
 
 
-@router.post("/generate", response_model=schemas.TimetableVersion)
+@router.post("/generate", response_model=schemas.TimetableGenerationResult)
 def generate_timetable(
     request: schemas.TimetableGenerationRequest, db: Session = Depends(get_db)
 ):
     try:
-        engine = SchedulingEngine(db, request.academic_year_id)
-        version = engine.generate(request.version_name, request.class_ids)
+        engine = SchedulingEngine(db, request.academic_year_id, search_mode=request.search_mode)
+        version = engine.generate(
+            request.version_name,
+            request.class_ids,
+            max_nodes_per_section=request.max_nodes_per_section,
+            max_seconds_per_section=request.max_seconds_per_section,
+            max_nodes=request.max_nodes,
+            max_seconds=request.max_seconds,
+            parallel=request.parallel,
+            optimize=request.optimize,
+            optimize_seconds=request.optimize_seconds,
+        )
         if not version:
             raise HTTPException(
                 status_code=400,
                 detail="Could not generate any slots. Please check if subjects and teachers are correctly assigned.",
             )
-        return version
+        result = schemas.TimetableGenerationResult.model_validate(version)
+        return result.model_copy(
+            update={
+                "is_partial": bool(engine.unplaced),
+                "nodes_explored": engine.solver.nodes,
+                "unplaced_periods": [schemas.UnplacedPeriod(**u) for u in engine.unplaced],
+                "optimization": engine.optimization,
+            }
+        )
     except HTTPException:
         raise
     except ValueError as e:
@@ -187,6 +214,171 @@ def generate_timetable(
         raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
 
 
+@router.post("/versions/{version_id}/repair", response_model=schemas.TimetableRepairResult)
+def repair_version(
+    version_id: UUID, request: schemas.TimetableRepairRequest, db: Session = Depends(get_db)
+):
+    """
+    Re-place only the periods affected by a teacher leaving or a room going out of service,
+    keeping the rest of the version as it is. Slots are changed in place.
+    """
+    version = (
+        db.query(models.TimetableVersion)
+        .filter(models.TimetableVersion.id == version_id)
+        .first()
+    )
+    if not version:
+        raise HTTPException(status_code=404, detail="Version not found")
+    try:
+        engine = SchedulingEngine(db, version.academic_year_id)
+        report = engine.repair(
+            version_id,
+            teacher_id=request.teacher_id,
+            replacement_teacher_id=request.replacement_teacher_id,
+            room_id=request.room_id,
+            max_seconds=request.max_seconds,
+        )
+        return schemas.TimetableRepairResult(
+            **report,
+            is_partial=bool(engine.unplaced),
+            unplaced_periods=[schemas.UnplacedPeriod(**u) for u in engine.unplaced],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Repair failed: {str(e)}")
+
+
+def _run_generation_job(job: Job, request: schemas.TimetableGenerationRequest) -> Optional[dict]:
+    """Background job target: runs the engine on its own session and reports per-section progress."""
+    db = SessionLocal()
+    sections = []
+
+    def on_progress(event: dict):
+        sections.append(
+            {
+                "class_name": event["class_name"],
+                "section_name": event["section_name"],
+                "placed": event["placed"],
+                "unplaced": event["unplaced"],
+            }
+        )
+        # Replace rather than mutate: the status endpoint may be serializing the old dict
+        job.progress = {
+            "completed": event["completed_sections"],
+            "total": event["total_sections"],
+            "nodes_explored": event["nodes_explored"],
+            "sections": list(sections),
+        }
+
+    try:
+        engine = SchedulingEngine(db, request.academic_year_id, search_mode=request.search_mode)
+        version = engine.generate(
+            request.version_name,
+            request.class_ids,
+            max_nodes_per_section=request.max_nodes_per_section,
+            max_seconds_per_section=request.max_seconds_per_section,
+            max_nodes=request.max_nodes,
+            max_seconds=request.max_seconds,
+            parallel=request.parallel,
+            optimize=request.optimize,
+            optimize_seconds=request.optimize_seconds,
+            progress=on_progress,
+            should_stop=job.cancel_requested,
+        )
+        if not version:
+            raise ValueError(
+                "Could not generate any slots. Please check if subjects and teachers are correctly assigned."
+            )
+        return {
+            "version_id": str(version.id),
+            "is_partial": bool(engine.unplaced),
+            "nodes_explored": engine.solver.nodes,
+            "unplaced_periods": [
+                schemas.UnplacedPeriod(**u).model_dump(mode="json") for u in engine.unplaced
+            ],
+            "optimization": engine.optimization,
+        }
+    except GenerationCancelled:
+        return None
+    finally:
+        db.close()
+
+
+@router.post("/generate/jobs", response_model=BackgroundJobResponse, status_code=202)
+def submit_generation_job(request: schemas.TimetableGenerationRequest):
+    """Queue a generation run and return immediately; poll GET /generate/jobs/{job_id}."""
+    if request.search_mode not in TimetableSolver.SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown search mode '{request.search_mode}'")
+    job = job_runner.submit("timetable_generation", _run_generation_job, request)
+    return job.to_dict()
+
+
+@router.get("/generate/jobs/{job_id}", response_model=BackgroundJobResponse)
+def get_generation_job(job_id: str):
+    job = job_runner.get(job_id)
+    if not job or job.kind != "timetable_generation":
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.delete("/generate/jobs/{job_id}", response_model=BackgroundJobResponse)
+def cancel_generation_job(job_id: str):
+    job = job_runner.get(job_id)
+    if not job or job.kind != "timetable_generation":
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_runner.cancel(job_id).to_dict()
+
+
+@router.post("/what-if", response_model=BackgroundJobResponse, status_code=202)
+def submit_what_if(request: schemas.TimetableWhatIfRequest):
+    """
+    Solve several candidate configurations concurrently, in memory only. Poll
+    GET /what-if/{job_id} for metrics and a diff against the active version, then save the
+    chosen candidate with POST /what-if/{job_id}/persist.
+    """
+    names = [candidate.name for candidate in request.candidates]
+    if not names:
+        raise HTTPException(status_code=400, detail="Give at least one candidate")
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=400, detail="Candidate names must be unique")
+    for candidate in request.candidates:
+        if candidate.search_mode not in TimetableSolver.SEARCH_MODES:
+            raise HTTPException(status_code=400, detail=f"Unknown search mode '{candidate.search_mode}'")
+    job = job_runner.submit(
+        "timetable_what_if",
+        run_what_if,
+        request.academic_year_id,
+        [candidate.model_dump() for candidate in request.candidates],
+        request.class_ids,
+        request.max_seconds,
+        request.optimize,
+        request.optimize_seconds,
+    )
+    return job.to_dict()
+
+
+@router.get("/what-if/{job_id}", response_model=BackgroundJobResponse)
+def get_what_if(job_id: str):
+    job = job_runner.get(job_id)
+    if not job or job.kind != "timetable_what_if":
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.post("/what-if/{job_id}/persist", response_model=schemas.TimetableVersion)
+def persist_what_if(job_id: str, request: schemas.TimetableWhatIfPersist, db: Session = Depends(get_db)):
+    job = job_runner.get(job_id)
+    if not job or job.kind != "timetable_what_if":
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != JobStatus.completed:
+        raise HTTPException(status_code=400, detail=f"What-if run is {job.status}")
+    try:
+        return persist_candidate(db, job, request.candidate, request.version_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # --- Retrieval Endpoints ---
 
 
@@ -228,69 +420,44 @@ def get_class_subjects(class_id: UUID, db: Session = Depends(get_db)):
     return db.query(ClassSubject).filter(ClassSubject.class_id == class_id).all()
 
 
-@router.get("/my", response_model=List[dict])
-def get_my_timetable(
-    current_user: User = Depends(deps.get_current_user),
+@router.get("/my", response_model=dict)
+async def get_my_timetable(
+    principal: deps.CurrentPrincipal = Depends(deps.get_current_principal_async),
     version_id: Optional[UUID] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get current user's (teacher/student) timetable"""
-    from app.models.users import EnrolledEmployee, EnrolledStudent
-
-    user_id = None
-
-    if current_user.role == "teacher":
-        employee = (
-            db.query(EnrolledEmployee)
-            .filter(EnrolledEmployee.user_id == current_user.id)
-            .first()
-        )
-        if employee:
-            user_id = employee.id
-    elif current_user.role == "student":
-        student = (
-            db.query(EnrolledStudent)
-            .filter(EnrolledStudent.user_id == current_user.id)
-            .first()
-        )
-        if student:
-            user_id = student.id
-
-    if not user_id:
-        return {"success": False, "message": "User profile not found", "data": []}
-
     # Get timetable slots based on role
-    if current_user.role == "teacher":
-        query = db.query(models.TimetableSlot).filter(
-            models.TimetableSlot.teacher_id == user_id
-        )
-    elif current_user.role == "student":
-        query = db.query(models.TimetableSlot).filter(
-            models.TimetableSlot.class_id
-            == (
-                db.query(EnrolledStudent).filter(EnrolledStudent.id == user_id).first()
-            ).class_id
-            if db.query(EnrolledStudent).filter(EnrolledStudent.id == user_id).first()
-            else None
-        )
+    if principal.user.role == "teacher":
+        if not principal.employee:
+            return {"success": False, "message": "User profile not found", "data": []}
+        slot_filter = models.TimetableSlot.teacher_id == principal.employee.id
+    elif principal.user.role == "student":
+        if not principal.student:
+            return {"success": False, "message": "User profile not found", "data": []}
+        slot_filter = models.TimetableSlot.class_id == principal.student.class_id
     else:
         return {"success": False, "message": "Invalid role", "data": []}
 
-    if version_id:
-        query = query.filter(models.TimetableSlot.version_id == version_id)
-    else:
-        active_version = (
-            db.query(models.TimetableVersion)
-            .filter(models.TimetableVersion.is_active == True)
-            .first()
+    if not version_id:
+        version_id = await db.scalar(
+            select(models.TimetableVersion.id).where(models.TimetableVersion.is_active == True)
         )
-        if active_version:
-            query = query.filter(models.TimetableSlot.version_id == active_version.id)
-        else:
+        if not version_id:
             return {"success": True, "message": "No active timetable", "data": []}
 
-    slots = query.order_by(
-        models.TimetableSlot.day, models.TimetableSlot.period_index
+    # Eager-load what the response reads: lazy loads are not available on an AsyncSession
+    slots = (
+        await db.scalars(
+            select(models.TimetableSlot)
+            .options(
+                joinedload(models.TimetableSlot.subject),
+                joinedload(models.TimetableSlot.class_),
+                joinedload(models.TimetableSlot.room),
+            )
+            .where(slot_filter, models.TimetableSlot.version_id == version_id)
+            .order_by(models.TimetableSlot.day, models.TimetableSlot.period_index)
+        )
     ).all()
 
     # Convert to dict
@@ -370,6 +537,21 @@ def get_teacher_subjects(teacher_id: UUID, db: Session = Depends(get_db)):
     )
 
 
+@router.get("/suggest-teachers", response_model=List[EnrolledEmployeeResponse])
+def suggest_teachers(academic_year_id: UUID, subject_id: UUID, db: Session = Depends(get_db)):
+    """Active teachers whose specialization matches the subject, from the cached matching index."""
+    teacher_ids = get_teacher_subject_index(db, academic_year_id).teachers_for(subject_id)
+    if not teacher_ids:
+        return []
+    order = {teacher_id: i for i, teacher_id in enumerate(teacher_ids)}
+    teachers = (
+        db.query(EnrolledEmployee)
+        .filter(EnrolledEmployee.id.in_(teacher_ids), EnrolledEmployee.is_active == True)
+        .all()
+    )
+    return sorted(teachers, key=lambda t: order[t.id])
+
+
 @router.get("/rooms", response_model=List[schemas.Room])
 def get_rooms(db: Session = Depends(get_db)):
     return db.query(models.Room).filter(models.Room.is_active == True).all()
@@ -47,16 +47,12 @@ def get_full_url(path: str) -> str:
 
 
 @router.get("/me")
-def get_my_profile(
-    current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(deps.get_db),
+async def get_my_profile(
+    principal: deps.CurrentPrincipal = Depends(deps.get_current_principal_async),
 ):
+    current_user = principal.user
     if current_user.role == "student":
-        profile = (
-            db.query(EnrolledStudent)
-            .filter(EnrolledStudent.user_id == current_user.id)
-            .first()
-        )
+        profile = principal.student
         if not profile:
             return {
                 "success": True,
@@ -82,11 +78,7 @@ def get_my_profile(
             },
         }
     else:
-        profile = (
-            db.query(EnrolledEmployee)
-            .filter(EnrolledEmployee.user_id == current_user.id)
-            .first()
-        )
+        profile = principal.employee
         if not profile:
             return {
                 "success": True,
@@ -204,15 +196,12 @@ def verify_role_access(
 
 @router.get("/academic-info")
 def get_my_academic_info(
-    current_user: User = Depends(deps.get_current_user),
+    principal: deps.CurrentPrincipal = Depends(deps.get_current_principal),
     db: Session = Depends(deps.get_db),
 ):
+    current_user = principal.user
     if current_user.role == "student":
-        student = (
-            db.query(EnrolledStudent)
-            .filter(EnrolledStudent.user_id == current_user.id)
-            .first()
-        )
+        student = principal.student
         if not student:
             return {"success": True, "message": "No academic info", "data": {}}
 
@@ -242,11 +231,7 @@ def get_my_academic_info(
             },
         }
     else:
-        employee = (
-            db.query(EnrolledEmployee)
-            .filter(EnrolledEmployee.user_id == current_user.id)
-            .first()
-        )
+        employee = principal.employee
         if not employee:
             return AcademicInfoResponse()
 
@@ -303,18 +288,15 @@ def get_my_academic_info(
 
 @router.get("/teacher/classes", response_model=dict)
 def get_teacher_classes(
-    current_user: User = Depends(deps.get_current_user),
+    principal: deps.CurrentPrincipal = Depends(deps.get_current_principal),
     db: Session = Depends(deps.get_db),
 ):
     """Get all classes a teacher teaches with their subjects and student counts"""
+    current_user = principal.user
     if current_user.role not in ["teacher", "admin"]:
         return {"success": False, "message": "Unauthorized", "data": []}
 
-    employee = (
-        db.query(EnrolledEmployee)
-        .filter(EnrolledEmployee.user_id == current_user.id)
-        .first()
-    )
+    employee = principal.employee
     if not employee:
         return {"success": False, "message": "Employee not found", "data": []}
 
@@ -386,21 +368,18 @@ def get_teacher_classes(
 
 @router.get("/teacher/stats")
 def get_teacher_stats(
-    current_user: User = Depends(deps.get_current_user),
+    principal: deps.CurrentPrincipal = Depends(deps.get_current_principal),
     db: Session = Depends(deps.get_db),
 ):
     """Get dashboard stats for teacher"""
+    current_user = principal.user
     if current_user.role not in ["teacher", "admin"]:
         return {"success": False, "message": "Unauthorized", "data": {}}
 
     from app.models.lms import AttendanceRecord, AttendanceStatus
     from datetime import datetime, timedelta
 
-    employee = (
-        db.query(EnrolledEmployee)
-        .filter(EnrolledEmployee.user_id == current_user.id)
-        .first()
-    )
+    employee = principal.employee
     if not employee:
         return {"success": False, "message": "Employee not found", "data": {}}
 
@@ -475,18 +454,15 @@ def get_teacher_stats(
 @router.get("/teacher/classes/{class_id}/subjects", response_model=dict)
 def get_teacher_class_subjects(
     class_id: uuid.UUID,
-    current_user: User = Depends(deps.get_current_user),
+    principal: deps.CurrentPrincipal = Depends(deps.get_current_principal),
     db: Session = Depends(deps.get_db),
 ):
     """Get all subjects a teacher teaches in a specific class"""
+    current_user = principal.user
     if current_user.role not in ["teacher", "admin"]:
         return {"success": False, "message": "Unauthorized", "data": []}
 
-    employee = (
-        db.query(EnrolledEmployee)
-        .filter(EnrolledEmployee.user_id == current_user.id)
-        .first()
-    )
+    employee = principal.employee
     if not employee:
         return {"success": False, "message": "Employee not found", "data": []}
 
@@ -531,10 +507,11 @@ def get_teacher_class_subjects(
 @router.get("/teacher/class/{class_id}", response_model=dict)
 def get_class_details(
     class_id: uuid.UUID,
-    current_user: User = Depends(deps.get_current_user),
+    principal: deps.CurrentPrincipal = Depends(deps.get_current_principal),
     db: Session = Depends(deps.get_db),
 ):
     """Get class details for a teacher"""
+    current_user = principal.user
     if current_user.role not in ["teacher", "admin"]:
         return {"success": False, "message": "Unauthorized", "data": None}
 
@@ -544,11 +521,7 @@ def get_class_details(
         return {"success": False, "message": "Class not found", "data": None}
 
     # Get employee
-    employee = (
-        db.query(EnrolledEmployee)
-        .filter(EnrolledEmployee.user_id == current_user.id)
-        .first()
-    )
+    employee = principal.employee
     if not employee:
         return {"success": False, "message": "Employee not found", "data": None}
 
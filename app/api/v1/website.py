@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 import uuid
 from datetime import datetime
 import os
 import shutil
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models import (
     News,
     JobCategory,
@@ -38,35 +41,53 @@ from app.schemas.lms import ClassResponse
 router = APIRouter()
 
 
+def _save_upload(upload: UploadFile, subdir: str) -> str:
+    """Write an uploaded file under UPLOAD_DIR/<subdir> and return its public URL."""
+    filename = f"{uuid.uuid4()}_{upload.filename}"
+    path = os.path.join(settings.UPLOAD_DIR, subdir, filename)
+    with open(path, "wb") as buffer:
+        shutil.copyfileobj(upload.file, buffer)
+    return f"/uploads/{subdir}/{filename}"
+
+
+async def _first(db: AsyncSession, statement):
+    return (await db.scalars(statement.limit(1))).first()
+
+
 # Public Website Content
 @router.get("/classes", response_model=List[ClassResponse])
-def get_public_classes(db: Session = Depends(get_db)):
-    return db.query(Class).all()
+async def get_public_classes(db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(Class))).all()
 
 
 @router.get("/news", response_model=List[NewsResponse])
-def get_news(db: Session = Depends(get_db)):
-    return db.query(News).order_by(News.published_date.desc()).all()
+async def get_news(db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(News).order_by(News.published_date.desc()))).all()
 
 
 @router.get("/job-categories", response_model=List[JobCategoryResponse])
-def get_job_categories(db: Session = Depends(get_db)):
-    return db.query(JobCategory).all()
+async def get_job_categories(db: AsyncSession = Depends(get_async_db)):
+    # positions are part of the response and cannot be lazy-loaded on an AsyncSession
+    return (
+        await db.scalars(select(JobCategory).options(selectinload(JobCategory.positions)))
+    ).all()
 
 
 @router.get("/leadership", response_model=List[LeadershipMemberResponse])
-def get_leadership(db: Session = Depends(get_db)):
-    return db.query(LeadershipMember).order_by(LeadershipMember.display_order).all()
+async def get_leadership(db: AsyncSession = Depends(get_async_db)):
+    return (
+        await db.scalars(select(LeadershipMember).order_by(LeadershipMember.display_order))
+    ).all()
 
 
 @router.get("/subjects", response_model=List[SubjectResponse])
-def get_subjects(db: Session = Depends(get_db)):
-    return db.query(Subject).all()
+async def get_subjects(db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(select(Subject))).all()
 
 
 @router.get("/config", response_model=SchoolConfigResponse)
-def get_school_config(db: Session = Depends(get_db)):
-    config = db.query(SchoolConfig).first()
+async def get_school_config(db: AsyncSession = Depends(get_async_db)):
+    config = await _first(db, select(SchoolConfig))
     if not config:
         # Create a default config if none exists
         config = SchoolConfig(
@@ -84,8 +105,8 @@ def get_school_config(db: Session = Depends(get_db)):
             google_form_link=None,
         )
         db.add(config)
-        db.commit()
-        db.refresh(config)
+        await db.commit()
+        await db.refresh(config)
     return config
 
 
@@ -107,10 +128,10 @@ async def apply_student(
     group_id: Optional[str] = Form(None),
     previous_school: Optional[str] = Form(None),
     photo: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Check if registration is open
-    config = db.query(SchoolConfig).first()
+    config = await _first(db, select(SchoolConfig))
     if not config or not config.is_admission_open:
         raise HTTPException(
             status_code=400,
@@ -131,10 +152,8 @@ async def apply_student(
     # Check for duplicate applications using Student B-Form/CNIC
     if b_form_number:
         # Check current applications
-        existing_app = (
-            db.query(StudentApplication)
-            .filter(StudentApplication.b_form_number == b_form_number)
-            .first()
+        existing_app = await _first(
+            db, select(StudentApplication).where(StudentApplication.b_form_number == b_form_number)
         )
         if existing_app:
             status_display = existing_app.status.value.capitalize()
@@ -144,10 +163,8 @@ async def apply_student(
             )
 
         # Check enrolled students
-        enrolled = (
-            db.query(EnrolledStudent)
-            .filter(EnrolledStudent.b_form_number == b_form_number)
-            .first()
+        enrolled = await _first(
+            db, select(EnrolledStudent).where(EnrolledStudent.b_form_number == b_form_number)
         )
         if enrolled:
             raise HTTPException(
@@ -155,11 +172,8 @@ async def apply_student(
                 detail=f"A student with this B-Form/CNIC number already exists in our records as {enrolled.first_name} {enrolled.last_name} (Class: {enrolled.applying_for_class}).",
             )
 
-    # Save photo
-    photo_filename = f"{uuid.uuid4()}_{photo.filename}"
-    photo_path = os.path.join(settings.UPLOAD_DIR, "photos", photo_filename)
-    with open(photo_path, "wb") as buffer:
-        shutil.copyfileobj(photo.file, buffer)
+    # Save photo (blocking file I/O, kept off the event loop)
+    photo_url = await run_in_threadpool(_save_upload, photo, "photos")
 
     # Generate RegID (simplified for now: REG-timestamp)
     reg_id = f"REG-{int(datetime.utcnow().timestamp())}"
@@ -170,7 +184,7 @@ async def apply_student(
         last_name=last_name,
         gender=gender,
         date_of_birth=date_of_birth,
-        student_photo_url=f"/uploads/photos/{photo_filename}",
+        student_photo_url=photo_url,
         b_form_number=b_form_number,
         guardian_name=guardian_name,
         guardian_cnic=guardian_cnic,
@@ -184,8 +198,8 @@ async def apply_student(
         status=StudentApplicationStatus.applied,
     )
     db.add(new_app)
-    db.commit()
-    db.refresh(new_app)
+    await db.commit()
+    await db.refresh(new_app)
     return new_app
 
 
@@ -207,12 +221,12 @@ async def apply_employee(
     current_organization: Optional[str] = Form(None),
     cv: UploadFile = File(...),
     photo: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Check for duplicate applications using CNIC
     # 1. Check current applications (CNIC)
-    existing_application = (
-        db.query(EmployeeApplication).filter(EmployeeApplication.cnic == cnic).first()
+    existing_application = await _first(
+        db, select(EmployeeApplication).where(EmployeeApplication.cnic == cnic)
     )
     if existing_application:
         raise HTTPException(
@@ -221,8 +235,8 @@ async def apply_employee(
         )
 
     # 2. Check current applications (Email)
-    existing_app_email = (
-        db.query(EmployeeApplication).filter(EmployeeApplication.email == email).first()
+    existing_app_email = await _first(
+        db, select(EmployeeApplication).where(EmployeeApplication.email == email)
     )
     if existing_app_email:
         raise HTTPException(
@@ -231,8 +245,8 @@ async def apply_employee(
         )
 
     # 3. Check enrolled employees (CNIC)
-    enrolled_cnic = (
-        db.query(EnrolledEmployee).filter(EnrolledEmployee.cnic == cnic).first()
+    enrolled_cnic = await _first(
+        db, select(EnrolledEmployee).where(EnrolledEmployee.cnic == cnic)
     )
     if enrolled_cnic:
         raise HTTPException(
@@ -241,8 +255,8 @@ async def apply_employee(
         )
 
     # 4. Check enrolled employees (Email)
-    enrolled_email = (
-        db.query(EnrolledEmployee).filter(EnrolledEmployee.email == email).first()
+    enrolled_email = await _first(
+        db, select(EnrolledEmployee).where(EnrolledEmployee.email == email)
     )
     if enrolled_email:
         raise HTTPException(
@@ -250,17 +264,9 @@ async def apply_employee(
             detail=f"An employee with this email address is already enrolled.",
         )
 
-    # Save CV
-    cv_filename = f"{uuid.uuid4()}_{cv.filename}"
-    cv_path = os.path.join(settings.UPLOAD_DIR, "cvs", cv_filename)
-    with open(cv_path, "wb") as buffer:
-        shutil.copyfileobj(cv.file, buffer)
-
-    # Save Photo
-    photo_filename = f"{uuid.uuid4()}_{photo.filename}"
-    photo_path = os.path.join(settings.UPLOAD_DIR, "photos", photo_filename)
-    with open(photo_path, "wb") as buffer:
-        shutil.copyfileobj(photo.file, buffer)
+    # Save CV and photo (blocking file I/O, kept off the event loop)
+    cv_url = await run_in_threadpool(_save_upload, cv, "cvs")
+    photo_url = await run_in_threadpool(_save_upload, photo, "photos")
 
     new_app = EmployeeApplication(
         first_name=first_name,
@@ -277,11 +283,11 @@ async def apply_employee(
         highest_qualification=highest_qualification,
         experience_years=experience_years,
         current_organization=current_organization,
-        cv_url=f"/uploads/cvs/{cv_filename}",
-        photo_url=f"/uploads/photos/{photo_filename}",
+        cv_url=cv_url,
+        photo_url=photo_url,
         status=EmployeeApplicationStatus.applied,
     )
     db.add(new_app)
-    db.commit()
-    db.refresh(new_app)
+    await db.commit()
+    await db.refresh(new_app)
     return new_app
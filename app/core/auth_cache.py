@@ -0,0 +1,147 @@
+import importlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.auth import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated user as request handlers see it. Holds only what handlers read from
+    ``current_user``; load the ``User`` row when a handler needs anything else.
+    """
+
+    id: UUID
+    email: str
+    role: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        role = user.role.value if hasattr(user.role, "value") else str(user.role)
+        return cls(id=user.id, email=user.email, role=role, is_active=bool(user.is_active))
+
+
+class PrincipalCache:
+    """
+    Backend interface. Subclass it for a shared store (e.g. Redis) and point
+    ``AUTH_PRINCIPAL_CACHE_BACKEND`` at the class as ``"package.module:ClassName"``.
+    """
+
+    def get(self, user_id: UUID) -> Optional[Principal]:
+        raise NotImplementedError
+
+    def set(self, principal: Principal, ttl: float):
+        raise NotImplementedError
+
+    def delete(self, user_id: UUID):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class LocalPrincipalCache(PrincipalCache):
+    """In-process LRU with per-entry expiry, bounded to ``max_entries``."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[UUID, Tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if monotonic() >= expires_at:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def set(self, principal: Principal, ttl: float):
+        with self._lock:
+            self._entries[principal.id] = (monotonic() + ttl, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, user_id: UUID):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _load_backend() -> PrincipalCache:
+    path = settings.AUTH_PRINCIPAL_CACHE_BACKEND
+    if not path:
+        return LocalPrincipalCache(settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES)
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+principal_cache: PrincipalCache = _load_backend()
+
+
+def get_cached_principal(user_id: UUID) -> Optional[Principal]:
+    if not settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS:
+        return None
+    return principal_cache.get(user_id)
+
+
+def cache_principal(principal: Principal):
+    # Inactive users are not cached: the next request re-reads them and fails as before
+    if settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS and principal.is_active:
+        principal_cache.set(principal, settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def invalidate_principal(user_id: Optional[UUID]):
+    if user_id is not None:
+        principal_cache.delete(user_id)
+
+
+# --- Invalidation on commit ---
+
+_WATCHED_USER_FIELDS = ("role", "is_active", "email")
+
+
+def _changed_user_ids(session) -> set:
+    changed = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in _WATCHED_USER_FIELDS):
+                changed.add(obj.id)
+    return changed
+
+
+@event.listens_for(Session, "before_flush")
+def _mark_principal_changes(session, flush_context, instances):
+    changed = _changed_user_ids(session)
+    if changed:
+        session.info.setdefault("stale_principals", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_principals_after_commit(session):
+    for user_id in session.info.pop("stale_principals", ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_principal_changes(session):
+    session.info.pop("stale_principals", None)
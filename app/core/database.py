@@ -1,16 +1,221 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkouts and how long they wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "checkouts": 0,
+            "checkins": 0,
+            "connects": 0,
+            "timeouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    def connect(self):
+        self._record(checkouts=1)
+        return super().connect()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self._record(timeouts=1)
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.stats["wait_seconds_total"] += waited
+                self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+
+    def _do_return_conn(self, record):
+        self._record(checkins=1)
+        super()._do_return_conn(record)
+
+    def _create_connection(self):
+        self._record(connects=1)
+        return super()._create_connection()
+
+    def _record(self, **counts):
+        with self._stats_lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def recreate(self):
+        # Pool.recreate() copies constructor args only; keep the counters across recreation
+        pool = super().recreate()
+        pool.stats, pool._stats_lock = self.stats, self._stats_lock
+        return pool
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """InstrumentedQueuePool for the asyncio engine."""
+
+
+def _engine_options(url: str, poolclass=InstrumentedQueuePool) -> Dict[str, Any]:
+    """create_engine() keyword arguments for ``url`` built from the DB_* settings."""
+    url_obj = make_url(url)
+    backend = url_obj.get_backend_name()
+    if backend == "sqlite":
+        # SQLite picks its own pool class; the sizing options below do not apply
+        return {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    options: Dict[str, Any] = {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if backend == "postgresql":
+        if url_obj.get_driver_name() == "asyncpg":
+            # asyncpg takes run-time parameters as server_settings rather than libpq options
+            server_settings: Dict[str, str] = {}
+            if settings.DB_APPLICATION_NAME:
+                server_settings["application_name"] = settings.DB_APPLICATION_NAME
+            if settings.DB_STATEMENT_TIMEOUT_MS:
+                server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+            options["connect_args"] = {"server_settings": server_settings}
+        else:
+            connect_args: Dict[str, Any] = {}
+            if settings.DB_APPLICATION_NAME:
+                connect_args["application_name"] = settings.DB_APPLICATION_NAME
+            if settings.DB_STATEMENT_TIMEOUT_MS:
+                connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+            options["connect_args"] = connect_args
+    return options
+
+
+def async_database_url(url: str) -> str:
+    """``url`` with its driver swapped for the asyncio one (asyncpg / aiosqlite)."""
+    url_obj = make_url(url)
+    backend = url_obj.get_backend_name()
+    if backend == "postgresql":
+        return url_obj.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    if backend == "sqlite":
+        return url_obj.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional read replica. Without DATABASE_READ_URL every session uses the primary.
+read_engine = (
+    create_engine(settings.DATABASE_READ_URL, **_engine_options(settings.DATABASE_READ_URL))
+    if settings.DATABASE_READ_URL
+    else None
+)
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from the replica and writes to the primary. Once it has flushed
+    anything, later reads go to the primary too, so a handler sees its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if read_engine is None or self._flushing or self.info.get("wrote"):
+            return engine
+        return read_engine
+
+
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_to_primary(session, flush_context):
+    session.info["wrote"] = True
+
+
+# Async stack for high-concurrency read paths; everything else stays on SessionLocal.
+# expire_on_commit=False because expired attributes cannot be lazy-loaded under asyncio.
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool)
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
+
+def pool_metrics(bind: Optional[Engine] = None) -> Dict[str, Any]:
+    """
+    Snapshot of a connection pool (the sync engine's by default): configured size,
+    connections in use, and how long requests have waited for a connection. A growing
+    ``wait_seconds_total`` or any ``timeouts`` means workers outnumber what the pool (or
+    the database) can serve.
+    """
+    pool = (bind or engine).pool
+    metrics: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if not isinstance(pool, QueuePool):
+        return metrics
+
+    metrics.update(
+        size=pool.size(),
+        timeout=pool.timeout(),
+        checked_out=pool.checkedout(),
+        checked_in=pool.checkedin(),
+        overflow=pool.overflow(),
+    )
+    if isinstance(pool, InstrumentedQueuePool):
+        # Built by _engine_options, so the overflow limit is the configured one
+        metrics["max_overflow"] = settings.DB_MAX_OVERFLOW
+        with pool._stats_lock:
+            stats = dict(pool.stats)
+        stats["wait_seconds_avg"] = (
+            stats["wait_seconds_total"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        )
+        metrics.update(stats)
+    return metrics
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """
+    Session for read-mostly routes that tolerate replica lag (reports, listings). Falls
+    back to the primary when no replica is configured; see ``read_db`` for a per-route flag.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def read_db(allow_stale: bool = True):
+    """
+    Dependency factory for per-route routing: ``Depends(read_db())`` reads from the
+    replica, ``Depends(read_db(allow_stale=False))`` keeps the route on the primary.
+    """
+    return get_read_db if allow_stale else get_db
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,161 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+
+
+class HashingPoolBusy(RuntimeError):
+    """Raised when more password hashes are queued than PASSWORD_HASH_MAX_PENDING allows."""
+
+
+class HashingPool:
+    """
+    Bounded process pool for bcrypt work. bcrypt at cost 12 is ~250 ms of CPU per call;
+    running it here keeps request threads and the event loop free and caps how many
+    cores hashing can take. With ``workers == 0`` calls run inline (tests, scripts).
+
+    Interactive calls (``run`` / ``run_async``) are rejected with HashingPoolBusy once
+    ``max_pending`` of them are queued. Bulk calls (``map``) are never rejected and are
+    counted separately, so an import cannot make logins fail; they keep at most
+    ``bulk_workers`` hashes in flight, leaving the other workers free for logins.
+    """
+
+    def __init__(self, workers: Optional[int], max_pending: int, bulk_workers: Optional[int] = None):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending
+        if bulk_workers is None:
+            bulk_workers = self.workers - 1
+        self.bulk_workers = max(1, min(bulk_workers, self.workers))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.interactive_pending = 0
+        self.bulk_pending = 0
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "seconds_total": 0.0,
+            "seconds_max": 0.0,
+        }
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Created on first use so processes that never hash (e.g. timetable workers) stay light
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _reserve(self, count: int, bulk: bool):
+        with self._lock:
+            if bulk:
+                self.bulk_pending += count
+            elif self.interactive_pending + count > self.max_pending:
+                self.stats["rejected"] += count
+                raise HashingPoolBusy("Too many password operations queued; retry shortly")
+            else:
+                self.interactive_pending += count
+            self.stats["submitted"] += count
+
+    def _release(self, count: int, started: float, bulk: bool):
+        # A bulk batch counts as ``count`` calls of equal share of its wall time
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            if bulk:
+                self.bulk_pending -= count
+            else:
+                self.interactive_pending -= count
+            self.stats["completed"] += count
+            self.stats["seconds_total"] += elapsed
+            self.stats["seconds_max"] = max(self.stats["seconds_max"], elapsed / count)
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Queue one call. ``fn`` must be a module-level function (it is pickled)."""
+        self._reserve(1, bulk=False)
+        started = time.perf_counter()
+        if not self.workers:
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._release(1, started, bulk=False)
+            return future
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            self._release(1, started, bulk=False)
+            raise
+        future.add_done_callback(lambda _: self._release(1, started, bulk=False))
+        return future
+
+    def run(self, fn: Callable, *args) -> Any:
+        """Blocking call for sync code: the calling thread waits, the CPU work runs in the pool."""
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable, *args) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def map(self, fn: Callable, items: Iterable) -> List[Any]:
+        """
+        Apply ``fn`` to every item on up to ``bulk_workers`` workers; results keep the
+        input order. Items are submitted one at a time as earlier ones finish, so the
+        pool's queue never holds more bulk work than that and a login waits for at most
+        one hash to finish.
+        """
+        items = list(items)
+        if not items:
+            return []
+        self._reserve(len(items), bulk=True)
+        started = time.perf_counter()
+        in_flight: Dict[Future, int] = {}
+        try:
+            if not self.workers:
+                return [fn(item) for item in items]
+            pool = self._pool()
+            results: List[Any] = [None] * len(items)
+            for index, item in enumerate(items):
+                if len(in_flight) >= self.bulk_workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[in_flight.pop(future)] = future.result()
+                in_flight[pool.submit(fn, item)] = index
+            for future, index in in_flight.items():
+                results[index] = future.result()
+            in_flight.clear()
+            return results
+        finally:
+            for future in in_flight:
+                future.cancel()
+            self._release(len(items), started, bulk=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update(
+                workers=self.workers,
+                bulk_workers=self.bulk_workers,
+                pending=self.interactive_pending,
+                bulk_pending=self.bulk_pending,
+                max_pending=self.max_pending,
+            )
+        stats["seconds_avg"] = stats["seconds_total"] / stats["completed"] if stats["completed"] else 0.0
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+hashing_pool = HashingPool(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING, settings.PASSWORD_HASH_BULK_WORKERS
+)
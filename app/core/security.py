@@ -1,9 +1,12 @@
+import hashlib
+import uuid
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from typing import Any, List, Union, Optional
 from jose import jwt
 import bcrypt
 import re
 from app.core.config import settings
+from app.core.hashing_pool import hashing_pool
 
 ALGORITHM = settings.ALGORITHM
 SECRET_KEY = settings.SECRET_KEY
@@ -28,12 +31,18 @@ def create_refresh_token(
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    # jti keeps two tokens issued to the same user in the same second distinct
+    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh", "jti": uuid.uuid4().hex}
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def hash_refresh_token(token: str) -> str:
+    """Fixed-width lookup key for a refresh token. Tokens are random and high-entropy, so a plain SHA-256 suffices."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _check_password(plain_password: str, hashed_password: str) -> bool:
     try:
         return bcrypt.checkpw(
             plain_password.encode("utf-8"), hashed_password.encode("utf-8")
@@ -42,10 +51,33 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-def get_password_hash(password: str) -> str:
+def _hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(12)).decode("utf-8")
 
 
+# bcrypt is CPU-bound; all calls below run in the hashing process pool.
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return hashing_pool.run(_check_password, plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return hashing_pool.run(_hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_pool.run_async(_check_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await hashing_pool.run_async(_hash_password, password)
+
+
+def get_password_hashes(passwords: List[str]) -> List[str]:
+    """Hash many passwords in parallel on the pool's bulk workers (bulk imports)."""
+    return hashing_pool.map(_hash_password, passwords)
+
+
 def sanitize_input(text: str, max_length: int = 1000) -> str:
     """Sanitize user input to prevent XSS and injection attacks"""
     if not text:
@@ -73,6 +73,8 @@ app.include_router(
 
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
+from app.core.hashing_pool import HashingPoolBusy, hashing_pool
+from app.services.session_sweeper import session_sweeper
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc):
@@ -83,6 +85,27 @@ async def validation_exception_handler(request, exc):
     )
 
 
+@app.exception_handler(HashingPoolBusy)
+async def hashing_pool_busy_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.on_event("startup")
+def start_session_sweeper():
+    if settings.AUTH_SESSION_SWEEP_INTERVAL_SECONDS:
+        session_sweeper.start()
+
+
+@app.on_event("shutdown")
+def shutdown_background_workers():
+    hashing_pool.shutdown()
+    session_sweeper.stop()
+
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to School Admin Portal API"}
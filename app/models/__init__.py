@@ -2,6 +2,8 @@ from app.core.database import Base
 from app.models.auth import User
 from app.models.applications import StudentApplication, EmployeeApplication
 from app.models.users import EnrolledStudent, EnrolledEmployee
+from app.models.dashboard import MonthlyEnrollmentStat
+from app.models.imports import BulkImport
 from app.models.lms import (
     AcademicYear,
     AcademicGroup,
@@ -36,3 +38,6 @@ from app.models.timetable import (
     SubjectConstraint,
 )
 
+
+# Keeps monthly_enrollment_stats in step with every ORM write to the counted tables
+import app.services.dashboard_stats  # noqa: E402,F401
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Date, Integer, String
+from app.core.database import Base
+
+
+class MonthlyEnrollmentStat(Base):
+    """
+    Row counts per calendar month for the admin dashboard counters, kept in step with the
+    source tables by app.services.dashboard_stats (same transaction as the insert/delete).
+    ``kind`` is one of dashboard_stats.STAT_SOURCES.
+    """
+
+    __tablename__ = "monthly_enrollment_stats"
+
+    month = Column(Date, primary_key=True)  # first day of the month
+    kind = Column(String(32), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, DateTime, Integer, JSON, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+from app.core.database import Base
+
+
+class BulkImport(Base):
+    """
+    Checkpoint of a chunked bulk-enroll import. ``rows_done`` and the counters are
+    updated in the same transaction as each imported chunk, so a failed or cancelled
+    import resumes exactly after the last committed chunk.
+    """
+
+    __tablename__ = "bulk_imports"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    role = Column(String(20), nullable=False)  # student, teacher, staff
+    filename = Column(String(255), nullable=False)
+    file_format = Column(String(10), nullable=False)  # csv, xlsx
+    file_path = Column(String(500), nullable=False)  # staged upload, removed once completed
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed, cancelled
+    job_id = Column(String(36))  # latest background job working on the import
+    total_rows = Column(Integer)
+    rows_done = Column(Integer, nullable=False, default=0)
+    created_count = Column(Integer, nullable=False, default=0)
+    skipped_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    issues = Column(JSON)  # results of skipped/failed rows, capped at BULK_ENROLL_MAX_ISSUES
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
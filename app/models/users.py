@@ -8,6 +8,7 @@ from sqlalchemy import (
     Text,
     Integer,
     JSON,
+    Index,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -46,8 +47,8 @@ class EnrolledStudent(Base):
     guardian_phone = Column(String, nullable=False)
     guardian_email = Column(String, nullable=False)
 
-    class_id = Column(UUID(as_uuid=True), ForeignKey("classes.id"), nullable=False)
-    section_id = Column(UUID(as_uuid=True), ForeignKey("sections.id"), nullable=False)
+    class_id = Column(UUID(as_uuid=True), ForeignKey("classes.id"), nullable=False, index=True)
+    section_id = Column(UUID(as_uuid=True), ForeignKey("sections.id"), nullable=False, index=True)
     group_id = Column(
         UUID(as_uuid=True), ForeignKey("academic_groups.id"), nullable=True
     )  # For classes 9-12
@@ -56,7 +57,7 @@ class EnrolledStudent(Base):
     address = Column(Text)
 
     # Linked User Account
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True, index=True)
 
     lms_email = Column(String, unique=True, nullable=False)
     lms_login = Column(String, unique=True, nullable=False)
@@ -67,9 +68,15 @@ class EnrolledStudent(Base):
     group = relationship("app.models.lms.AcademicGroup")
     user = relationship("app.models.auth.User")
 
-    enrolled_at = Column(DateTime(timezone=True), server_default=func.now())
+    # NOT NULL: (enrolled_at, id) is the keyset of the paged student listing
+    enrolled_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     is_active = Column(Boolean, default=True)
 
+    __table_args__ = (
+        # Keyset order of GET /admin/enrolled-students/page
+        Index("ix_enrolled_students_enrolled_at_id", "enrolled_at", "id"),
+    )
+
 
 class EnrolledEmployee(Base):
     __tablename__ = "enrolled_employees"
@@ -102,7 +109,7 @@ class EnrolledEmployee(Base):
     cv_url = Column(String)
 
     # Linked User Account
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True, index=True)
 
     lms_email = Column(String, unique=True, nullable=True)
     lms_login = Column(String, unique=True, nullable=True)
@@ -35,3 +35,5 @@ from app.schemas.dashboard import (
     DashboardStatsResponse,
     ActivityItem,
 )
+from app.schemas.jobs import BackgroundJobResponse
+from app.schemas.imports import BulkImportResponse
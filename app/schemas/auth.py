@@ -8,6 +8,7 @@ class Token(BaseModel):
     data: dict
     # Legacy fields for OAuth2 compatibility if needed by other clients
     access_token: Optional[str] = None
+    refresh_token: Optional[str] = None
     token_type: Optional[str] = None
 
 
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class BulkImportResponse(BaseModel):
+    id: UUID
+    role: str
+    filename: str
+    file_format: str
+    status: str  # queued, running, completed, failed, cancelled
+    job_id: Optional[str] = None
+    total_rows: Optional[int] = None
+    rows_done: int
+    created_count: int
+    skipped_count: int
+    failed_count: int
+    issues: Optional[List[Dict[str, Any]]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from datetime import datetime
+
+
+class BackgroundJobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, completed, failed, cancelled
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    progress: Dict[str, Any] = {}
+    eta_seconds: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
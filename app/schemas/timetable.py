@@ -1,5 +1,5 @@
 from __future__ import annotations
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from uuid import UUID
 from typing import List, Optional, Dict
 from datetime import time, datetime
@@ -132,7 +132,85 @@ class TimetableGenerationRequest(BaseModel):
     version_name: str
     class_ids: Optional[List[UUID]] = None  # If None, generate for all
     preserve_locked: bool = True
+    search_mode: str = "mrv"  # "mrv" (forward checking + backjumping) or "backtrack"
+    parallel: bool = False  # Solve sections that share no teacher in parallel processes
+    optimize: bool = False  # Local-search pass for soft objectives before saving
+    optimize_seconds: Optional[float] = Field(None, ge=0)  # None falls back to TIMETABLE_OPTIMIZE_SECONDS
+    # Search budgets; None falls back to the TIMETABLE_MAX_* settings, 0 = no limit
+    max_nodes_per_section: Optional[int] = Field(None, ge=0)
+    max_seconds_per_section: Optional[float] = Field(None, ge=0)
+    max_nodes: Optional[int] = Field(None, ge=0)
+    max_seconds: Optional[float] = Field(None, ge=0)
+
+
+class UnplacedPeriod(BaseModel):
+    class_id: UUID
+    class_name: str
+    section_id: Optional[UUID] = None
+    section_name: Optional[str] = None
+    subject_id: UUID
+    subject_name: Optional[str] = None
+    teacher_id: Optional[UUID] = None
+    type: str  # single / double
+    reason: str  # e.g. node_budget_exhausted, time_budget_exhausted, infeasible, teacher_capacity, locked_slot (repair: left in place unchanged)
+
+
+class OptimizationReport(BaseModel):
+    # Weighted penalties (lower is better): morning, spread, teacher_gaps
+    initial_score: int
+    final_score: int
+    initial_breakdown: Dict[str, int]
+    final_breakdown: Dict[str, int]
+    iterations: int
+    accepted_moves: int
+    seconds: float
+
+
+class TimetableGenerationResult(TimetableVersion):
+    is_partial: bool = False
+    nodes_explored: int = 0
+    unplaced_periods: List[UnplacedPeriod] = []
+    optimization: Optional[OptimizationReport] = None
+
+
+class TimetableRepairRequest(BaseModel):
+    # A teacher leaving and/or a room going out of service
+    teacher_id: Optional[UUID] = None
+    replacement_teacher_id: Optional[UUID] = None  # None = auto-pick per subject
+    room_id: Optional[UUID] = None
+    max_seconds: Optional[float] = Field(None, ge=0)  # None falls back to TIMETABLE_MAX_SECONDS, 0 = no limit
+
+
+class TimetableRepairResult(BaseModel):
+    version_id: UUID
+    affected_periods: int
+    moved_periods: int
+    nodes_explored: int
+    seconds: float
+    is_partial: bool = False
+    unplaced_periods: List[UnplacedPeriod] = []
+
+
+class TimetableWhatIfCandidate(TimetableConfigUpdate):
+    # Unset fields keep the academic year's configuration
+    name: str
+    search_mode: str = "mrv"
+
+
+class TimetableWhatIfRequest(BaseModel):
+    academic_year_id: UUID
+    class_ids: Optional[List[UUID]] = None
+    candidates: List[TimetableWhatIfCandidate]
+    max_seconds: Optional[float] = None  # per candidate
+    optimize: bool = False
+    optimize_seconds: Optional[float] = None
+
+
+class TimetableWhatIfPersist(BaseModel):
+    candidate: str
+    version_name: str
 
 
 TimetableSlot.model_rebuild()
 TimetableVersion.model_rebuild()
+TimetableGenerationResult.model_rebuild()
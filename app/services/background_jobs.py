@@ -0,0 +1,133 @@
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class JobStatus:
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+    cancelled = "cancelled"
+
+    FINISHED = (completed, failed, cancelled)
+
+
+class Job:
+    """
+    State of one background job. The target updates ``progress`` (a free-form dict; a
+    ``completed``/``total`` pair enables the ETA) and polls ``cancel_requested``.
+    """
+
+    def __init__(self, kind: str):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.status = JobStatus.queued
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.progress: Dict[str, Any] = {}
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # Data kept for follow-up requests on the job; never serialized
+        self.artifacts: Dict[str, Any] = {}
+        self._cancel = threading.Event()
+
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def eta_seconds(self) -> Optional[float]:
+        completed = self.progress.get("completed") or 0
+        total = self.progress.get("total") or 0
+        if self.status != JobStatus.running or not self.started_at or not completed or not total:
+            return None
+        elapsed = (datetime.utcnow() - self.started_at).total_seconds()
+        return round(elapsed / completed * (total - completed), 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress,
+            "eta_seconds": self.eta_seconds(),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobRunner:
+    """
+    In-process job queue on a bounded thread pool. Jobs live in memory only: they are
+    lost on restart and are visible only to the worker process that accepted them.
+    Finished jobs are kept for ``retention_minutes`` so their status can still be polled.
+    """
+
+    def __init__(self, max_workers: int, retention_minutes: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._retention = timedelta(minutes=retention_minutes)
+
+    def submit(self, kind: str, target: Callable[..., Optional[Dict[str, Any]]], *args, **kwargs) -> Job:
+        """Queue ``target(job, *args, **kwargs)``; its return value becomes ``job.result``."""
+        return self.enqueue(Job(kind), target, *args, **kwargs)
+
+    def enqueue(self, job: Job, target: Callable[..., Optional[Dict[str, Any]]], *args, **kwargs) -> Job:
+        """Like ``submit``, for a job the caller created (e.g. to record its id before it can start)."""
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, target, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job and job.status not in JobStatus.FINISHED:
+            job._cancel.set()
+            if job.status == JobStatus.queued:
+                job.status = JobStatus.cancelled
+                job.finished_at = datetime.utcnow()
+        return job
+
+    def _run(self, job: Job, target, args, kwargs):
+        if job.cancel_requested():
+            return
+        job.status = JobStatus.running
+        job.started_at = datetime.utcnow()
+        try:
+            job.result = target(job, *args, **kwargs)
+            job.status = JobStatus.cancelled if job.cancel_requested() else JobStatus.completed
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = JobStatus.cancelled if job.cancel_requested() else JobStatus.failed
+        finally:
+            job.finished_at = datetime.utcnow()
+
+    def _prune(self):
+        cutoff = datetime.utcnow() - self._retention
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in JobStatus.FINISHED and job.finished_at and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_runner = JobRunner(
+    max_workers=settings.BACKGROUND_JOB_WORKERS,
+    retention_minutes=settings.BACKGROUND_JOB_RETENTION_MINUTES,
+)
@@ -0,0 +1,657 @@
+import os
+import shutil
+import uuid
+from contextlib import closing
+from datetime import date, datetime, time
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Set
+
+import pandas as pd
+from openpyxl import load_workbook
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.auth import User
+from app.models.imports import BulkImport
+from app.models.lms import AcademicYear, Class, ClassSubject, Section, StudentSubject
+from app.models.users import EnrolledEmployee, EnrolledStudent, UserRole
+from app.services import dashboard_stats
+from app.services.background_jobs import Job, JobStatus, job_runner
+
+
+class BulkEnrollmentError(ValueError):
+    """The upload as a whole cannot be imported (e.g. a required column is missing)."""
+
+
+STUDENT_REQUIRED_COLUMNS = ("first_name", "last_name", "date_of_birth", "guardian_name")
+EMPLOYEE_REQUIRED_COLUMNS = ("first_name", "last_name", "date_of_birth", "phone", "email", "cnic")
+
+
+def clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Lower-cased column names, trimmed strings, NaN for blank cells."""
+    df = df.rename(columns=lambda c: str(c).strip().lower())
+    df = df.map(lambda v: v.strip() if isinstance(v, str) else v)
+    return df.replace("", float("nan"))
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Rows as dicts with None for missing values."""
+    return [
+        {k: (None if pd.isna(v) else v) for k, v in record.items()}
+        for record in df.to_dict("records")
+    ]
+
+
+def _require_columns(df: pd.DataFrame, required: Sequence[str]):
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise BulkEnrollmentError(f"Missing required columns: {', '.join(missing)}")
+
+
+def _missing_values(df: pd.DataFrame, required: Sequence[str]) -> List[List[str]]:
+    """Per row, the required columns left blank (vectorized over the frame)."""
+    blank = df[list(required)].isna()
+    return [[c for c in required if row[c]] for row in blank.to_dict("records")]
+
+
+def _text(value: Any, default: Optional[str] = None) -> Optional[str]:
+    return default if value is None else str(value)
+
+
+def _result(row: int, status: str, message: Optional[str] = None, **details) -> Dict[str, Any]:
+    return {"row": row, "status": status, "message": message, **details}
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    summary = {"created": 0, "skipped": 0, "failed": 0}
+    for result in results:
+        summary[result["status"]] += 1
+    return summary
+
+
+class _IdSequence:
+    """``{prefix}{n:03d}`` ids counting up from ``start``, skipping ids already in use."""
+
+    def __init__(self, prefix: str, start: int, taken: Set[str]):
+        self.prefix = prefix
+        self.counter = start
+        self.taken = taken
+
+    def next(self) -> str:
+        while True:
+            self.counter += 1
+            value = f"{self.prefix}{self.counter:03d}"
+            if value not in self.taken:
+                self.taken.add(value)
+                return value
+
+
+def _unique_code(prefix: str, taken: Set[str], width: int = 3) -> str:
+    """``prefix`` plus a random hex suffix not in ``taken``; widened when short codes run out."""
+    while True:
+        for _ in range(20):
+            code = f"{prefix}{uuid.uuid4().hex[:width].upper()}"
+            if code not in taken:
+                taken.add(code)
+                return code
+        width += 1
+
+
+class StudentImporter:
+    """
+    Set-based student import. Classes, section fill levels, subjects and ids in use are
+    loaded once; each ``import_frame`` call then validates its rows, allocates sections
+    in memory and writes users, students and subjects with one batched INSERT per table.
+    State carries over between calls, so a large file can be fed in chunks.
+    """
+
+    def __init__(self, db: Session, year: Optional[int] = None):
+        self.db = db
+        self.year = year or datetime.utcnow().year
+
+        classes = db.query(Class.id, Class.name, Class.code).all()
+        self.class_by_name = {c.name: c.id for c in classes}
+        self.class_by_code = {c.code: c.id for c in classes if c.code}
+
+        # class_id -> [[section_id, section_name, free_seats], ...] in fill order
+        filled = dict(
+            db.query(EnrolledStudent.section_id, func.count())
+            .group_by(EnrolledStudent.section_id)
+            .all()
+        )
+        self.sections: Dict[uuid.UUID, List[list]] = {}
+        for section in db.query(Section).order_by(Section.class_id, Section.name):
+            free = (section.capacity or 30) - filled.get(section.id, 0)
+            self.sections.setdefault(section.class_id, []).append([section.id, section.name, free])
+
+        self.class_subjects: Dict[uuid.UUID, List[tuple]] = {}
+        for cs_id, class_id, subject_id in db.query(
+            ClassSubject.id, ClassSubject.class_id, ClassSubject.subject_id
+        ):
+            self.class_subjects.setdefault(class_id, []).append((cs_id, subject_id))
+        self.academic_year_id = (
+            db.query(AcademicYear.id).filter(AcademicYear.is_current == True).limit(1).scalar()
+        )
+
+        id_prefix = f"STU-{self.year}-"
+        enrolled_this_year = (
+            db.query(EnrolledStudent)
+            .filter(func.extract("year", EnrolledStudent.enrolled_at) == self.year)
+            .count()
+        )
+        taken_ids = set(
+            db.scalars(
+                select(EnrolledStudent.system_student_id).where(
+                    EnrolledStudent.system_student_id.like(f"{id_prefix}%")
+                )
+            )
+        )
+        self.system_ids = _IdSequence(id_prefix, enrolled_this_year, taken_ids)
+        self.admission_prefix = f"{settings.SCHOOL_NAME_ABBR}-{self.year}-"
+        self.admission_numbers = set(
+            db.scalars(
+                select(EnrolledStudent.admission_number).where(
+                    EnrolledStudent.admission_number.like(f"{self.admission_prefix}%")
+                )
+            )
+        )
+        # Emails claimed by earlier rows of this import
+        self.emails_in_use: Set[str] = set()
+
+    def _registered_emails(self, candidates: Set[str]) -> Set[str]:
+        if not candidates:
+            return set()
+        users = select(User.email).where(User.email.in_(candidates))
+        students = select(EnrolledStudent.lms_email).where(EnrolledStudent.lms_email.in_(candidates))
+        return set(self.db.scalars(users.union(students)))
+
+    @staticmethod
+    def check_columns(df: pd.DataFrame):
+        _require_columns(df, STUDENT_REQUIRED_COLUMNS)
+        if "class" not in df.columns and "applying_for_class" not in df.columns:
+            raise BulkEnrollmentError("Missing required columns: class")
+
+    def _class_id(self, name: Optional[str]) -> Optional[uuid.UUID]:
+        if pd.isna(name):
+            return None
+        return self.class_by_name.get(name) or self.class_by_code.get(name)
+
+    def import_frame(self, df: pd.DataFrame, first_row: int = 1) -> List[Dict[str, Any]]:
+        """Import one frame in the session's transaction (the caller commits); one result per row."""
+        df = clean_frame(df)
+        self.check_columns(df)
+
+        class_names = df["class"] if "class" in df.columns else pd.Series(None, index=df.index)
+        if "applying_for_class" in df.columns:
+            class_names = class_names.combine_first(df["applying_for_class"])
+        class_ids = class_names.map(self._class_id)
+        class_names = [None if pd.isna(n) else str(n) for n in class_names]
+        missing = _missing_values(df, STUDENT_REQUIRED_COLUMNS)
+        candidates = {
+            v for c in ("email", "guardian_email") if c in df.columns for v in df[c].dropna()
+        }
+        registered = self._registered_emails(candidates) | self.emails_in_use
+
+        results: List[Dict[str, Any]] = []
+        accepted = []
+        records = _records(df)
+        for offset, (record, class_name, class_id, blanks) in enumerate(
+            zip(records, class_names, class_ids, missing)
+        ):
+            row = first_row + offset
+            if blanks:
+                results.append(_result(row, "failed", f"Missing required values: {', '.join(blanks)}"))
+                continue
+            if not class_id:
+                results.append(_result(row, "skipped", f"Class not found: {class_name}"))
+                continue
+            explicit_email = record.get("email")
+            if explicit_email and explicit_email in registered:
+                results.append(_result(row, "failed", f"Email already registered: {explicit_email}"))
+                continue
+            section = next((s for s in self.sections.get(class_id, []) if s[2] > 0), None)
+            if not section:
+                results.append(_result(row, "skipped", f"No section available in class {class_name}"))
+                continue
+
+            system_id = self.system_ids.next()
+            email = explicit_email
+            if not email:
+                # Siblings share a guardian email; later ones get a generated address
+                guardian_email = record.get("guardian_email")
+                if guardian_email and guardian_email not in registered:
+                    email = guardian_email
+                else:
+                    email = f"{system_id}@school.com"
+            registered.add(email)
+            self.emails_in_use.add(email)
+            section[2] -= 1
+            accepted.append((row, record, class_name, class_id, section, system_id, email))
+            results.append(
+                _result(row, "created", system_id=system_id, email=email, section=section[1])
+            )
+
+        if accepted:
+            self._insert(accepted)
+        return results
+
+    def _insert(self, accepted: list):
+        passwords = [f"{settings.SCHOOL_NAME_ABBR}@{a[5]}" for a in accepted]
+        password_hashes = security.get_password_hashes(passwords)
+
+        users, students, subjects = [], [], []
+        for (row, record, class_name, class_id, section, system_id, email), password, password_hash in zip(
+            accepted, passwords, password_hashes
+        ):
+            user_id, student_id = uuid.uuid4(), uuid.uuid4()
+            users.append(
+                {
+                    "id": user_id,
+                    "email": email,
+                    "password_hash": password_hash,
+                    "role": UserRole.student,
+                    "is_active": True,
+                }
+            )
+            students.append(
+                {
+                    "id": student_id,
+                    "system_student_id": system_id,
+                    "admission_number": _unique_code(self.admission_prefix, self.admission_numbers),
+                    "first_name": record["first_name"],
+                    "last_name": record["last_name"],
+                    "gender": record.get("gender") or "Other",
+                    "date_of_birth": str(record["date_of_birth"]),
+                    "b_form_number": _text(record.get("b_form_number"), "N/A"),
+                    "guardian_name": record["guardian_name"],
+                    "guardian_cnic": _text(record.get("guardian_cnic"), "N/A"),
+                    "guardian_phone": _text(record.get("guardian_phone"), "N/A"),
+                    "guardian_email": _text(record.get("guardian_email"), "N/A"),
+                    "class_id": class_id,
+                    "section_id": section[0],
+                    "applying_for_class": class_name,
+                    "lms_email": email,
+                    "lms_login": system_id,
+                    "lms_password": password,
+                    "user_id": user_id,
+                    "is_active": True,
+                    "student_photo_url": record.get("photo_url"),
+                }
+            )
+            for class_subject_id, subject_id in self.class_subjects.get(class_id, []):
+                subjects.append(
+                    {
+                        "student_id": student_id,
+                        "class_id": class_id,
+                        "subject_id": subject_id,
+                        "class_subject_id": class_subject_id,
+                        "academic_year_id": self.academic_year_id,
+                    }
+                )
+
+        self.db.execute(insert(User), users)
+        self.db.execute(insert(EnrolledStudent), students)
+        if subjects:
+            self.db.execute(insert(StudentSubject), subjects)
+        dashboard_stats.record_bulk_insert(self.db, "students_enrolled", len(students))
+
+
+class EmployeeImporter:
+    """
+    Set-based teacher/staff import, chunk-friendly like StudentImporter. Only teachers
+    get a User account. Rows go through the ORM (one flush per frame) so the
+    teacher-subject index and dashboard hooks see the new employees.
+    """
+
+    def __init__(self, db: Session, role: str, year: Optional[int] = None):
+        self.db = db
+        self.role = role
+        self.year = year or datetime.utcnow().year
+        id_prefix = f"EMP-{self.year}-"
+        joined_this_year = (
+            db.query(EnrolledEmployee)
+            .filter(func.extract("year", EnrolledEmployee.joined_at) == self.year)
+            .count()
+        )
+        taken_ids = set(
+            db.scalars(
+                select(EnrolledEmployee.employee_id).where(
+                    EnrolledEmployee.employee_id.like(f"{id_prefix}%")
+                )
+            )
+        )
+        self.employee_ids = _IdSequence(id_prefix, joined_this_year, taken_ids)
+        self.emails_in_use: Set[str] = set()
+
+    @staticmethod
+    def check_columns(df: pd.DataFrame):
+        _require_columns(df, EMPLOYEE_REQUIRED_COLUMNS)
+
+    def _registered_emails(self, candidates: Set[str]) -> Set[str]:
+        if not candidates:
+            return set()
+        users = select(User.email).where(User.email.in_(candidates))
+        employees = select(EnrolledEmployee.lms_email).where(EnrolledEmployee.lms_email.in_(candidates))
+        return set(self.db.scalars(users.union(employees)))
+
+    def import_frame(self, df: pd.DataFrame, first_row: int = 1) -> List[Dict[str, Any]]:
+        """Import one frame in the session's transaction (the caller commits); one result per row."""
+        df = clean_frame(df)
+        self.check_columns(df)
+        missing = _missing_values(df, EMPLOYEE_REQUIRED_COLUMNS)
+        registered = self._registered_emails(set(df["email"].dropna())) | self.emails_in_use
+
+        results: List[Dict[str, Any]] = []
+        accepted = []
+        for offset, (record, blanks) in enumerate(zip(_records(df), missing)):
+            row = first_row + offset
+            if blanks:
+                results.append(_result(row, "failed", f"Missing required values: {', '.join(blanks)}"))
+                continue
+            email = record["email"]
+            if email in registered:
+                results.append(_result(row, "failed", f"Email already registered: {email}"))
+                continue
+            registered.add(email)
+            self.emails_in_use.add(email)
+            employee_id = self.employee_ids.next()
+            accepted.append((record, employee_id))
+            results.append(_result(row, "created", employee_id=employee_id, email=email))
+
+        if accepted:
+            self._insert(accepted)
+        return results
+
+    def _insert(self, accepted: list):
+        passwords = [f"{settings.SCHOOL_NAME_ABBR}@{employee_id}" for _, employee_id in accepted]
+        teachers = [
+            i for i, (record, _) in enumerate(accepted)
+            if str(record.get("system_role") or self.role).lower() == "teacher"
+        ]
+        teacher_hashes = dict(
+            zip(teachers, security.get_password_hashes([passwords[i] for i in teachers]))
+        )
+
+        for i, ((record, employee_id), password) in enumerate(zip(accepted, passwords)):
+            user = None
+            if i in teacher_hashes:
+                user = User(
+                    id=uuid.uuid4(),
+                    email=record["email"],
+                    password_hash=teacher_hashes[i],
+                    role=UserRole.teacher,
+                    is_active=True,
+                )
+                self.db.add(user)
+            self.db.add(
+                EnrolledEmployee(
+                    employee_id=employee_id,
+                    first_name=record["first_name"],
+                    last_name=record["last_name"],
+                    gender=record.get("gender") or "Other",
+                    date_of_birth=str(record["date_of_birth"]),
+                    phone=str(record["phone"]),
+                    email=record["email"],
+                    cnic=str(record["cnic"]),
+                    employee_type=record.get("employee_type") or "teaching",
+                    functional_role=record.get("functional_role") or "Teacher",
+                    system_role=record.get("system_role") or self.role,
+                    subject=record.get("subject"),
+                    highest_qualification=record.get("highest_qualification") or "N/A",
+                    experience_years=_text(record.get("experience_years"), "0"),
+                    lms_email=record["email"],
+                    lms_login=employee_id,
+                    lms_password=password,
+                    user_id=user.id if user else None,
+                    is_active=True,
+                    photo_url=record.get("photo_url"),
+                )
+            )
+        self.db.flush()
+
+
+def create_importer(db: Session, role: str):
+    if role == "student":
+        return StudentImporter(db)
+    if role in ("teacher", "staff"):
+        return EmployeeImporter(db, role)
+    raise BulkEnrollmentError("Role must be student, teacher or staff")
+
+
+# --- Reading uploads ---
+
+IMPORT_FORMATS = ("csv", "xlsx")
+
+
+def import_format(filename: Optional[str]) -> str:
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if extension not in IMPORT_FORMATS:
+        raise BulkEnrollmentError("Only CSV or XLSX files allowed")
+    return extension
+
+
+def _xlsx_text(value: Any) -> Optional[str]:
+    """A cell as text, the way it reads in a CSV export of the sheet."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == time() else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _xlsx_rows(source) -> Iterator[List[Optional[str]]]:
+    # Read-only mode parses the sheet XML as it is iterated instead of loading it whole
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            # Formatted but empty rows are reported too; skip them like CSV blank lines
+            if any(v is not None and v != "" for v in row):
+                yield [_xlsx_text(v) for v in row]
+    finally:
+        workbook.close()
+
+
+def read_chunks(source, file_format: str, chunk_rows: int, skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    The data rows of a CSV/XLSX upload as DataFrames of at most ``chunk_rows`` rows, every
+    value as text, without loading the whole file. The first ``skip_rows`` data rows are
+    skipped (resuming after a checkpoint).
+    """
+    if file_format == "csv":
+        try:
+            reader = pd.read_csv(source, dtype=str, chunksize=chunk_rows)
+        except pd.errors.EmptyDataError:
+            return
+        with reader:
+            for chunk in reader:
+                # Skip parsed rows, not file lines: the checkpoint counts rows as imported,
+                # and blank or quoted multi-line rows would throw a line offset off
+                if skip_rows >= len(chunk):
+                    skip_rows -= len(chunk)
+                    continue
+                if skip_rows:
+                    chunk, skip_rows = chunk.iloc[skip_rows:], 0
+                yield chunk
+        return
+
+    with closing(_xlsx_rows(source)) as rows:
+        header = next(rows, None)
+        if header is None:
+            return
+        width = len(header)
+        rows = islice(rows, skip_rows, None)
+        while batch := [row[:width] + [None] * (width - len(row)) for row in islice(rows, chunk_rows)]:
+            yield pd.DataFrame(batch, columns=[h or "" for h in header])
+
+
+def count_rows(path: str, file_format: str) -> int:
+    """Data rows in a staged upload (one streaming pass)."""
+    return sum(len(chunk) for chunk in read_chunks(path, file_format, 10000))
+
+
+# --- Chunked background imports ---
+
+
+def create_import(db: Session, upload: BinaryIO, filename: str, role: str) -> BulkImport:
+    """
+    Stage an upload for a background import: the file is copied to
+    BULK_ENROLL_STAGING_DIR in blocks (never held in memory) and its header checked.
+    """
+    if role not in ("student", "teacher", "staff"):
+        raise BulkEnrollmentError("Role must be student, teacher or staff")
+    file_format = import_format(filename)
+    importer_class = StudentImporter if role == "student" else EmployeeImporter
+
+    record = BulkImport(id=uuid.uuid4(), role=role, filename=filename, file_format=file_format)
+    os.makedirs(settings.BULK_ENROLL_STAGING_DIR, exist_ok=True)
+    record.file_path = os.path.join(settings.BULK_ENROLL_STAGING_DIR, f"{record.id}.{file_format}")
+    with open(record.file_path, "wb") as staged:
+        shutil.copyfileobj(upload, staged, 1024 * 1024)
+    try:
+        first = next(read_chunks(record.file_path, file_format, 1), None)
+        if first is None:
+            raise BulkEnrollmentError("The file has no data rows")
+        importer_class.check_columns(clean_frame(first))
+    except Exception:
+        _remove_staged(record.file_path)
+        raise
+
+    record.status = JobStatus.queued
+    db.add(record)
+    db.commit()
+    return record
+
+
+def start_import(db: Session, record: BulkImport) -> Optional[Job]:
+    """
+    Queue a job that imports ``record`` from its checkpoint on. The import is claimed for
+    the new job only if its status and job id are still the ones ``record`` was read
+    with; returns None when another request (or worker) got there first.
+    """
+    job = Job("bulk_enrollment")
+    claimed = db.execute(
+        update(BulkImport)
+        .where(
+            BulkImport.id == record.id,
+            BulkImport.status == record.status,
+            BulkImport.job_id.is_not_distinct_from(record.job_id),
+        )
+        .values(status=JobStatus.queued, job_id=job.id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    if not claimed:
+        return None
+    return job_runner.enqueue(job, run_import, record.id)
+
+
+def cancel_import(db: Session, job_id: str) -> Optional[Job]:
+    """
+    Cancel an import's job. A job cancelled before a worker picked it up never runs,
+    so its import is marked cancelled here; a running one stops after its chunk.
+    """
+    job = job_runner.cancel(job_id)
+    if job and job.cancel_requested():
+        db.execute(
+            update(BulkImport)
+            .where(BulkImport.job_id == job_id, BulkImport.status == JobStatus.queued)
+            .values(status=JobStatus.cancelled)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    return job
+
+
+def _remove_staged(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _progress(record: BulkImport) -> Dict[str, Any]:
+    return {
+        "import_id": str(record.id),
+        "completed": record.rows_done,
+        "total": record.total_rows,
+        "created": record.created_count,
+        "skipped": record.skipped_count,
+        "failed": record.failed_count,
+    }
+
+
+def run_import(job: Job, import_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+    """
+    Background job body. Imports the staged file chunk by chunk from the checkpoint on;
+    each chunk commits together with the checkpoint advance, so after a failure,
+    cancellation or restart the import resumes after the last committed chunk.
+    """
+    db = SessionLocal()
+    try:
+        # Only the job the import was queued for may run it, and only once
+        claimed = db.execute(
+            update(BulkImport)
+            .where(
+                BulkImport.id == import_id,
+                BulkImport.job_id == job.id,
+                BulkImport.status == JobStatus.queued,
+            )
+            .values(status=JobStatus.running, error=None)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            print(f"[IMPORT] {import_id}: not queued for job {job.id}, skipping")
+            return None
+        record = db.get(BulkImport, import_id)
+        try:
+            if record.total_rows is None:
+                record.total_rows = count_rows(record.file_path, record.file_format)
+                db.commit()
+            job.progress = _progress(record)
+            importer = create_importer(db, record.role)
+            chunks = read_chunks(
+                record.file_path,
+                record.file_format,
+                settings.BULK_ENROLL_CHUNK_ROWS,
+                skip_rows=record.rows_done,
+            )
+            with closing(chunks):
+                for chunk in chunks:
+                    if job.cancel_requested():
+                        break
+                    results = importer.import_frame(chunk, first_row=record.rows_done + 1)
+                    summary = summarize(results)
+                    record.rows_done += len(chunk)
+                    record.created_count += summary["created"]
+                    record.skipped_count += summary["skipped"]
+                    record.failed_count += summary["failed"]
+                    issues = [r for r in results if r["status"] != "created"]
+                    kept = record.issues or []
+                    room = settings.BULK_ENROLL_MAX_ISSUES - len(kept)
+                    if issues and room > 0:
+                        record.issues = kept + issues[:room]
+                    db.commit()
+                    # Replace rather than mutate: the status endpoint may be serializing the old dict
+                    job.progress = _progress(record)
+        except Exception as e:
+            db.rollback()
+            record.status = JobStatus.failed
+            record.error = str(e)
+            db.commit()
+            raise
+
+        record.status = JobStatus.cancelled if job.cancel_requested() else JobStatus.completed
+        db.commit()
+        print(f"[IMPORT] {record.id}: {record.status} after {record.rows_done} rows")
+        if record.status == JobStatus.completed:
+            _remove_staged(record.file_path)
+        return _progress(record)
+    finally:
+        db.close()
@@ -0,0 +1,166 @@
+import threading
+from datetime import date, datetime
+from time import monotonic
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, inspect, literal, literal_column, select, text, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.base import NO_VALUE
+
+from app.core.config import settings
+from app.models.applications import EmployeeApplication, StudentApplication
+from app.models.dashboard import MonthlyEnrollmentStat
+from app.models.users import EnrolledEmployee, EnrolledStudent
+
+
+# kind -> (model, timestamp attribute that decides the month)
+STAT_SOURCES = {
+    "student_applications": (StudentApplication, "applied_at"),
+    "students_enrolled": (EnrolledStudent, "enrolled_at"),
+    "employee_applications": (EmployeeApplication, "applied_at"),
+    "employees": (EnrolledEmployee, "joined_at"),
+}
+_SOURCE_BY_MODEL = {model: (kind, attr) for kind, (model, attr) in STAT_SOURCES.items()}
+
+
+def month_start(value: Optional[datetime]) -> date:
+    value = value or datetime.utcnow()
+    return date(value.year, value.month, 1)
+
+
+def _month_bucket(column, dialect_name: str):
+    if dialect_name == "postgresql":
+        return func.date_trunc(literal_column("'month'"), func.coalesce(column, func.now()))
+    return func.strftime(literal_column("'%Y-%m-01'"), func.coalesce(column, func.current_timestamp()))
+
+
+def _add_counts(connection, deltas: Dict[Tuple[date, str], int]):
+    """Add ``deltas`` to the stored counts with one upsert."""
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    table = MonthlyEnrollmentStat.__table__
+    stmt = dialect.insert(table).values(
+        [{"month": month, "kind": kind, "count": delta} for (month, kind), delta in deltas.items()]
+    )
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.month, table.c.kind],
+            set_={"count": table.c.count + stmt.excluded["count"]},
+        )
+    )
+
+
+def rebuild_monthly_stats(db: Session) -> int:
+    """
+    Recompute every counter from the source tables with one GROUP BY month query. Used
+    to backfill and to repair drift from writes that bypass the ORM (raw SQL, bulk
+    deletes); enrollments committed while it runs may be missed until the next rebuild.
+    Returns the number of stat rows written. The caller commits.
+    """
+    dialect_name = db.get_bind().dialect.name
+    counts = union_all(
+        *(
+            select(
+                _month_bucket(getattr(model, attr), dialect_name).label("month"),
+                literal(kind).label("kind"),
+                func.count().label("count"),
+            ).group_by(text("1"))
+            for kind, (model, attr) in STAT_SOURCES.items()
+        )
+    )
+    rows = [
+        {
+            "month": date.fromisoformat(month) if isinstance(month, str) else month_start(month),
+            "kind": kind,
+            "count": count,
+        }
+        for month, kind, count in db.execute(counts)
+    ]
+    db.execute(delete(MonthlyEnrollmentStat))
+    if rows:
+        db.execute(insert(MonthlyEnrollmentStat), rows)
+    db.info["dashboard_stats_changed"] = True
+    return len(rows)
+
+
+# --- Maintenance on flush ---
+# Only inserts and deletes are counted. Changing enrolled_at / applied_at / joined_at on
+# an existing row does not move it to another month; rebuild_monthly_stats corrects that.
+
+
+@event.listens_for(Session, "before_flush")
+def _load_deleted_months(session, flush_context, instances):
+    # Read each deleted row's month while the row still exists: an expired attribute
+    # cannot be loaded after the flush and would count the delete against this month
+    for obj in session.deleted:
+        source = _SOURCE_BY_MODEL.get(type(obj))
+        if source:
+            getattr(obj, source[1])
+
+
+@event.listens_for(Session, "after_flush")
+def _count_flushed_rows(session, flush_context):
+    deltas: Dict[Tuple[date, str], int] = {}
+    for objects, sign in ((session.new, 1), (session.deleted, -1)):
+        for obj in objects:
+            source = _SOURCE_BY_MODEL.get(type(obj))
+            if source:
+                kind, attr = source
+                # Not loaded only for a new row left to its server default, i.e. now()
+                value = inspect(obj).attrs[attr].loaded_value
+                key = (month_start(None if value is NO_VALUE else value), kind)
+                deltas[key] = deltas.get(key, 0) + sign
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if deltas:
+        # Same connection and transaction as the flush, so the counts commit or roll back with it
+        _add_counts(session.connection(), deltas)
+        session.info["dashboard_stats_changed"] = True
+
+
+def record_bulk_insert(session: Session, kind: str, count: int):
+    """Count ``count`` rows of ``kind`` written this month with a Core ``insert()``, which the flush hook never sees."""
+    if count:
+        _add_counts(session.connection(), {(month_start(None), kind): count})
+        session.info["dashboard_stats_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_overview_after_commit(session):
+    if session.info.pop("dashboard_stats_changed", False):
+        invalidate_overview()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stat_changes(session):
+    session.info.pop("dashboard_stats_changed", None)
+
+
+# --- Overview response cache ---
+
+_overview: Optional[Tuple[float, Any]] = None
+_overview_lock = threading.Lock()
+
+
+def cached_overview(build: Callable[[], Any]) -> Any:
+    """
+    The dashboard overview from ``build()``, reused for DASHBOARD_CACHE_TTL_SECONDS.
+    Dropped early when this process commits a change to the counted tables; other
+    worker processes pick the change up when their copy expires.
+    """
+    global _overview
+    ttl = settings.DASHBOARD_CACHE_TTL_SECONDS
+    if not ttl:
+        return build()
+    with _overview_lock:
+        if _overview is not None and monotonic() < _overview[0]:
+            return _overview[1]
+    value = build()
+    with _overview_lock:
+        _overview = (monotonic() + ttl, value)
+    return value
+
+
+def invalidate_overview():
+    global _overview
+    with _overview_lock:
+        _overview = None
@@ -1,8 +1,10 @@
-import random
 from datetime import datetime, time, timedelta
-from typing import List, Dict, Any, Optional, Set
-from uuid import UUID
-from sqlalchemy.orm import Session
+import os
+import statistics
+from time import monotonic
+from typing import List, Dict, Any, Callable, Optional, Set
+from uuid import UUID, uuid4
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import and_
 
 from app.models.timetable import (
@@ -13,15 +15,46 @@ from app.models.timetable import (
     TeacherConstraint,
     SubjectConstraint,
 )
+from app.core.config import settings
 from app.models.lms import Class, Section, ClassSubject, TeacherSubject, Subject
 from app.models.users import EnrolledEmployee
+from app.services.teacher_matching import get_teacher_subject_index
+from app.services.timetable_optimizer import TimetableOptimizer, count_gaps
+from app.services.timetable_solver import (
+    TimetableSolver,
+    completed_unless_stopped,
+    search_limit,
+    section_budget,
+    solve_sections,
+    start_worker_pool,
+    stop_worker_pool,
+)
+
+
+class GenerationCancelled(Exception):
+    pass
 
 
 class SchedulingEngine:
-    def __init__(self, db: Session, academic_year_id: UUID):
+    # TimetableConfig fields a what-if candidate may override
+    CONFIG_OVERRIDES = (
+        "working_days", "start_time", "end_time", "slot_duration", "periods_per_day",
+        "break_details", "max_periods_per_teacher_day", "max_periods_per_teacher_week",
+    )
+
+    def __init__(
+        self,
+        db: Session,
+        academic_year_id: UUID,
+        search_mode: str = "mrv",
+        config_overrides: Optional[Dict[str, Any]] = None,
+    ):
+        if search_mode not in TimetableSolver.SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{search_mode}'")
         self.db = db
         self.academic_year_id = academic_year_id
-        self.config = self._get_config()
+        self.search_mode = search_mode
+        self.config = self._get_config(config_overrides)
         self.rooms = self.db.query(Room).filter(Room.is_active == True).all()
         self.teachers = self.db.query(EnrolledEmployee).filter(EnrolledEmployee.is_active == True).all()
         
@@ -34,17 +67,57 @@ class SchedulingEngine:
             c.class_subject_id: c for c in self.db.query(SubjectConstraint).all()
         }
 
-    def _get_config(self) -> TimetableConfig:
+    def _get_config(self, overrides: Optional[Dict[str, Any]] = None) -> TimetableConfig:
         config = self.db.query(TimetableConfig).filter(
             TimetableConfig.academic_year_id == self.academic_year_id
         ).first()
         if not config:
             raise ValueError("Timetable configuration not found for this academic year")
-        return config
+        if not overrides:
+            return config
+        # Detached copy, so a what-if run can never write the overrides back
+        values = {column.name: getattr(config, column.name) for column in TimetableConfig.__table__.columns}
+        for key, value in overrides.items():
+            if key not in self.CONFIG_OVERRIDES:
+                raise ValueError(f"Unknown timetable configuration field '{key}'")
+            if value is not None:
+                values[key] = value
+        return TimetableConfig(**values)
+
+    def generate(
+        self,
+        version_name: str,
+        class_ids: Optional[List[UUID]] = None,
+        max_nodes_per_section: Optional[int] = None,
+        max_seconds_per_section: Optional[float] = None,
+        max_nodes: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        parallel: bool = False,
+        optimize: bool = False,
+        optimize_seconds: Optional[float] = None,
+    ) -> TimetableVersion:
+        """
+        Main entry point for generation: ``solve`` and save the result as a new version.
+        Returns None (and writes nothing) if no section got any slot.
+        """
+        generated_count = self.solve(
+            class_ids,
+            max_nodes_per_section=max_nodes_per_section,
+            max_seconds_per_section=max_seconds_per_section,
+            max_nodes=max_nodes,
+            max_seconds=max_seconds,
+            progress=progress,
+            should_stop=should_stop,
+            parallel=parallel,
+            optimize=optimize,
+            optimize_seconds=optimize_seconds,
+        )
+        if generated_count == 0:
+            self.db.rollback()
+            return None
 
-    def generate(self, version_name: str, class_ids: Optional[List[UUID]] = None) -> TimetableVersion:
-        """Main entry point for generation"""
-        # 1. Create new version
         version = TimetableVersion(
             name=version_name,
             academic_year_id=self.academic_year_id,
@@ -52,104 +125,511 @@ class SchedulingEngine:
         )
         self.db.add(version)
         self.db.flush()
+        self._insert_slots(self.slot_rows(version.id))
+        self.db.commit()
+        return version
 
-        # 2. Get classes to process
+    def solve(
+        self,
+        class_ids: Optional[List[UUID]] = None,
+        max_nodes_per_section: Optional[int] = None,
+        max_seconds_per_section: Optional[float] = None,
+        max_nodes: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        parallel: bool = False,
+        optimize: bool = False,
+        optimize_seconds: Optional[float] = None,
+    ) -> int:
+        """
+        Solve the timetable in memory without writing anything; returns the number of
+        sections that got at least one slot. The result is kept in ``self.solved_sections``
+        (see ``slot_rows`` and ``metrics``).
+        Search effort is bounded per section and per run; a budget left as None comes from
+        settings and 0 means no limit. A section
+        that cannot be completed keeps the best partial timetable found; what is missing is
+        collected in ``self.unplaced`` with the reason.
+        ``progress`` is called after every section; ``should_stop`` is polled during the run
+        and, once it returns True, GenerationCancelled is raised.
+        ``parallel`` solves independent groups of sections in a process pool (see
+        ``_generate_parallel``).
+        ``optimize`` runs a local-search pass over the solved sections for soft objectives
+        (see TimetableOptimizer); its report is kept in ``self.optimization``.
+        """
+        # 1. Get classes to process
         query = self.db.query(Class).filter(Class.academic_year_id == self.academic_year_id)
         if class_ids:
             query = query.filter(Class.id.in_(class_ids))
-        classes = query.all()
+        classes = query.options(selectinload(Class.sections)).all()
+        self.class_ids = [cls.id for cls in classes]
+        self._preload_requirements(classes)
 
         print(f"[ENGINE] Found {len(classes)} classes for academic year {self.academic_year_id}")
 
-        # 3. Initialize global teacher load tracking
-        working_days = self.config.working_days
-        periods_per_day = self.config.periods_per_day
-        self.teacher_busy = {day: [set() for _ in range(periods_per_day)] for day in working_days}
-        self.room_busy = {day: [set() for _ in range(periods_per_day)] for day in working_days}
-        self.result_slots = []
-        self.teacher_day_load = {t.id: {day: 0 for day in working_days} for t in self.teachers}
-        self.teacher_week_load = {t.id: 0 for t in self.teachers}
+        # 2. Initialize global teacher/room occupancy (bitset solver state) and search budgets
+        self.solver = self._build_solver()
+        self.solver.should_stop = should_stop
+        self.unplaced: List[Dict[str, Any]] = []
+        self.solved_sections: List[tuple] = []
+        self.optimization: Optional[Dict[str, Any]] = None
+        self.max_nodes_per_section = search_limit(max_nodes_per_section, settings.TIMETABLE_MAX_NODES_PER_SECTION)
+        self.max_seconds_per_section = search_limit(max_seconds_per_section, settings.TIMETABLE_MAX_SECONDS_PER_SECTION)
+        run_nodes = search_limit(max_nodes, settings.TIMETABLE_MAX_NODES)
+        run_seconds = search_limit(max_seconds, settings.TIMETABLE_MAX_SECONDS)
+        self.run_node_limit = run_nodes
+        self.run_deadline = monotonic() + run_seconds if run_seconds else None
 
-        # 4. Build teacher-subject specialization map for auto-assignment
+        # 3. Build teacher-subject specialization map for auto-assignment
         self._build_teacher_subject_map()
 
-        # 5. Process each class/section
-        generated_count = 0
+        # 4. Process each class/section
+        self._progress = progress
+        self._completed_sections = 0
+        self._total_sections = sum(len(cls.sections) or 1 for cls in classes)
         print(f"[ENGINE] Starting generation loop for {len(classes)} classes...")
-        for cls in classes:
-            sections = cls.sections if cls.sections else [None]
-            print(f"  [CLASS] Processing {cls.name} with {len(sections)} sections")
-            for section in sections:
-                if self._generate_for_section(version.id, cls, section):
-                    generated_count += 1
-                else:
-                    print(f"    [FAILED] {cls.name} Section {section.name if section else 'N/A'}")
+        if parallel:
+            generated_count = self._generate_parallel(classes, should_stop)
+        else:
+            generated_count = 0
+            for cls in classes:
+                sections = cls.sections if cls.sections else [None]
+                print(f"  [CLASS] Processing {cls.name} with {len(sections)} sections")
+                for section in sections:
+                    if should_stop and should_stop():
+                        raise GenerationCancelled("Generation cancelled")
+                    unplaced_before = len(self.unplaced)
+                    placed = self._generate_for_section(cls, section)
+                    if placed:
+                        generated_count += 1
+                    self._report_section(cls, section, placed, len(self.unplaced) - unplaced_before)
 
-        if generated_count == 0:
-            self.db.rollback()
+        if should_stop and should_stop():
+            raise GenerationCancelled("Generation cancelled")
+
+        print(f"[ENGINE] Done: {self.solver.nodes} nodes explored, {len(self.unplaced)} periods unplaced")
+        if optimize and generated_count:
+            if optimize_seconds is None:
+                optimize_seconds = settings.TIMETABLE_OPTIMIZE_SECONDS
+            self.optimization = self._optimize(optimize_seconds)
+            if should_stop and should_stop():
+                raise GenerationCancelled("Generation cancelled")
+        return generated_count
+
+    def slot_rows(self, version_id: Optional[UUID]) -> List[Dict[str, Any]]:
+        """TimetableSlot column values for everything ``solve`` placed."""
+        rows = []
+        for prepared, placements in self.solved_sections:
+            rows += self._slot_rows(version_id, prepared["cls"], prepared["section"], self._placements_to_grid(placements))
+        return rows
+
+    def metrics(self) -> Dict[str, Any]:
+        """Summary of the last ``solve``, for comparing candidate configurations."""
+        placed = sum(len(rooms) for _, placements in self.solved_sections for _, _, rooms in placements)
+        unplaced = sum(2 if u["type"] == "double" else 1 for u in self.unplaced)
+        loads = [load for load in self.solver.teacher_week_load.values() if load]
+        incomplete = {(u["class_id"], u["section_id"]) for u in self.unplaced}
+
+        break_periods = [brk.get('after_period') for brk in (self.config.break_details or [])]
+        break_day = self.solver.periods_mask(break_periods) & self.solver.day_masks[0]
+        gaps = sum(
+            count_gaps((busy >> (d * self.solver.periods_per_day)) & self.solver.day_masks[0], break_day)
+            for busy in self.solver.teacher_busy.values()
+            for d in range(len(self.solver.working_days))
+        )
+        return {
+            "sections": self._total_sections,
+            "sections_complete": self._total_sections - len(incomplete),
+            "periods_placed": placed,
+            "periods_unplaced": unplaced,
+            "placement_rate": round(placed / (placed + unplaced), 4) if placed + unplaced else 1.0,
+            "teachers_used": len(loads),
+            "teacher_load_mean": round(statistics.mean(loads), 2) if loads else 0.0,
+            "teacher_load_stddev": round(statistics.pstdev(loads), 2) if loads else 0.0,
+            "teacher_load_max": max(loads, default=0),
+            "teacher_gaps": gaps,
+        }
+
+    def diff_with_active(self, rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Compare slot rows with the active version, over the classes of the last ``solve``.
+        A cell (class, section, day, period) is unchanged when it has the same subject
+        and teacher in both.
+        """
+        active = self.db.query(TimetableVersion).filter(
+            TimetableVersion.academic_year_id == self.academic_year_id,
+            TimetableVersion.is_active == True,
+        ).first()
+        if not active:
             return None
-            
+
+        current = {
+            (s.class_id, s.section_id, s.day, s.period_index): (s.subject_id, s.teacher_id)
+            for s in self.db.query(
+                TimetableSlot.class_id, TimetableSlot.section_id, TimetableSlot.day,
+                TimetableSlot.period_index, TimetableSlot.subject_id, TimetableSlot.teacher_id,
+            ).filter(TimetableSlot.version_id == active.id, TimetableSlot.class_id.in_(self.class_ids))
+        }
+        candidate = {
+            (r["class_id"], r["section_id"], r["day"], r["period_index"]): (r["subject_id"], r["teacher_id"])
+            for r in rows
+        }
+        shared = current.keys() & candidate.keys()
+        unchanged = sum(1 for key in shared if current[key] == candidate[key])
+        return {
+            "active_version_id": active.id,
+            "unchanged": unchanged,
+            "changed": len(shared) - unchanged,
+            "added": len(candidate.keys() - current.keys()),
+            "removed": len(current.keys() - candidate.keys()),
+        }
+
+    def _optimize(self, max_seconds: float) -> Dict[str, Any]:
+        """Improve the solved sections for soft objectives, in place, within ``max_seconds``."""
+        break_periods = [brk.get('after_period') for brk in (self.config.break_details or [])]
+        break_periods = [p for p in break_periods if isinstance(p, int) and 0 < p < self.config.periods_per_day]
+        # Morning is everything before the first break, or the first half of the day
+        morning_periods = min(break_periods) if break_periods else self.config.periods_per_day // 2
+
+        optimizer = TimetableOptimizer(
+            self.solver,
+            [(placements, prepared["section_busy"]) for prepared, placements in self.solved_sections],
+            morning_periods=morning_periods,
+            break_mask=self.solver.periods_mask(break_periods),
+        )
+        report = optimizer.optimize(max_seconds)
+        self.solved_sections = [
+            (prepared, optimizer.placements[s]) for s, (prepared, _) in enumerate(self.solved_sections)
+        ]
+        print(
+            f"[ENGINE] Optimized: score {report['initial_score']} -> {report['final_score']} "
+            f"in {report['iterations']} moves ({report['seconds']}s)"
+        )
+        return report
+
+    def repair(
+        self,
+        version_id: UUID,
+        teacher_id: Optional[UUID] = None,
+        replacement_teacher_id: Optional[UUID] = None,
+        room_id: Optional[UUID] = None,
+        max_seconds: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Repair an existing version in place after a teacher leaves or a room goes out of service.
+
+        The version is loaded into the solver and only the periods taught by ``teacher_id``
+        (handed to ``replacement_teacher_id`` or an auto-picked teacher) or held in ``room_id``
+        are unassigned. Each is first tried at its old time, then its section is re-solved
+        around everything else. If that still leaves periods out, the section's unlocked
+        periods are re-solved together, provided none of them is dropped for it; other
+        sections never move. Locked slots keep their time, and rewritten slots keep their
+        locked/manual flags. A locked period that cannot stay at its time is left untouched
+        and listed in ``self.unplaced``; other affected periods that cannot be placed are
+        removed and listed there too.
+        """
+        if not teacher_id and not room_id:
+            raise ValueError("Nothing to repair: give a teacher or a room")
+        version = self.db.query(TimetableVersion).filter(TimetableVersion.id == version_id).first()
+        if not version:
+            raise ValueError("Timetable version not found")
+        if version.is_locked:
+            raise ValueError("Cannot repair a locked version.")
+
+        started = monotonic()
+        self.rooms = [r for r in self.rooms if r.id != room_id]
+        self.teachers = [t for t in self.teachers if t.id != teacher_id]
+        self.solver = self._build_solver()
+        self.unplaced = []
+        self._build_teacher_subject_map()
+        max_seconds = search_limit(max_seconds, settings.TIMETABLE_MAX_SECONDS)
+        deadline = started + max_seconds if max_seconds else None
+        section_nodes = search_limit(None, settings.TIMETABLE_MAX_NODES_PER_SECTION)
+
+        slots = self.db.query(TimetableSlot).filter(TimetableSlot.version_id == version_id).all()
+        sections = self._load_version_sections(slots)
+
+        # Commit every unaffected period, set the affected ones aside
+        affected_count = 0
+        for entry in sections.values():
+            entry["affected"] = []
+            entry["held"] = {}
+            for placement in entry["placements"]:
+                item, start, rooms, placement_slots = placement
+                if any(s.teacher_id == teacher_id or (room_id and s.room_id == room_id) for s in placement_slots):
+                    entry["affected"].append(placement)
+                    if item["is_locked"]:
+                        # A locked period never moves and may have to stay exactly as it is,
+                        # so its teacher and rooms stay held until its section is repaired
+                        held = dict(item)
+                        self.solver.occupy(held, start, rooms)
+                        entry["held"][id(item)] = held
+                else:
+                    self.solver.occupy(item, start, rooms)
+            affected_count += len(entry["affected"])
+
+        # Hand the departing teacher's periods over, one teacher per subject and section
+        if teacher_id:
+            picks: Dict[tuple, UUID] = {}
+            for key, entry in sections.items():
+                for item, _, _, _ in entry["affected"]:
+                    if item["teacher_id"] != teacher_id:
+                        continue
+                    pick_key = (key, item["subject_id"])
+                    if pick_key not in picks:
+                        if replacement_teacher_id:
+                            picks[pick_key] = replacement_teacher_id
+                        else:
+                            teacher = self._pick_teacher_for_subject(item["subject_id"], item.get("subject_name") or "")
+                            picks[pick_key] = teacher.id if teacher else None
+                    item["teacher_id"] = picks[pick_key]
+                    if item["teacher_id"]:
+                        width = 2 if item["type"] == "double" else 1
+                        self.planned_load[item["teacher_id"]] = self.planned_load.get(item["teacher_id"], 0) + width
+
+        moved = 0
+        for entry in sections.values():
+            if entry["affected"]:
+                moved += self._repair_section(version_id, entry, section_nodes, deadline)
+        self.planned_load = {}
+
         self.db.commit()
-        return version
+        print(
+            f"[ENGINE] Repaired {affected_count} periods ({moved} moved, {len(self.unplaced)} unplaced) "
+            f"in {monotonic() - started:.3f}s"
+        )
+        return {
+            "version_id": version_id,
+            "affected_periods": affected_count,
+            "moved_periods": moved,
+            "nodes_explored": self.solver.nodes,
+            "seconds": round(monotonic() - started, 3),
+        }
 
-    def _build_teacher_subject_map(self):
+    def _load_version_sections(self, slots: List[TimetableSlot]) -> Dict[tuple, Dict[str, Any]]:
         """
-        Build a lookup: subject_id -> [(teacher, priority)].
-        Uses fuzzy matching between teacher specialization and subject names.
+        Group a version's slots into solver placements per section:
+        ``(class_id, section_id) -> {cls, section, section_busy, placements}`` with
+        placements as ``(item, start, rooms, slots)``. Consecutive double-period slots of
+        the same subject and teacher form one double item.
         """
-        self.teacher_subject_map: Dict[str, List] = {}
-        
-        subjects = self.db.query(Subject).all()
-        # Pre-alias map for common variations
-        alias_map = {
-            "math": "mathematics",
-            "stat": "statistics",
-            "bio": "biology",
-            "chem": "chemistry",
-            "phy": "physics",
-            "cs": "computer science",
-            "it": "information technology",
-            "eng": "english",
-            "isl": "islamiat",
+        working_days = self.config.working_days
+        periods_per_day = self.config.periods_per_day
+        class_subjects = {
+            (cs.class_id, cs.subject_id): cs
+            for cs in self.db.query(ClassSubject).filter(
+                ClassSubject.class_id.in_({s.class_id for s in slots})
+            ).all()
+        } if slots else {}
+        break_periods = [brk.get('after_period') for brk in (self.config.break_details or [])]
+        breaks = self.solver.periods_mask(break_periods)
+
+        by_section: Dict[tuple, List[TimetableSlot]] = {}
+        for slot in slots:
+            if slot.day not in working_days or not 0 <= slot.period_index < periods_per_day:
+                raise ValueError("Timetable version does not match the current timetable configuration")
+            by_section.setdefault((slot.class_id, slot.section_id), []).append(slot)
+
+        sections = {}
+        for key, section_slots in by_section.items():
+            section_slots.sort(key=lambda s: self.solver.cell(s.day, s.period_index))
+            placements = []
+            i = 0
+            while i < len(section_slots):
+                slot = section_slots[i]
+                group = [slot]
+                following = section_slots[i + 1] if i + 1 < len(section_slots) else None
+                if (
+                    slot.is_double_period and following is not None and following.is_double_period
+                    and following.day == slot.day and following.period_index == slot.period_index + 1
+                    and following.subject_id == slot.subject_id and following.teacher_id == slot.teacher_id
+                ):
+                    group.append(following)
+                i += len(group)
+
+                cs = class_subjects.get((slot.class_id, slot.subject_id))
+                constraints = self.subject_constraints.get(cs.id) if cs else None
+                item = {
+                    "class_subject_id": cs.id if cs else None,
+                    "subject_id": slot.subject_id,
+                    "subject_name": slot.subject.name if slot.subject else None,
+                    "teacher_id": slot.teacher_id,
+                    "is_lab": constraints.is_lab if constraints else False,
+                    "requires_double_period": constraints.requires_double_period if constraints else False,
+                    "difficulty": constraints.difficulty_level if constraints else 1,
+                    "is_core": constraints.is_core if constraints else False,
+                    "type": "double" if len(group) == 2 else "single",
+                    "is_locked": any(s.is_locked for s in group),
+                    "is_manual": any(s.is_manual for s in group),
+                }
+                start = self.solver.cell(slot.day, slot.period_index)
+                placements.append((item, start, tuple(s.room_id for s in group), group))
+
+            sections[key] = {
+                "cls": section_slots[0].class_,
+                "section": section_slots[0].section,
+                "section_busy": breaks,
+                "placements": placements,
+            }
+        return sections
+
+    def _repair_section(
+        self, version_id: UUID, entry: Dict[str, Any], max_nodes: Optional[int], deadline: Optional[float]
+    ) -> int:
+        """Re-place the affected periods of one section and rewrite their slots. Returns how many moved."""
+        solver = self.solver
+        affected_ids = {id(p[0]) for p in entry["affected"]}
+        fixed = [p for p in entry["placements"] if id(p[0]) not in affected_ids]
+        busy = entry["section_busy"]
+        for item, start, rooms, _ in fixed:
+            busy |= ((1 << len(rooms)) - 1) << start
+
+        # 1. Same time as before, where the (new) teacher and a room allow it
+        placed: List[tuple] = []
+        pool: List[Dict[str, Any]] = []
+        kept_locked: Set[int] = set()
+        kept_busy = 0
+        for item, start, rooms, _ in entry["affected"]:
+            width = 2 if item["type"] == "double" else 1
+            held = entry["held"].get(id(item))
+            if held:
+                solver.remove(held, start, rooms)
+            if item["teacher_id"] and solver.legal_starts(item, busy) >> start & 1:
+                placed.append((item, start, solver.place(item, start)))
+                busy |= ((1 << width) - 1) << start
+            elif item["is_locked"]:
+                # Never drop a pinned period: its slots stay as they are (old teacher or room)
+                # and keep their cells and rooms, for an admin to resolve
+                solver.occupy(held, start, rooms)
+                kept_locked.add(id(item))
+                kept_busy |= ((1 << width) - 1) << start
+                busy |= kept_busy
+                self._record_unplaced(entry["cls"], entry["section"], item, "locked_slot")
+            elif not item["teacher_id"]:
+                self._record_unplaced(entry["cls"], entry["section"], item, "no_teacher")
+            else:
+                pool.append(item)
+
+        # 2. Anywhere else in the section, around its other periods
+        rewritten = list(entry["affected"])
+        if pool:
+            before = solver.snapshot()
+            result = solver.solve(
+                pool, busy, mode=self.search_mode,
+                max_nodes=max_nodes, deadline=deadline,
+            )
+            if not result.complete:
+                # 3. Widen the neighbourhood to the section's unlocked periods
+                partial = solver.snapshot()
+                movable = [p for p in fixed if not p[0]["is_locked"]]
+                solver.restore(before)
+                for item, start, rooms, _ in movable:
+                    solver.remove(item, start, rooms)
+                wide_busy = entry["section_busy"] | kept_busy
+                for item, start, rooms, _ in fixed:
+                    if item["is_locked"]:
+                        wide_busy |= ((1 << len(rooms)) - 1) << start
+                for item, start, rooms in placed:
+                    wide_busy |= ((1 << len(rooms)) - 1) << start
+                wide = solver.solve(
+                    pool + [p[0] for p in movable], wide_busy, mode=self.search_mode,
+                    max_nodes=max_nodes, deadline=deadline,
+                )
+                # Only if it places more, and never at the cost of a period already in place
+                movable_ids = {id(p[0]) for p in movable}
+                if len(wide.unplaced) < len(result.unplaced) and not any(
+                    id(item) in movable_ids for item, _ in wide.unplaced
+                ):
+                    result = wide
+                    rewritten += movable
+                else:
+                    solver.restore(partial)
+            placed += result.placements
+            for item, reason in result.unplaced:
+                self._record_unplaced(entry["cls"], entry["section"], item, reason)
+
+        # Rewrite only slots whose period actually changed
+        old = {
+            id(item): (start, rooms, slots)
+            for item, start, rooms, slots in rewritten
+            if id(item) not in kept_locked
         }
+        changed = []
+        moved = 0
+        for item, start, rooms in placed:
+            old_start, old_rooms, old_slots = old[id(item)]
+            if start != old_start:
+                moved += 1
+            if start != old_start or tuple(rooms) != tuple(old_rooms) or any(s.teacher_id != item["teacher_id"] for s in old_slots):
+                changed.append((item, start, rooms))
+            else:
+                del old[id(item)]
+        for _, _, old_slots in old.values():
+            for slot in old_slots:
+                self.db.delete(slot)
+        self.db.flush()
+        if changed:
+            self._save_timetable(version_id, entry["cls"], entry["section"], self._placements_to_grid(changed))
+        return moved
 
-        def normalize(text):
-            if not text: return set()
-            # Remove punctuation and split into words
-            words = "".join(c if c.isalnum() else " " for c in text.lower()).split()
-            # Apply aliases
-            normalized = {alias_map.get(w, w) for w in words}
-            return normalized
+    def _report_section(self, cls: Class, section: Optional[Section], placed: bool, unplaced_count: int):
+        if not placed:
+            print(f"    [FAILED] {cls.name} Section {section.name if section else 'N/A'}")
+        self._completed_sections += 1
+        if self._progress:
+            self._progress({
+                "completed_sections": self._completed_sections,
+                "total_sections": self._total_sections,
+                "class_name": cls.name,
+                "section_name": section.name if section else None,
+                "placed": placed,
+                "unplaced": unplaced_count,
+                "nodes_explored": self.solver.nodes,
+            })
 
-        subject_tokens = {s.id: normalize(s.name) for s in subjects}
-        
-        print(f"[ENGINE] Building teacher-subject map for {len(subjects)} subjects...")
+    def _build_solver(self) -> TimetableSolver:
+        # Plain, picklable arguments so worker processes can build the same solver
+        self.solver_kwargs = {
+            "working_days": list(self.config.working_days),
+            "periods_per_day": self.config.periods_per_day,
+            "rooms": [(r.id, bool(r.is_lab)) for r in self.rooms],
+            "teacher_constraints": {
+                teacher_id: {
+                    "max_periods_per_day": c.max_periods_per_day,
+                    "max_periods_per_week": c.max_periods_per_week,
+                    "unavailable_slots": c.unavailable_slots,
+                }
+                for teacher_id, c in self.teacher_constraints.items()
+            },
+            "max_periods_per_day": self.config.max_periods_per_teacher_day,
+            "max_periods_per_week": self.config.max_periods_per_teacher_week,
+        }
+        self.planned_load: Dict[UUID, int] = {}
+        return TimetableSolver(**self.solver_kwargs)
 
-        for teacher in self.teachers:
-            if not teacher.subject:
-                continue
-            
-            teacher_tokens = normalize(teacher.subject.replace(";", ","))
-            
-            for subject_id, tokens in subject_tokens.items():
-                if not tokens: continue
-                
-                # Check for word overlap
-                # If any word from the subject is in the teacher's specialties
-                # OR if any specialty is in the subject name
-                match = False
-                if tokens.intersection(teacher_tokens):
-                    match = True
-                
-                if match:
-                    if subject_id not in self.teacher_subject_map:
-                        self.teacher_subject_map[subject_id] = []
-                    
-                    if teacher.id not in [t.id for t, _ in self.teacher_subject_map[subject_id]]:
-                        name = f"{teacher.first_name} {teacher.last_name}"
-                        subj_name = next((s.name for s in subjects if s.id == subject_id), "Unknown")
-                        print(f"  [MATCH] Teacher {name} ({teacher.subject}) -> {subj_name}")
-                        self.teacher_subject_map[subject_id].append((teacher, 1))  # 1 = specialist
+    def _teacher_load(self, teacher_id: UUID) -> int:
+        """Scheduled periods plus periods already promised in prepared-but-unsolved sections."""
+        return self.solver.week_load(teacher_id) + self.planned_load.get(teacher_id, 0)
+
+    def _build_teacher_subject_map(self):
+        """
+        Build a lookup: subject_id -> [(teacher, priority)].
+        Uses the cached token index matching teacher specializations to subject names.
+        """
+        index = get_teacher_subject_index(self.db, self.academic_year_id)
+        teachers_by_id = {t.id: t for t in self.teachers}
+        self.teacher_subject_map: Dict[UUID, List] = {}
+
+        print(f"[ENGINE] Building teacher-subject map for {len(index.subject_names)} subjects...")
+
+        for subject_id, teacher_ids in index.subject_teachers.items():
+            for teacher_id in teacher_ids:
+                teacher = teachers_by_id.get(teacher_id)
+                if teacher is None:
+                    continue
+                name = f"{teacher.first_name} {teacher.last_name}"
+                print(f"  [MATCH] Teacher {name} ({teacher.subject}) -> {index.subject_names[subject_id]}")
+                self.teacher_subject_map.setdefault(subject_id, []).append((teacher, 1))  # 1 = specialist
 
     def _pick_teacher_for_subject(self, subject_id: UUID, subject_name: str = "") -> Optional[EnrolledEmployee]:
         """
@@ -162,10 +642,10 @@ class SchedulingEngine:
             # Sort specialists by current week load (ascending = least loaded first)
             specialists = sorted(
                 [t for t, _ in candidates],
-                key=lambda t: self.teacher_week_load.get(t.id, 0)
+                key=lambda t: self._teacher_load(t.id)
             )
             top = specialists[0]
-            print(f"  [PICK] Specialist: {top.first_name} {top.last_name} for {subject_name} (Load: {self.teacher_week_load.get(top.id, 0)})")
+            print(f"  [PICK] Specialist: {top.first_name} {top.last_name} for {subject_name} (Load: {self._teacher_load(top.id)})")
             return top
         
         # Fallback: pick any active teacher with lowest load
@@ -177,22 +657,50 @@ class SchedulingEngine:
             print(f"  [PICK] FAILED: No teachers available at all for {subject_name}")
             return None
         
-        top = min(active_teachers, key=lambda t: self.teacher_week_load.get(t.id, 0))
-        print(f"  [PICK] Fallback: {top.first_name} {top.last_name} for {subject_name} (No specialist found, Load: {self.teacher_week_load.get(top.id, 0)})")
+        top = min(active_teachers, key=lambda t: self._teacher_load(t.id))
+        print(f"  [PICK] Fallback: {top.first_name} {top.last_name} for {subject_name} (No specialist found, Load: {self._teacher_load(top.id)})")
         return top
 
-    def _get_section_requirements(self, cls: Class, section: Optional[Section]) -> List[Dict]:
+    def _preload_requirements(self, classes: List[Class]):
         """
-        Build subject requirements for a class/section, auto-assigning teachers by specialization.
-        Falls back to pre-existing TeacherSubject records if available, otherwise auto-assigns.
+        Fetch the subjects and manual teacher assignments of every class being generated in
+        two queries, so building a section's requirements needs no further round trips.
         """
-        class_subjects = (
+        self.class_subjects: Dict[UUID, List[tuple]] = {}
+        # (class_subject_id, section_id) -> teacher_id; section None means any section
+        self.assigned_teachers: Dict[tuple, UUID] = {}
+        class_ids = [cls.id for cls in classes]
+        if not class_ids:
+            return
+
+        rows = (
             self.db.query(ClassSubject, Subject.name)
             .join(Subject, ClassSubject.subject_id == Subject.id)
-            .filter(ClassSubject.class_id == cls.id)
+            .filter(ClassSubject.class_id.in_(class_ids))
             .all()
         )
-        
+        for cs, subj_name in rows:
+            self.class_subjects.setdefault(cs.class_id, []).append((cs, subj_name))
+        if not rows:
+            return
+
+        assignments = (
+            self.db.query(TeacherSubject.class_subject_id, TeacherSubject.section_id, TeacherSubject.teacher_id)
+            .filter(TeacherSubject.class_subject_id.in_([cs.id for cs, _ in rows]))
+            .all()
+        )
+        for class_subject_id, section_id, teacher_id in assignments:
+            # First assignment wins, like the per-subject .first() lookups this replaces
+            self.assigned_teachers.setdefault((class_subject_id, section_id), teacher_id)
+            self.assigned_teachers.setdefault((class_subject_id, None), teacher_id)
+
+    def _get_section_requirements(self, cls: Class, section: Optional[Section]) -> List[Dict]:
+        """
+        Build subject requirements for a class/section, auto-assigning teachers by specialization.
+        Falls back to pre-existing TeacherSubject records if available, otherwise auto-assigns.
+        """
+        class_subjects = self.class_subjects.get(cls.id, [])
+
         if not class_subjects:
             print(f"No subjects found for class {cls.name}. Assign subjects to this class first.")
             return []
@@ -201,15 +709,9 @@ class SchedulingEngine:
         requirements = []
         for cs, subj_name in class_subjects:
             # 1. Try existing manual TeacherSubject assignment first
-            ts_query = self.db.query(TeacherSubject).filter(
-                TeacherSubject.class_subject_id == cs.id
-            )
-            if section:
-                ts_query = ts_query.filter(TeacherSubject.section_id == section.id)
-            ts = ts_query.first()
-            
-            if ts:
-                teacher_id = ts.teacher_id
+            teacher_id = self.assigned_teachers.get((cs.id, section.id if section else None))
+
+            if teacher_id:
                 print(f"  [MANUAL] Using pre-assigned teacher for {subj_name}")
             else:
                 # 2. Auto-assign by specialization
@@ -223,6 +725,7 @@ class SchedulingEngine:
             requirements.append({
                 "class_subject_id": cs.id,
                 "subject_id": cs.subject_id,
+                "subject_name": subj_name,
                 "teacher_id": teacher_id,
                 "quota": cs.periods_per_week or 1,
                 "is_lab": constraints.is_lab if constraints else False,
@@ -233,11 +736,12 @@ class SchedulingEngine:
         
         return requirements
 
-    def _generate_for_section(self, version_id: UUID, cls: Class, section: Optional[Section]) -> bool:
+    def _prepare_section(self, cls: Class, section: Optional[Section]) -> Optional[Dict[str, Any]]:
+        """Build the period pool and blocked cells of one section; None if it has no requirements."""
         requirements = self._get_section_requirements(cls, section)
         if not requirements:
             print(f"[ENGINE] No requirements for {cls.name} / Section {section.name if section else 'N/A'}")
-            return False
+            return None
 
         # Heuristic: Most Constrained Variable (MCV)
         requirements.sort(key=lambda x: (x['is_lab'], x['requires_double_period'], x['quota']), reverse=True)
@@ -247,17 +751,10 @@ class SchedulingEngine:
 
         print(f"[ENGINE] Generating for {cls.name} | {len(requirements)} subjects | {len(working_days)} days | {periods_per_day} periods/day")
         print(f"[ENGINE] Rooms available: {len(self.rooms)}")
-        
-        # Initialize timetable grid
-        timetable = {day: [None for _ in range(periods_per_day)] for day in working_days}
-        
+
         # Pre-fill Breaks
-        if self.config.break_details:
-            for brk in self.config.break_details:
-                after_p = brk.get('after_period')
-                if after_p is not None and after_p < periods_per_day:
-                    for day in working_days:
-                        timetable[day][after_p] = "BREAK"
+        break_periods = [brk.get('after_period') for brk in (self.config.break_details or [])]
+        section_busy = self.solver.periods_mask(break_periods)
 
         # Flatten requirements into a pool
         period_pool = []
@@ -271,149 +768,232 @@ class SchedulingEngine:
                 period_pool.append({**req, "type": "single"})
 
         total_slots = len(working_days) * periods_per_day
-        break_slots = sum(1 for d in working_days for s in timetable[d] if s == "BREAK")
+        break_slots = bin(section_busy).count("1")
         available_slots = total_slots - break_slots
         print(f"[ENGINE] Period pool size: {len(period_pool)} | Available slots: {available_slots}")
 
+        unplaced = []
         if len(period_pool) > available_slots:
             print(f"[ENGINE] WARNING: More periods required ({len(period_pool)}) than available slots ({available_slots})!")
             # Truncate pool to fit
+            unplaced = [(item, "exceeds_available_slots") for item in period_pool[available_slots:]]
             period_pool = period_pool[:available_slots]
 
-        if self._backtrack(timetable, period_pool, 0):
-            self._save_timetable(version_id, cls, section, timetable)
+        return {
+            "cls": cls,
+            "section": section,
+            "pool": period_pool,
+            "section_busy": section_busy,
+            "unplaced": unplaced,
+        }
+
+    def _generate_for_section(self, cls: Class, section: Optional[Section]) -> bool:
+        prepared = self._prepare_section(cls, section)
+        if not prepared:
+            return False
+
+        nodes_left = self.run_node_limit - self.solver.nodes if self.run_node_limit else None
+        max_nodes, deadline = section_budget(
+            self.max_nodes_per_section, self.max_seconds_per_section, nodes_left, self.run_deadline
+        )
+        if (max_nodes is not None and max_nodes <= 0) or (deadline is not None and monotonic() >= deadline):
+            placements = []
+            unplaced = [(item, "run_budget_exhausted") for item in prepared["pool"]]
+        else:
+            result = self.solver.solve(
+                prepared["pool"], prepared["section_busy"],
+                mode=self.search_mode, max_nodes=max_nodes, deadline=deadline,
+            )
+            placements, unplaced = result.placements, result.unplaced
+        return self._finish_section(prepared, placements, unplaced)
+
+    def _finish_section(self, prepared: Dict[str, Any], placements: List[tuple], unplaced: List[tuple]) -> bool:
+        """Record unplaced periods and keep whatever was placed for saving. Returns True if anything was placed."""
+        cls, section = prepared["cls"], prepared["section"]
+        unplaced = prepared["unplaced"] + unplaced
+        for item, reason in unplaced:
+            self._record_unplaced(cls, section, item, reason)
+
+        if not placements:
+            print(f"[ENGINE] FAILED: Nothing could be placed for {cls.name} ({unplaced[0][1] if unplaced else 'empty pool'})")
+            return False
+        # Saved once every section is solved (and optimized), see ``generate``
+        self.solved_sections.append((prepared, placements))
+        if unplaced:
+            print(f"[ENGINE] PARTIAL: {len(unplaced)} periods unplaced for {cls.name} ({unplaced[-1][1]})")
+        else:
             print(f"[ENGINE] SUCCESS: Generated timetable for {cls.name}")
-            return True
-        print(f"[ENGINE] FAILED: Backtracking exhausted all possibilities for {cls.name}")
-        return False
+        return True
 
-    def _backtrack(self, timetable, period_pool, pool_index) -> bool:
-        if pool_index >= len(period_pool):
-            return True
+    def _record_unplaced(self, cls: Class, section: Optional[Section], item: Dict[str, Any], reason: str):
+        self.unplaced.append({
+            "class_id": cls.id,
+            "class_name": cls.name,
+            "section_id": section.id if section else None,
+            "section_name": section.name if section else None,
+            "subject_id": item['subject_id'],
+            "subject_name": item.get('subject_name'),
+            "teacher_id": item['teacher_id'],
+            "type": item['type'],
+            "reason": reason,
+        })
 
-        item = period_pool[pool_index]
-        days = list(timetable.keys())
-        random.shuffle(days) # Stochastic for variety
+    def _generate_parallel(self, classes: List[Class], should_stop: Optional[Callable[[], bool]]) -> int:
+        """
+        Solve groups of sections that share no teacher in separate processes, then merge.
 
-        for day in days:
-            periods_per_day = len(timetable[day])
-            slots_to_check = range(periods_per_day)
-            
-            for p_idx in slots_to_check:
-                if item['type'] == "double":
-                    if p_idx + 1 >= periods_per_day: continue # Need two slots
-                    if timetable[day][p_idx] is not None or timetable[day][p_idx+1] is not None: continue
-                    
-                    # Check constraints for both slots
-                    if self._is_valid(item, day, p_idx, timetable) and self._is_valid(item, day, p_idx+1, timetable):
-                        # Assign
-                        self._assign(timetable, day, p_idx, item)
-                        self._assign(timetable, day, p_idx+1, item)
-                        
-                        if self._backtrack(timetable, period_pool, pool_index + 1):
-                            return True
-                        
-                        # Unassign
-                        self._unassign(timetable, day, p_idx, item)
-                        self._unassign(timetable, day, p_idx+1, item)
-                else:
-                    if timetable[day][p_idx] is not None: continue
-                    
-                    if self._is_valid(item, day, p_idx, timetable):
-                        self._assign(timetable, day, p_idx, item)
-                        if self._backtrack(timetable, period_pool, pool_index + 1):
-                            return True
-                        self._unassign(timetable, day, p_idx, item)
-        
-        return False
+        Teachers are auto-assigned for every section before anything is solved, balancing on
+        planned rather than scheduled load. Rooms are one shared pool, so each group gets a
+        disjoint share of rooms and labs in proportion to its demand; groups that cannot get
+        a share are merged. A share can be tighter than the whole pool would have been, and
+        anything that does not fit is reported in ``self.unplaced`` like any other miss.
+        """
+        prepared = []
+        generated_count = 0
+        for cls in classes:
+            for section in (cls.sections or [None]):
+                entry = self._prepare_section(cls, section)
+                if entry is None:
+                    self._report_section(cls, section, False, 0)
+                    continue
+                for item in entry["pool"]:
+                    width = 2 if item['type'] == "double" else 1
+                    self.planned_load[item['teacher_id']] = self.planned_load.get(item['teacher_id'], 0) + width
+                prepared.append(entry)
+        self.planned_load = {}
+        if not prepared:
+            return 0
 
-    def _is_valid(self, item, day, p_idx, timetable) -> bool:
-        teacher_id = item['teacher_id']
+        clusters = self._partition_sections(prepared)
+        print(f"[ENGINE] Parallel mode: {len(prepared)} sections in {len(clusters)} independent groups")
 
-        # 1. Teacher Clash
-        if teacher_id in self.teacher_busy[day][p_idx]:
-            return False
-        
-        # 2. Teacher Unavailable
-        t_const = self.teacher_constraints.get(teacher_id)
-        if t_const and t_const.unavailable_slots:
-            for slot in t_const.unavailable_slots:
-                if slot.get('day') == day and slot.get('period_index') == p_idx:
-                    return False
-
-        # 3. Teacher Load Limits
-        max_day = (t_const.max_periods_per_day if t_const and t_const.max_periods_per_day
-                   else self.config.max_periods_per_teacher_day)
-        max_week = (t_const.max_periods_per_week if t_const and t_const.max_periods_per_week
-                    else self.config.max_periods_per_teacher_week)
-
-        day_load = self.teacher_day_load.get(teacher_id, {}).get(day, 0)
-        week_load = self.teacher_week_load.get(teacher_id, 0)
-
-        if max_day and day_load >= max_day:
-            return False
-        if max_week and week_load >= max_week:
-            return False
+        workers = min(len(clusters), settings.TIMETABLE_PARALLEL_WORKERS or os.cpu_count() or 1)
+        pool, stop_event = start_worker_pool(workers)
+        finished = False
+        try:
+            futures = {}
+            for indices, rooms in clusters:
+                share = len(indices) / len(prepared)
+                run_nodes = int(self.run_node_limit * share) if self.run_node_limit else None
+                run_seconds = max(0.0, self.run_deadline - monotonic()) if self.run_deadline else None
+                future = pool.submit(
+                    solve_sections,
+                    {**self.solver_kwargs, "rooms": rooms},
+                    [(prepared[i]["pool"], prepared[i]["section_busy"]) for i in indices],
+                    self.search_mode,
+                    self.max_nodes_per_section,
+                    self.max_seconds_per_section,
+                    run_nodes,
+                    run_seconds,
+                )
+                futures[future] = indices
 
-        # 4. Room Availability (optional — room_id is nullable in DB)
-        if self.rooms:
-            room = self._find_available_room(item, day, p_idx)
-            if not room:
-                return False
-            
-        return True
+            for future in completed_unless_stopped(futures, should_stop):
+                results, nodes = future.result()
+                self.solver.nodes += nodes
+                for i, (placed_idx, unplaced_idx) in zip(futures[future], results):
+                    items = prepared[i]["pool"]
+                    placements = []
+                    for item_idx, start, rooms in placed_idx:
+                        self.solver.occupy(items[item_idx], start, rooms)
+                        placements.append((items[item_idx], start, rooms))
+                    unplaced = [(items[item_idx], reason) for item_idx, reason in unplaced_idx]
+                    unplaced_before = len(self.unplaced)
+                    placed = self._finish_section(prepared[i], placements, unplaced)
+                    if placed:
+                        generated_count += 1
+                    self._report_section(
+                        prepared[i]["cls"], prepared[i]["section"], placed, len(self.unplaced) - unplaced_before
+                    )
+            if should_stop and should_stop():
+                self.db.rollback()
+                raise GenerationCancelled("Generation cancelled")
+            finished = True
+        finally:
+            if finished:
+                pool.shutdown()
+            else:
+                # Cancelled or failed: stop the running workers instead of waiting out their budgets
+                stop_worker_pool(pool, stop_event)
+        return generated_count
 
-    def _find_available_room(self, item, day, p_idx) -> Optional[Room]:
-        possible_rooms = [r for r in self.rooms if r.id not in self.room_busy[day][p_idx]]
-        
-        if item.get('is_lab'):
-            possible_rooms = [r for r in possible_rooms if r.is_lab]
-        else:
-            # Prefer non-lab for normal subjects
-            non_labs = [r for r in possible_rooms if not r.is_lab]
-            if non_labs: possible_rooms = non_labs
-            
-        if not possible_rooms:
-            return None
-        return possible_rooms[0]
-
-    def _assign(self, timetable, day, p_idx, item):
-        teacher_id = item['teacher_id']
-        room_id = None
-        if self.rooms:
-            room = self._find_available_room(item, day, p_idx)
-            if room:
-                room_id = room.id
-                self.room_busy[day][p_idx].add(room_id)
-        assignment = {**item, "room_id": room_id}
-        timetable[day][p_idx] = assignment
-        self.teacher_busy[day][p_idx].add(teacher_id)
-        # Track load (safe get in case teacher was auto-assigned and not in initial dict)
-        if teacher_id not in self.teacher_day_load:
-            self.teacher_day_load[teacher_id] = {d: 0 for d in self.config.working_days}
-        if teacher_id not in self.teacher_week_load:
-            self.teacher_week_load[teacher_id] = 0
-        self.teacher_day_load[teacher_id][day] += 1
-        self.teacher_week_load[teacher_id] += 1
-
-    def _unassign(self, timetable, day, p_idx, item):
-        teacher_id = item['teacher_id']
-        assignment = timetable[day][p_idx]
-        if assignment and isinstance(assignment, dict):
-            room_id = assignment.get('room_id')
-            self.teacher_busy[day][p_idx].discard(teacher_id)
-            if room_id:
-                self.room_busy[day][p_idx].discard(room_id)
-            if teacher_id in self.teacher_day_load:
-                self.teacher_day_load[teacher_id][day] = max(0, self.teacher_day_load[teacher_id].get(day, 0) - 1)
-            if teacher_id in self.teacher_week_load:
-                self.teacher_week_load[teacher_id] = max(0, self.teacher_week_load.get(teacher_id, 0) - 1)
-            timetable[day][p_idx] = None
+    def _partition_sections(self, prepared: List[Dict[str, Any]]) -> List[tuple]:
+        """
+        Group sections into connected components of the shared-teacher graph and split the
+        rooms between them. Returns ``(section indices, [(room_id, is_lab)])`` per group.
+        """
+        parent = list(range(len(prepared)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        teacher_owner = {}
+        for i, entry in enumerate(prepared):
+            for item in entry["pool"]:
+                owner = teacher_owner.setdefault(item['teacher_id'], i)
+                parent[find(i)] = find(owner)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(prepared)):
+            groups.setdefault(find(i), []).append(i)
+        clusters = list(groups.values())
+        if not self.rooms or len(clusters) <= 1:
+            return [(indices, self.solver_kwargs["rooms"]) for indices in clusters]
+
+        labs = [(r.id, True) for r in self.rooms if r.is_lab]
+        others = [(r.id, False) for r in self.rooms if not r.is_lab]
+
+        def lab_demand(indices):
+            return sum(
+                2 if item['type'] == "double" else 1
+                for i in indices for item in prepared[i]["pool"] if item['is_lab']
+            )
+
+        # Every group needing labs must get at least one; otherwise those groups are merged
+        needing_labs = [c for c in clusters if lab_demand(c)]
+        if len(needing_labs) > len(labs) and len(needing_labs) > 1:
+            merged = [i for c in needing_labs for i in c]
+            clusters = [c for c in clusters if not lab_demand(c)] + [merged]
+            needing_labs = [merged]
+        # Every group needs at least one ordinary room; otherwise fall back to a single group
+        if len(others) < len(clusters):
+            return [([i for c in clusters for i in c], self.solver_kwargs["rooms"])]
+
+        lab_counts = _apportion(len(labs), [lab_demand(c) for c in needing_labs])
+        room_counts = _apportion(len(others), [len(c) for c in clusters])
+        lab_share = {}
+        offset = 0
+        for c, count in zip(needing_labs, lab_counts):
+            lab_share[id(c)] = labs[offset:offset + count]
+            offset += count
+        result = []
+        offset = 0
+        for c, count in zip(clusters, room_counts):
+            result.append((c, lab_share.get(id(c), []) + others[offset:offset + count]))
+            offset += count
+        return result
+
+    def _placements_to_grid(self, placements: List[tuple]) -> Dict:
+        """Convert solver placements into the {day: [slot or None]} grid used for saving."""
+        timetable = {day: [None for _ in range(self.config.periods_per_day)] for day in self.config.working_days}
+        for item, start, rooms in placements:
+            for offset, room_id in enumerate(rooms):
+                day, p_idx = self.solver.cell_position(start + offset)
+                timetable[day][p_idx] = {**item, "room_id": room_id}
+        return timetable
 
     def _save_timetable(self, version_id: UUID, cls: Class, section: Optional[Section], timetable: Dict):
+        self._insert_slots(self._slot_rows(version_id, cls, section, timetable))
+
+    def _slot_rows(self, version_id: UUID, cls: Class, section: Optional[Section], timetable: Dict) -> List[Dict[str, Any]]:
+        """Column values of the TimetableSlot rows for one section's grid."""
         start_time_base = self.config.start_time
         duration = self.config.slot_duration
-        
+        rows = []
+
         for day, slots in timetable.items():
             for i, slot_data in enumerate(slots):
                 if slot_data is None or slot_data == "BREAK":
@@ -425,17 +1005,45 @@ class SchedulingEngine:
                 current_time = datetime.combine(datetime.today(), start_time_base) + timedelta(minutes=i * duration)
                 end_time = current_time + timedelta(minutes=duration)
                 
-                slot = TimetableSlot(
-                    version_id=version_id,
-                    class_id=cls.id,
-                    section_id=section.id if section else None,
-                    subject_id=slot_data['subject_id'],
-                    teacher_id=slot_data['teacher_id'],
-                    room_id=slot_data['room_id'],
-                    day=day,
-                    period_index=i,
-                    start_time=current_time.time(),
-                    end_time=end_time.time(),
-                    is_double_period=slot_data['type'] == 'double'
-                )
-                self.db.add(slot)
+                rows.append({
+                    "id": uuid4(),
+                    "version_id": version_id,
+                    "class_id": cls.id,
+                    "section_id": section.id if section else None,
+                    "subject_id": slot_data['subject_id'],
+                    "teacher_id": slot_data['teacher_id'],
+                    "room_id": slot_data['room_id'],
+                    "day": day,
+                    "period_index": i,
+                    "start_time": current_time.time(),
+                    "end_time": end_time.time(),
+                    "is_manual": slot_data.get('is_manual', False),
+                    "is_locked": slot_data.get('is_locked', False),
+                    "is_double_period": slot_data['type'] == 'double',
+                })
+        return rows
+
+    def _insert_slots(self, rows: List[Dict[str, Any]]):
+        """
+        Write slot rows with one Core executemany INSERT (batched into multi-row VALUES by
+        the driver) instead of one ORM object per cell; nothing enters the identity map.
+        """
+        if rows:
+            self.db.execute(TimetableSlot.__table__.insert(), rows)
+
+
+def _apportion(total: int, weights: List[int]) -> List[int]:
+    """Split ``total`` into integer shares proportional to ``weights``, at least one each (largest remainder)."""
+    if not weights:
+        return []
+    counts = [1] * len(weights)
+    remaining = total - len(weights)
+    weight_sum = sum(weights) or 1
+    quotas = [remaining * w / weight_sum for w in weights]
+    for i, q in enumerate(quotas):
+        counts[i] += int(q)
+    leftover = total - sum(counts)
+    by_remainder = sorted(range(len(weights)), key=lambda i: quotas[i] - int(quotas[i]), reverse=True)
+    for i in by_remainder[:leftover]:
+        counts[i] += 1
+    return counts
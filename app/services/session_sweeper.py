@@ -0,0 +1,70 @@
+import threading
+import traceback
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.auth import UserSession
+
+
+def sweep_expired_sessions(batch_size: int) -> int:
+    """
+    Delete expired refresh sessions ``batch_size`` rows at a time, committing each batch
+    so no single transaction holds many row locks. Returns the number of rows deleted.
+    """
+    deleted = 0
+    db = SessionLocal()
+    try:
+        while True:
+            expired_ids = (
+                select(UserSession.id)
+                .where(UserSession.expires_at <= datetime.utcnow())
+                .limit(batch_size)
+            )
+            result = db.execute(
+                delete(UserSession)
+                .where(UserSession.id.in_(expired_ids))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
+    finally:
+        db.close()
+
+
+class SessionSweeper:
+    """Daemon thread that runs ``sweep_expired_sessions`` every ``interval`` seconds."""
+
+    def __init__(self, interval: int, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                deleted = sweep_expired_sessions(self.batch_size)
+                if deleted:
+                    print(f"[SESSIONS] Swept {deleted} expired refresh sessions")
+            except Exception:
+                # Keep sweeping on the next tick; a failed batch is retried then
+                traceback.print_exc()
+
+
+session_sweeper = SessionSweeper(
+    settings.AUTH_SESSION_SWEEP_INTERVAL_SECONDS or 0, settings.AUTH_SESSION_SWEEP_BATCH_SIZE
+)
@@ -0,0 +1,145 @@
+import threading
+from time import monotonic
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.lms import Subject
+from app.models.users import EnrolledEmployee
+
+
+# Pre-alias map for common variations
+ALIAS_MAP = {
+    "math": "mathematics",
+    "stat": "statistics",
+    "bio": "biology",
+    "chem": "chemistry",
+    "phy": "physics",
+    "cs": "computer science",
+    "it": "information technology",
+    "eng": "english",
+    "isl": "islamiat",
+}
+
+
+def normalize_tokens(text: Optional[str]) -> Set[str]:
+    if not text:
+        return set()
+    # Remove punctuation and split into words
+    words = "".join(c if c.isalnum() else " " for c in text.lower()).split()
+    # Apply aliases
+    return {ALIAS_MAP.get(w, w) for w in words}
+
+
+class TeacherSubjectIndex:
+    """
+    Inverted index from normalized name tokens to subject ids, and the specialist teachers
+    of every subject. A teacher specializes in a subject when any token of their
+    ``subject`` field is a token of the subject name, so matching one teacher costs one
+    dict lookup per token instead of a pass over every subject.
+
+    Holds plain ids and names only, so one instance can be shared between sessions.
+    """
+
+    def __init__(self, subjects: Iterable[Tuple[UUID, str]], teachers: Iterable[Tuple[UUID, Optional[str]]]):
+        self.subject_names: Dict[UUID, str] = {}
+        self.token_subjects: Dict[str, Set[UUID]] = {}
+        for subject_id, name in subjects:
+            self.subject_names[subject_id] = name
+            for token in normalize_tokens(name):
+                self.token_subjects.setdefault(token, set()).add(subject_id)
+
+        # subject_id -> specialist teacher ids, in the order teachers were given
+        self.subject_teachers: Dict[UUID, List[UUID]] = {}
+        for teacher_id, specialization in teachers:
+            for subject_id in self.match(specialization):
+                self.subject_teachers.setdefault(subject_id, []).append(teacher_id)
+        self.built_at = monotonic()
+
+    def match(self, specialization: Optional[str]) -> Set[UUID]:
+        """Subject ids matching a free-text specialization such as ``"Math; Physics"``."""
+        matched: Set[UUID] = set()
+        if not specialization:
+            return matched
+        for token in normalize_tokens(specialization.replace(";", ",")):
+            matched |= self.token_subjects.get(token, set())
+        return matched
+
+    def teachers_for(self, subject_id: UUID) -> List[UUID]:
+        return self.subject_teachers.get(subject_id, [])
+
+
+_indexes: Dict[UUID, TeacherSubjectIndex] = {}
+_lock = threading.Lock()
+
+
+def get_teacher_subject_index(db: Session, academic_year_id: UUID) -> TeacherSubjectIndex:
+    """
+    Index for an academic year, built on first use and cached in-process. Subject and
+    specialization changes committed through the ORM drop the cache (see the session
+    hooks below); ``TEACHER_SUBJECT_INDEX_TTL_SECONDS`` bounds staleness for changes made
+    elsewhere, e.g. by another worker process.
+    """
+    with _lock:
+        index = _indexes.get(academic_year_id)
+    ttl = settings.TEACHER_SUBJECT_INDEX_TTL_SECONDS
+    if index is not None and (not ttl or monotonic() - index.built_at < ttl):
+        return index
+
+    # Subjects and employees are not tied to an academic year yet; the key keeps
+    # per-year indexes apart once they are
+    index = TeacherSubjectIndex(
+        db.query(Subject.id, Subject.name).all(),
+        db.query(EnrolledEmployee.id, EnrolledEmployee.subject)
+        .filter(EnrolledEmployee.is_active == True, EnrolledEmployee.subject.isnot(None))
+        .all(),
+    )
+    with _lock:
+        _indexes[academic_year_id] = index
+    return index
+
+
+def invalidate_teacher_subject_index():
+    with _lock:
+        _indexes.clear()
+
+
+# --- Invalidation on commit ---
+
+_WATCHED_EMPLOYEE_FIELDS = ("subject", "is_active")
+
+
+def _touches_index(obj, is_new_or_deleted: bool) -> bool:
+    if isinstance(obj, Subject):
+        return is_new_or_deleted or inspect(obj).attrs.name.history.has_changes()
+    if isinstance(obj, EnrolledEmployee):
+        state = inspect(obj)
+        return is_new_or_deleted or any(
+            state.attrs[field].history.has_changes() for field in _WATCHED_EMPLOYEE_FIELDS
+        )
+    return False
+
+
+@event.listens_for(Session, "before_flush")
+def _mark_index_changes(session, flush_context, instances):
+    if session.info.get("teacher_subject_index_dirty"):
+        return
+    if any(_touches_index(obj, True) for obj in list(session.new) + list(session.deleted)) or any(
+        _touches_index(obj, False) for obj in session.dirty
+    ):
+        session.info["teacher_subject_index_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_index_after_commit(session):
+    # Only after commit: a rebuild between flush and commit would cache the old rows
+    if session.info.pop("teacher_subject_index_dirty", False):
+        invalidate_teacher_subject_index()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_index_changes(session):
+    session.info.pop("teacher_subject_index_dirty", None)
@@ -0,0 +1,315 @@
+import math
+import random
+import time
+from typing import List, Dict, Any, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from app.services.timetable_solver import TimetableSolver
+
+
+def count_gaps(day_bits: int, break_bits: int = 0) -> int:
+    """Idle periods between the first and last busy period of one day's bits, breaks excluded."""
+    if not day_bits:
+        return 0
+    first = (day_bits & -day_bits).bit_length() - 1
+    span = ((1 << day_bits.bit_length()) - 1) & ~((1 << first) - 1)
+    return bin(span & ~day_bits & ~break_bits).count("1")
+
+
+class TimetableOptimizer:
+    """
+    Simulated annealing over a solved timetable, for the soft objectives the solver ignores.
+
+    Works directly on the solver state the sections were placed in, so every move is
+    checked with ``legal_starts`` and hard constraints (clashes, availability, load caps,
+    rooms) keep holding. Moves are relocating one period within its section and swapping
+    two periods of the same width in a section.
+
+    Penalties (lower is better), each multiplied by ``weights``:
+    - ``morning``: core / difficult subjects taught from ``morning_periods`` on, per cell,
+      weighted by ``difficulty - 1`` plus 2 for core subjects.
+    - ``spread``: a subject taught more than once a day in a section, per extra lesson.
+    - ``teacher_gaps``: idle periods between a teacher's first and last period of a day,
+      not counting breaks.
+
+    A move only changes the terms of the days it touches, so its score delta is computed
+    from those terms alone.
+    """
+
+    WEIGHTS = {"morning": 1, "spread": 3, "teacher_gaps": 2}
+
+    def __init__(
+        self,
+        solver: TimetableSolver,
+        sections: Sequence[Tuple[List[Tuple], int]],
+        morning_periods: int,
+        break_mask: int = 0,
+        weights: Optional[Dict[str, int]] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        ``sections`` are ``(placements, blocked_cells)`` pairs, placements being the
+        ``(item, start, rooms)`` tuples the solver returned and already committed.
+        """
+        self.solver = solver
+        self.morning_periods = morning_periods
+        self.weights = {**self.WEIGHTS, **(weights or {})}
+        self.rng = random.Random(seed)
+
+        ppd = solver.periods_per_day
+        self.day_break_mask = break_mask & ((1 << ppd) - 1)
+
+        self.placements: List[List[Tuple]] = [list(placements) for placements, _ in sections]
+        self.section_busy: List[int] = []
+        # (section index, subject id) -> lessons per day
+        self.day_lessons: Dict[Tuple[int, UUID], List[int]] = {}
+        for s, (placements, blocked) in enumerate(sections):
+            busy = blocked
+            for item, start, rooms in placements:
+                busy |= ((1 << len(rooms)) - 1) << start
+                self._lessons(s, item)[start // ppd] += 1
+            self.section_busy.append(busy)
+
+        self.teachers: Set[UUID] = {
+            item["teacher_id"] for placements in self.placements for item, _, _ in placements
+        }
+        self.movable = [(s, k) for s, placements in enumerate(self.placements) for k in range(len(placements))]
+
+    # --- Scoring ---
+
+    def _lessons(self, s: int, item: Dict[str, Any]) -> List[int]:
+        key = (s, item["subject_id"])
+        if key not in self.day_lessons:
+            self.day_lessons[key] = [0] * len(self.solver.working_days)
+        return self.day_lessons[key]
+
+    def _morning(self, item: Dict[str, Any], start: int, width: int) -> int:
+        weight = max(0, (item.get("difficulty") or 1) - 1) + (2 if item.get("is_core") else 0)
+        if not weight:
+            return 0
+        period = start % self.solver.periods_per_day
+        late = sum(1 for p in range(period, period + width) if p >= self.morning_periods)
+        return weight * late
+
+    def _teacher_gaps(self, teacher_id: UUID, day: int) -> int:
+        ppd = self.solver.periods_per_day
+        bits = (self.solver.teacher_busy.get(teacher_id, 0) >> (day * ppd)) & ((1 << ppd) - 1)
+        return count_gaps(bits, self.day_break_mask)
+
+    def _keys(self, s: int, moves: Sequence[Tuple[Dict[str, Any], int]]) -> Tuple[Set, Set]:
+        """Spread and teacher-gap terms touched by putting items at (or taking them from) starts."""
+        ppd = self.solver.periods_per_day
+        spread, gaps = set(), set()
+        for item, start in moves:
+            day = start // ppd
+            spread.add((s, item["subject_id"], day))
+            gaps.add((item["teacher_id"], day))
+        return spread, gaps
+
+    def _cost(self, spread: Set, gaps: Set) -> int:
+        cost = 0
+        for s, subject_id, day in spread:
+            lessons = self.day_lessons.get((s, subject_id))
+            if lessons and lessons[day] > 1:
+                cost += self.weights["spread"] * (lessons[day] - 1)
+        for teacher_id, day in gaps:
+            cost += self.weights["teacher_gaps"] * self._teacher_gaps(teacher_id, day)
+        return cost
+
+    def breakdown(self) -> Dict[str, int]:
+        """Weighted penalty per objective for the current state."""
+        morning = sum(
+            self._morning(item, start, len(rooms))
+            for placements in self.placements for item, start, rooms in placements
+        )
+        spread = sum(max(0, n - 1) for lessons in self.day_lessons.values() for n in lessons)
+        gaps = sum(
+            self._teacher_gaps(teacher_id, day)
+            for teacher_id in self.teachers for day in range(len(self.solver.working_days))
+        )
+        return {
+            "morning": self.weights["morning"] * morning,
+            "spread": self.weights["spread"] * spread,
+            "teacher_gaps": self.weights["teacher_gaps"] * gaps,
+        }
+
+    def score(self) -> int:
+        return sum(self.breakdown().values())
+
+    # --- Moves ---
+
+    def _set(self, s: int, k: int, start: int, rooms: Tuple):
+        """
+        Record placement k of section s at a new start (solver state already updated).
+        Section occupancy is left to the caller: during a swap the old cells of one
+        placement are the new cells of the other.
+        """
+        ppd = self.solver.periods_per_day
+        item, old_start, _ = self.placements[s][k]
+        lessons = self._lessons(s, item)
+        lessons[old_start // ppd] -= 1
+        lessons[start // ppd] += 1
+        self.placements[s][k] = (item, start, rooms)
+
+    def _cells(self, s: int, ks: Sequence[int]) -> int:
+        cells = 0
+        for k in ks:
+            _, start, rooms = self.placements[s][k]
+            cells |= ((1 << len(rooms)) - 1) << start
+        return cells
+
+    def _random_start(self, starts: int) -> int:
+        cells = []
+        while starts:
+            low = starts & -starts
+            starts ^= low
+            cells.append(low.bit_length() - 1)
+        return self.rng.choice(cells)
+
+    def _relocate(self, s: int, k: int) -> Optional[Tuple[int, List[Tuple]]]:
+        """Move one period to another legal start. Returns (delta, undo) or None."""
+        solver = self.solver
+        item, start, rooms = self.placements[s][k]
+        width = len(rooms)
+        free = self.section_busy[s] & ~(((1 << width) - 1) << start)
+
+        solver.remove(item, start, rooms)
+        starts = solver.legal_starts(item, free) & ~(1 << start)
+        solver.occupy(item, start, rooms)
+        if not starts:
+            return None
+        new_start = self._random_start(starts)
+
+        spread, gaps = self._keys(s, [(item, start), (item, new_start)])
+        before = self._cost(spread, gaps) + self.weights["morning"] * self._morning(item, start, width)
+        solver.remove(item, start, rooms)
+        self._set(s, k, new_start, solver.place(item, new_start))
+        self.section_busy[s] = (self.section_busy[s] & ~(((1 << width) - 1) << start)) | self._cells(s, [k])
+        after = self._cost(spread, gaps) + self.weights["morning"] * self._morning(item, new_start, width)
+        return after - before, [(s, k, start, rooms)]
+
+    def _swap(self, s: int, k1: int, k2: int) -> Optional[Tuple[int, List[Tuple]]]:
+        """Exchange the starts of two periods of the same width. Returns (delta, undo) or None."""
+        solver = self.solver
+        item1, start1, rooms1 = self.placements[s][k1]
+        item2, start2, rooms2 = self.placements[s][k2]
+        width = len(rooms1)
+        if width != len(rooms2) or start1 == start2 or item1["subject_id"] == item2["subject_id"]:
+            return None
+
+        moves = [(item1, start1), (item1, start2), (item2, start1), (item2, start2)]
+        spread, gaps = self._keys(s, moves)
+        before = (
+            self._cost(spread, gaps)
+            + self.weights["morning"] * (self._morning(item1, start1, width) + self._morning(item2, start2, width))
+        )
+
+        cells = (1 << width) - 1
+        free = self.section_busy[s] & ~(cells << start1) & ~(cells << start2)
+        solver.remove(item1, start1, rooms1)
+        solver.remove(item2, start2, rooms2)
+        new_rooms1 = None
+        if solver.legal_starts(item1, free) >> start2 & 1:
+            new_rooms1 = solver.place(item1, start2)
+            if solver.legal_starts(item2, free | (cells << start2)) >> start1 & 1:
+                self._set(s, k1, start2, new_rooms1)
+                self._set(s, k2, start1, solver.place(item2, start1))
+                after = (
+                    self._cost(spread, gaps)
+                    + self.weights["morning"] * (self._morning(item1, start2, width) + self._morning(item2, start1, width))
+                )
+                return after - before, [(s, k1, start1, rooms1), (s, k2, start2, rooms2)]
+            solver.remove(item1, start2, new_rooms1)
+        solver.occupy(item1, start1, rooms1)
+        solver.occupy(item2, start2, rooms2)
+        return None
+
+    def _undo(self, undo: List[Tuple]):
+        s = undo[0][0]
+        ks = [k for _, k, _, _ in undo]
+        moved_cells = self._cells(s, ks)
+        for _, k, _, _ in undo:
+            item, start, rooms = self.placements[s][k]
+            self.solver.remove(item, start, rooms)
+        for _, k, start, rooms in undo:
+            item = self.placements[s][k][0]
+            self.solver.occupy(item, start, rooms)
+            self._set(s, k, start, rooms)
+        self.section_busy[s] = (self.section_busy[s] & ~moved_cells) | self._cells(s, ks)
+
+    def _restore(self, best: List[List[Tuple]]):
+        for s, placements in enumerate(self.placements):
+            for k, (item, start, rooms) in enumerate(placements):
+                self.solver.remove(item, start, rooms)
+        for s, placements in enumerate(best):
+            moved_cells = self._cells(s, range(len(placements)))
+            for k, (item, start, rooms) in enumerate(placements):
+                self.solver.occupy(item, start, rooms)
+                self._set(s, k, start, rooms)
+            self.section_busy[s] = (self.section_busy[s] & ~moved_cells) | self._cells(s, range(len(placements)))
+
+    # --- Annealing ---
+
+    def optimize(
+        self,
+        max_seconds: float,
+        max_iterations: Optional[int] = None,
+        start_temperature: float = 2.0,
+        end_temperature: float = 0.05,
+    ) -> Dict[str, Any]:
+        """
+        Anneal for ``max_seconds`` (or ``max_iterations`` moves), cooling geometrically
+        with elapsed time, and leave the best state found committed in the solver.
+        Returns the scores before and after plus move statistics.
+        """
+        started = time.monotonic()
+        initial = self.breakdown()
+        current = best_score = sum(initial.values())
+        best = [list(placements) for placements in self.placements]
+        iterations = accepted = 0
+        temperature = start_temperature
+        cooling = math.log(end_temperature / start_temperature)
+
+        while self.movable and best_score > 0:
+            if max_iterations is not None and iterations >= max_iterations:
+                break
+            # Clock reads and stop hooks are comparatively slow; check every 256 moves
+            if not iterations & 0xFF:
+                elapsed = time.monotonic() - started
+                if elapsed >= max_seconds:
+                    break
+                if self.solver.should_stop is not None and self.solver.should_stop():
+                    break
+                temperature = start_temperature * math.exp(cooling * elapsed / max_seconds)
+            iterations += 1
+
+            s, k = self.rng.choice(self.movable)
+            if self.rng.random() < 0.5 and len(self.placements[s]) > 1:
+                outcome = self._swap(s, k, self.rng.randrange(len(self.placements[s])))
+            else:
+                outcome = self._relocate(s, k)
+            if outcome is None:
+                continue
+
+            delta, undo = outcome
+            if delta <= 0 or self.rng.random() < math.exp(-delta / temperature):
+                accepted += 1
+                current += delta
+                if current < best_score:
+                    best_score = current
+                    best = [list(placements) for placements in self.placements]
+            else:
+                self._undo(undo)
+
+        if current > best_score:
+            self._restore(best)
+        final = self.breakdown()
+        return {
+            "initial_score": sum(initial.values()),
+            "final_score": sum(final.values()),
+            "initial_breakdown": initial,
+            "final_breakdown": final,
+            "iterations": iterations,
+            "accepted_moves": accepted,
+            "seconds": round(time.monotonic() - started, 3),
+        }
@@ -0,0 +1,614 @@
+import multiprocessing
+import random
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, List, Dict, Any, Callable, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+
+class _BudgetExceeded(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class SolveResult:
+    """
+    Outcome of TimetableSolver.solve for one section.
+    ``placements`` are ``(item, start_cell, rooms)`` tuples, ``unplaced`` are ``(item, reason)``.
+    """
+
+    def __init__(self, placements: List[Tuple], unplaced: List[Tuple], reason: Optional[str] = None):
+        self.placements = placements
+        self.unplaced = unplaced
+        self.reason = reason
+
+    @property
+    def complete(self) -> bool:
+        return not self.unplaced
+
+
+class TimetableSolver:
+    """
+    Bitset constraint core used by the SchedulingEngine.
+
+    Every (day, period) cell of the week is one bit: ``day_index * periods_per_day + period``.
+    Teacher occupancy, teacher unavailability and section occupancy are plain ints, so
+    clash checks are single AND operations. Room occupancy is a per-cell mask over room
+    indices (same order as the ``rooms`` argument), plus two cell masks recording where
+    every room / every lab is already taken.
+
+    The solver holds no database state; the engine feeds it plain ids and dicts, so the
+    same instance can be snapshotted, copied or shipped to another process.
+    """
+
+    def __init__(
+        self,
+        working_days: Sequence[str],
+        periods_per_day: int,
+        rooms: Sequence[Tuple[UUID, bool]],
+        teacher_constraints: Optional[Dict[UUID, Dict[str, Any]]] = None,
+        max_periods_per_day: Optional[int] = None,
+        max_periods_per_week: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        self.working_days = list(working_days)
+        self.periods_per_day = periods_per_day
+        self.num_cells = len(self.working_days) * periods_per_day
+        self.full_mask = (1 << self.num_cells) - 1
+        self.rng = random.Random(seed)
+
+        # Cell masks for each day, and the cells a double period may start from
+        self.day_masks = [
+            ((1 << periods_per_day) - 1) << (d * periods_per_day)
+            for d in range(len(self.working_days))
+        ]
+        last_periods = 0
+        for d in range(len(self.working_days)):
+            last_periods |= 1 << (d * periods_per_day + periods_per_day - 1)
+        self.double_start_mask = self.full_mask & ~last_periods
+
+        # Rooms: bit i of a room mask is rooms[i]
+        self.room_ids = [room_id for room_id, _ in rooms]
+        self.room_index = {room_id: i for i, room_id in enumerate(self.room_ids)}
+        self.all_rooms_mask = (1 << len(self.room_ids)) - 1
+        self.lab_rooms_mask = 0
+        for i, (_, is_lab) in enumerate(rooms):
+            if is_lab:
+                self.lab_rooms_mask |= 1 << i
+        self.non_lab_rooms_mask = self.all_rooms_mask & ~self.lab_rooms_mask
+        self.room_busy = [0] * self.num_cells
+        # Cells where no room / no lab room is left. With no labs at all, lab items never fit.
+        self.rooms_full = 0
+        self.labs_full = self.full_mask if self.lab_rooms_mask == 0 else 0
+
+        # Teacher state, created lazily since auto-assigned teachers are not known upfront
+        self.default_max_day = max_periods_per_day
+        self.default_max_week = max_periods_per_week
+        self.teacher_constraints = teacher_constraints or {}
+        self.teacher_busy: Dict[UUID, int] = {}
+        self.teacher_blocked: Dict[UUID, int] = {}
+        self.teacher_limits: Dict[UUID, Tuple[Optional[int], Optional[int]]] = {}
+        self.teacher_day_load: Dict[UUID, List[int]] = {}
+        self.teacher_week_load: Dict[UUID, int] = {}
+
+        self.nodes = 0
+        self._node_limit: Optional[int] = None
+        self._deadline: Optional[float] = None
+        # Polled during search; returning True abandons it (keeping the best partial result)
+        self.should_stop: Optional[Callable[[], bool]] = None
+        self._best: List[Tuple] = []
+
+    # --- Cell helpers ---
+
+    def cell(self, day: str, period_index: int) -> int:
+        return self.working_days.index(day) * self.periods_per_day + period_index
+
+    def cell_position(self, cell: int) -> Tuple[str, int]:
+        day_idx, period_index = divmod(cell, self.periods_per_day)
+        return self.working_days[day_idx], period_index
+
+    def periods_mask(self, period_indices: Sequence[int]) -> int:
+        """Mask of the given period indices on every working day (used for breaks)."""
+        mask = 0
+        for p in period_indices:
+            if p is None or not 0 <= p < self.periods_per_day:
+                continue
+            for d in range(len(self.working_days)):
+                mask |= 1 << (d * self.periods_per_day + p)
+        return mask
+
+    # --- Teacher state ---
+
+    def _init_teacher(self, teacher_id: UUID):
+        constraint = self.teacher_constraints.get(teacher_id) or {}
+        blocked = 0
+        for slot in constraint.get("unavailable_slots") or []:
+            day, p = slot.get("day"), slot.get("period_index")
+            if day in self.working_days and isinstance(p, int) and 0 <= p < self.periods_per_day:
+                blocked |= 1 << self.cell(day, p)
+        self.teacher_blocked[teacher_id] = blocked
+        self.teacher_limits[teacher_id] = (
+            constraint.get("max_periods_per_day") or self.default_max_day,
+            constraint.get("max_periods_per_week") or self.default_max_week,
+        )
+        self.teacher_busy[teacher_id] = 0
+        self.teacher_day_load[teacher_id] = [0] * len(self.working_days)
+        self.teacher_week_load[teacher_id] = 0
+
+    def week_load(self, teacher_id: UUID) -> int:
+        return self.teacher_week_load.get(teacher_id, 0)
+
+    def _teacher_open_cells(self, teacher_id: UUID, width: int) -> int:
+        """Cells where the teacher is free, available and still under the load caps."""
+        if teacher_id not in self.teacher_busy:
+            self._init_teacher(teacher_id)
+        max_day, max_week = self.teacher_limits[teacher_id]
+        if max_week and self.teacher_week_load[teacher_id] + width > max_week:
+            return 0
+        open_cells = self.full_mask & ~(self.teacher_busy[teacher_id] | self.teacher_blocked[teacher_id])
+        if max_day:
+            day_load = self.teacher_day_load[teacher_id]
+            for d, load in enumerate(day_load):
+                if load + width > max_day:
+                    open_cells &= ~self.day_masks[d]
+        return open_cells
+
+    # --- Domains ---
+
+    def legal_starts(self, item: Dict[str, Any], section_busy: int) -> int:
+        """Mask of cells where ``item`` may start, given the section's occupied cells."""
+        width = 2 if item["type"] == "double" else 1
+        cells = self._teacher_open_cells(item["teacher_id"], width) & ~section_busy
+        if self.room_ids:
+            cells &= ~(self.labs_full if item.get("is_lab") else self.rooms_full)
+        if width == 2:
+            cells &= (cells >> 1) & self.double_start_mask
+        return cells
+
+    def _pick_room(self, item: Dict[str, Any], cell: int) -> Optional[int]:
+        free = self.all_rooms_mask & ~self.room_busy[cell]
+        if item.get("is_lab"):
+            candidates = free & self.lab_rooms_mask
+        else:
+            # Prefer non-lab rooms for normal subjects
+            candidates = (free & self.non_lab_rooms_mask) or free
+        if not candidates:
+            return None
+        return (candidates & -candidates).bit_length() - 1
+
+    # --- Assignment ---
+
+    def place(self, item: Dict[str, Any], start: int) -> Tuple[Optional[UUID], ...]:
+        """Commit ``item`` at ``start``. Returns the room id used for each covered cell."""
+        width = 2 if item["type"] == "double" else 1
+        rooms = []
+        for cell in range(start, start + width):
+            room_idx = self._pick_room(item, cell) if self.room_ids else None
+            rooms.append(self.room_ids[room_idx] if room_idx is not None else None)
+        self.occupy(item, start, rooms)
+        return tuple(rooms)
+
+    def occupy(self, item: Dict[str, Any], start: int, rooms: Sequence[Optional[UUID]]):
+        """
+        Commit ``item`` at ``start`` in the given rooms (one per covered cell), e.g. a
+        placement made by another solver. Rooms this solver does not know are ignored.
+        """
+        teacher_id = item["teacher_id"]
+        if teacher_id not in self.teacher_busy:
+            self._init_teacher(teacher_id)
+        for offset, room_id in enumerate(rooms):
+            cell = start + offset
+            room_idx = self.room_index.get(room_id)
+            if room_idx is not None:
+                busy = self.room_busy[cell] | (1 << room_idx)
+                self.room_busy[cell] = busy
+                if busy == self.all_rooms_mask:
+                    self.rooms_full |= 1 << cell
+                if busy & self.lab_rooms_mask == self.lab_rooms_mask:
+                    self.labs_full |= 1 << cell
+            self.teacher_busy[teacher_id] |= 1 << cell
+        self.teacher_day_load[teacher_id][start // self.periods_per_day] += len(rooms)
+        self.teacher_week_load[teacher_id] += len(rooms)
+
+    def remove(self, item: Dict[str, Any], start: int, rooms: Sequence[Optional[UUID]]):
+        """Undo a previous ``place`` call."""
+        teacher_id = item["teacher_id"]
+        width = len(rooms)
+        for offset, room_id in enumerate(rooms):
+            cell = start + offset
+            self.teacher_busy[teacher_id] &= ~(1 << cell)
+            if room_id in self.room_index:
+                busy = self.room_busy[cell] & ~(1 << self.room_index[room_id])
+                self.room_busy[cell] = busy
+                self.rooms_full &= ~(1 << cell)
+                if self.lab_rooms_mask:
+                    self.labs_full &= ~(1 << cell)
+                    if busy & self.lab_rooms_mask == self.lab_rooms_mask:
+                        self.labs_full |= 1 << cell
+        self.teacher_day_load[teacher_id][start // self.periods_per_day] -= width
+        self.teacher_week_load[teacher_id] -= width
+
+    def snapshot(self) -> Tuple:
+        """Copy of the mutable occupancy state, for ``restore``."""
+        return (
+            dict(self.teacher_busy),
+            {t: list(loads) for t, loads in self.teacher_day_load.items()},
+            dict(self.teacher_week_load),
+            list(self.room_busy),
+            self.rooms_full,
+            self.labs_full,
+        )
+
+    def restore(self, snapshot: Tuple):
+        busy, day_load, week_load, room_busy, rooms_full, labs_full = snapshot
+        self.teacher_busy = dict(busy)
+        self.teacher_day_load = {t: list(loads) for t, loads in day_load.items()}
+        self.teacher_week_load = dict(week_load)
+        self.room_busy = list(room_busy)
+        self.rooms_full = rooms_full
+        self.labs_full = labs_full
+
+    # --- Search ---
+
+    SEARCH_MODES = ("backtrack", "mrv")
+
+    def solve(
+        self,
+        period_pool: List[Dict[str, Any]],
+        section_busy: int = 0,
+        mode: str = "mrv",
+        max_nodes: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ) -> SolveResult:
+        """
+        Place the items of ``period_pool`` into one section.
+
+        The returned placements stay committed in the solver state: every item on success,
+        otherwise the deepest partial assignment the search reached, with the rest listed
+        as unplaced. ``max_nodes`` caps the placements tried by this call and ``deadline``
+        is a ``time.monotonic()`` timestamp.
+
+        Modes:
+        - ``backtrack``: chronological backtracking in pool order.
+        - ``mrv``: forward checking with MRV ordering and conflict-directed backjumping.
+          An "infeasible" result from this mode is a proof that the pool cannot fit.
+        """
+        if mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'")
+
+        # Set aside what can never be placed, so the rest of the section still gets a timetable
+        pool, unplaced = self._trim_teacher_overflow(period_pool, section_busy)
+        for item in pool:
+            if not self.legal_starts(item, section_busy):
+                unplaced.append((item, "no_legal_slot"))
+        if unplaced:
+            set_aside = {id(item) for item, _ in unplaced}
+            pool = [item for item in pool if id(item) not in set_aside]
+
+        snapshot = self.snapshot()
+        placements: List[Tuple] = []
+        self._best = []
+        self._node_limit = self.nodes + max_nodes if max_nodes is not None else None
+        self._deadline = deadline
+        reason = None
+        try:
+            if mode == "mrv":
+                found = self._solve_mrv(pool, section_busy, placements)
+            else:
+                found = self._backtrack(pool, 0, section_busy, placements)
+            if not found:
+                reason = "infeasible" if mode == "mrv" else "search_exhausted"
+        except _BudgetExceeded as e:
+            reason = e.reason
+        finally:
+            self._node_limit = None
+            self._deadline = None
+
+        if reason is None:
+            return SolveResult(placements, unplaced)
+
+        # Back to the pre-search state, then commit the best partial assignment found
+        self.restore(snapshot)
+        best = [(item, start, self.place(item, start)) for item, start, _ in self._best]
+        placed = {id(item) for item, _, _ in best}
+        unplaced += [(item, reason) for item in pool if id(item) not in placed]
+        return SolveResult(best, unplaced, reason)
+
+    def _count_node(self, placements: List[Tuple]):
+        self.nodes += 1
+        if len(placements) > len(self._best):
+            self._best = list(placements)
+        if self._node_limit is not None and self.nodes > self._node_limit:
+            raise _BudgetExceeded("node_budget_exhausted")
+        # Clock reads and stop hooks are comparatively slow; check every 256 nodes
+        if not self.nodes & 0xFF:
+            if self._deadline is not None and time.monotonic() > self._deadline:
+                raise _BudgetExceeded("time_budget_exhausted")
+            if self.should_stop is not None and self.should_stop():
+                raise _BudgetExceeded("cancelled")
+
+    def _ordered_starts(self, starts: int):
+        """Yield start cells day by day (days shuffled for variety), earliest period first."""
+        days = list(range(len(self.working_days)))
+        self.rng.shuffle(days)
+        for d in days:
+            day_starts = starts & self.day_masks[d]
+            while day_starts:
+                low = day_starts & -day_starts
+                day_starts ^= low
+                yield low.bit_length() - 1
+
+    def _backtrack(self, period_pool, pool_index, section_busy, placements) -> bool:
+        if pool_index >= len(period_pool):
+            return True
+
+        item = period_pool[pool_index]
+        width = 2 if item["type"] == "double" else 1
+
+        for start in self._ordered_starts(self.legal_starts(item, section_busy)):
+            rooms = self.place(item, start)
+            occupied = ((1 << width) - 1) << start
+            placements.append((item, start, rooms))
+            self._count_node(placements)
+            if self._backtrack(period_pool, pool_index + 1, section_busy | occupied, placements):
+                return True
+            placements.pop()
+            self.remove(item, start, rooms)
+
+        return False
+
+    def _teacher_capacity(self, teacher_id: UUID, section_busy: int) -> int:
+        """Upper bound on the periods the teacher can still take in this section."""
+        open_cells = self._teacher_open_cells(teacher_id, 1) & ~section_busy
+        max_day, max_week = self.teacher_limits[teacher_id]
+        capacity = 0
+        for d, day_mask in enumerate(self.day_masks):
+            day_capacity = bin(open_cells & day_mask).count("1")
+            if max_day:
+                day_capacity = min(day_capacity, max(0, max_day - self.teacher_day_load[teacher_id][d]))
+            capacity += day_capacity
+        if max_week:
+            capacity = min(capacity, max(0, max_week - self.teacher_week_load[teacher_id]))
+        return capacity
+
+    def _trim_teacher_overflow(self, period_pool, section_busy) -> Tuple[List[Dict[str, Any]], List[Tuple]]:
+        """
+        Counting bound: a teacher needing more periods than their free cells and remaining
+        day/week caps allow cannot be satisfied wherever the items go. Their last items are
+        set aside as unplaced instead of searching every permutation to prove it.
+        """
+        demand: Dict[UUID, int] = {}
+        for item in period_pool:
+            width = 2 if item["type"] == "double" else 1
+            demand[item["teacher_id"]] = demand.get(item["teacher_id"], 0) + width
+
+        excess = {}
+        for teacher_id, needed in demand.items():
+            capacity = self._teacher_capacity(teacher_id, section_busy)
+            if needed > capacity:
+                excess[teacher_id] = needed - capacity
+        if not excess:
+            return list(period_pool), []
+
+        pool, unplaced = [], []
+        for item in reversed(period_pool):
+            teacher_id = item["teacher_id"]
+            if excess.get(teacher_id, 0) > 0:
+                excess[teacher_id] -= 2 if item["type"] == "double" else 1
+                unplaced.append((item, "teacher_capacity"))
+            else:
+                pool.append(item)
+        pool.reverse()
+        unplaced.reverse()
+        return pool, unplaced
+
+    def _solve_mrv(self, period_pool, section_busy, placements) -> bool:
+        """
+        FC-CBJ search. Each step assigns the item with the fewest legal starts left,
+        recomputes the domains of the remaining items, and on a dead end jumps straight
+        back to the deepest assignment that contributed to it.
+        """
+        domains = [self.legal_starts(item, section_busy) for item in period_pool]
+        widths = [2 if item["type"] == "double" else 1 for item in period_pool]
+        # past_fc[i]: search depths whose assignments pruned item i's domain
+        past_fc: List[Set[int]] = [set() for _ in period_pool]
+        unassigned = set(range(len(period_pool)))
+        depth_teachers: List[UUID] = []
+
+        def search(depth: int, busy: int) -> Tuple[bool, Set[int]]:
+            if not unassigned:
+                return True, set()
+
+            # MRV, ties broken by pool order (lab, double, quota)
+            i = min(unassigned, key=lambda k: (bin(domains[k]).count("1"), k))
+            item = period_pool[i]
+            teacher_id = item["teacher_id"]
+            width = widths[i]
+            conflict: Set[int] = set()
+            unassigned.discard(i)
+
+            for start in self._ordered_starts(domains[i]):
+                rooms = self.place(item, start)
+                new_busy = busy | (((1 << width) - 1) << start)
+                placements.append((item, start, rooms))
+                self._count_node(placements)
+                depth_teachers.append(teacher_id)
+
+                # Forward check. Another teacher's items only lose the cells just taken;
+                # the same teacher's items may also lose whole days or the week to the load
+                # caps, which every assignment of that teacher contributes to.
+                saved = []
+                dead_end = None
+                for j in unassigned:
+                    new_domain = self.legal_starts(period_pool[j], new_busy) & domains[j]
+                    if new_domain == domains[j]:
+                        continue
+                    saved.append((j, domains[j], set(past_fc[j])))
+                    domains[j] = new_domain
+                    if period_pool[j]["teacher_id"] == teacher_id:
+                        past_fc[j].update(d for d, t in enumerate(depth_teachers) if t == teacher_id)
+                    else:
+                        past_fc[j].add(depth)
+                    if not new_domain:
+                        dead_end = past_fc[j]
+                        break
+
+                if dead_end is None and unassigned:
+                    # The remaining items must still fit into the cells their domains cover
+                    covered = demand = 0
+                    for j in unassigned:
+                        if widths[j] == 2:
+                            covered |= domains[j] | (domains[j] << 1)
+                        else:
+                            covered |= domains[j]
+                        demand += widths[j]
+                    if bin(covered).count("1") < demand:
+                        dead_end = set().union(*(past_fc[j] for j in unassigned))
+
+                child_conflict = None
+                if dead_end is None:
+                    found, child_conflict = search(depth + 1, new_busy)
+                    if found:
+                        return True, set()
+                else:
+                    conflict |= dead_end - {depth}
+
+                for j, domain, fc in reversed(saved):
+                    domains[j] = domain
+                    past_fc[j] = fc
+                depth_teachers.pop()
+                placements.pop()
+                self.remove(item, start, rooms)
+
+                if child_conflict is not None:
+                    if depth not in child_conflict:
+                        # This assignment played no part in the failure below: jump over it
+                        unassigned.add(i)
+                        return False, child_conflict
+                    conflict |= child_conflict - {depth}
+
+            unassigned.add(i)
+            return False, conflict | past_fc[i]
+
+        found, _ = search(0, section_busy)
+        return found
+
+
+def search_limit(value: Optional[float], default: Optional[float]) -> Optional[float]:
+    """A search budget: ``value`` when given, else ``default``. 0 (from either) means no limit."""
+    value = default if value is None else value
+    return value or None
+
+
+def section_budget(
+    max_nodes_per_section: Optional[int],
+    max_seconds_per_section: Optional[float],
+    nodes_left: Optional[int] = None,
+    run_deadline: Optional[float] = None,
+) -> Tuple[Optional[int], Optional[float]]:
+    """Node limit and monotonic deadline for the next section, capped by what is left of the run."""
+    max_nodes = max_nodes_per_section
+    if nodes_left is not None:
+        max_nodes = nodes_left if max_nodes is None else min(max_nodes, nodes_left)
+    deadline = time.monotonic() + max_seconds_per_section if max_seconds_per_section else None
+    if run_deadline is not None:
+        deadline = run_deadline if deadline is None else min(deadline, run_deadline)
+    return max_nodes, deadline
+
+
+# --- Process pools ---
+
+# Cancellation event shared with the parent; set in pool workers by ``_init_worker``
+_stop_event = None
+
+
+def _init_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def worker_should_stop() -> bool:
+    """True in a pool worker once the parent has called ``stop_worker_pool``."""
+    return _stop_event is not None and _stop_event.is_set()
+
+
+def start_worker_pool(workers: int) -> Tuple[ProcessPoolExecutor, Any]:
+    """
+    Spawn-based process pool whose workers can be told to stop mid-search. Returns the
+    pool and its cancellation event; pass both to ``stop_worker_pool`` to cancel.
+    """
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(stop_event,)
+    )
+    return pool, stop_event
+
+
+def stop_worker_pool(pool: ProcessPoolExecutor, stop_event):
+    """Drop queued work and make running searches give up, without waiting for them."""
+    stop_event.set()
+    # Shut down in the background: the caller returns at once, and the thread keeps the
+    # event alive until every worker (including any still starting up) has exited
+    threading.Thread(
+        target=lambda: (pool.shutdown(cancel_futures=True), stop_event), daemon=True
+    ).start()
+
+
+def completed_unless_stopped(
+    futures: Iterable[Future], should_stop: Optional[Callable[[], bool]], poll_seconds: float = 0.2
+) -> Iterator[Future]:
+    """
+    Yield futures as they complete, like ``as_completed``, but poll ``should_stop`` while
+    waiting and return early once it is True (the caller checks it after the loop).
+    """
+    pending = set(futures)
+    while pending:
+        if should_stop and should_stop():
+            return
+        done, pending = wait(pending, timeout=poll_seconds, return_when=FIRST_COMPLETED)
+        yield from done
+
+
+def solve_sections(
+    solver_kwargs: Dict[str, Any],
+    sections: List[Tuple[List[Dict[str, Any]], int]],
+    mode: str = "mrv",
+    max_nodes_per_section: Optional[int] = None,
+    max_seconds_per_section: Optional[float] = None,
+    max_nodes: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+) -> Tuple[List[Tuple[List[Tuple], List[Tuple]]], int]:
+    """
+    Process-pool entry point: solve ``(period_pool, section_busy)`` sections in order on a
+    fresh TimetableSolver built from ``solver_kwargs``.
+
+    Items do not survive pickling by identity, so results refer to them by pool index:
+    per section ``([(index, start, rooms)], [(index, reason)])``, plus the nodes explored.
+    Once the parent stops the pool, the running search keeps its best partial result
+    and the remaining sections are reported as cancelled.
+    """
+    solver = TimetableSolver(**solver_kwargs)
+    solver.should_stop = worker_should_stop
+    run_deadline = time.monotonic() + max_seconds if max_seconds else None
+    results = []
+    for pool, section_busy in sections:
+        if worker_should_stop():
+            results.append(([], [(i, "cancelled") for i in range(len(pool))]))
+            continue
+        nodes_left = max_nodes - solver.nodes if max_nodes else None
+        node_limit, deadline = section_budget(
+            max_nodes_per_section, max_seconds_per_section, nodes_left, run_deadline
+        )
+        index = {id(item): i for i, item in enumerate(pool)}
+        if (node_limit is not None and node_limit <= 0) or (deadline is not None and time.monotonic() >= deadline):
+            results.append(([], [(i, "run_budget_exhausted") for i in range(len(pool))]))
+            continue
+        result = solver.solve(pool, section_busy, mode=mode, max_nodes=node_limit, deadline=deadline)
+        results.append((
+            [(index[id(item)], start, rooms) for item, start, rooms in result.placements],
+            [(index[id(item)], reason) for item, reason in result.unplaced],
+        ))
+    return results, solver.nodes
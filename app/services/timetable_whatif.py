@@ -0,0 +1,149 @@
+import os
+from typing import Any, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.timetable import TimetableConfig, TimetableSlot, TimetableVersion
+from app.services.background_jobs import Job
+from app.services.scheduling_engine import GenerationCancelled, SchedulingEngine
+from app.services.timetable_solver import (
+    completed_unless_stopped,
+    start_worker_pool,
+    stop_worker_pool,
+    worker_should_stop,
+)
+
+
+def solve_candidate(
+    academic_year_id: UUID,
+    candidate: Dict[str, Any],
+    class_ids: Optional[List[UUID]] = None,
+    max_seconds: Optional[float] = None,
+    optimize: bool = False,
+    optimize_seconds: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Process-pool entry point: solve one candidate configuration on its own session and
+    write nothing. ``candidate`` holds a ``name``, an optional ``search_mode`` and any
+    TimetableConfig fields to override. Gives up early once the parent stops the pool.
+    """
+    overrides = {
+        key: value for key, value in candidate.items()
+        if key in SchedulingEngine.CONFIG_OVERRIDES and value is not None
+    }
+    db = SessionLocal()
+    try:
+        engine = SchedulingEngine(
+            db, academic_year_id, search_mode=candidate.get("search_mode") or "mrv", config_overrides=overrides
+        )
+        engine.solve(
+            class_ids,
+            max_seconds=max_seconds,
+            optimize=optimize,
+            optimize_seconds=optimize_seconds,
+            should_stop=worker_should_stop,
+        )
+        rows = engine.slot_rows(None)
+        return {
+            "name": candidate["name"],
+            "overrides": overrides,
+            "metrics": engine.metrics(),
+            "diff": engine.diff_with_active(rows),
+            "optimization": engine.optimization,
+            "unplaced_periods": engine.unplaced,
+            "rows": rows,
+        }
+    except (ValueError, GenerationCancelled) as e:
+        return {"name": candidate["name"], "overrides": overrides, "error": str(e)}
+    finally:
+        db.rollback()
+        db.close()
+
+
+def run_what_if(
+    job: Job,
+    academic_year_id: UUID,
+    candidates: List[Dict[str, Any]],
+    class_ids: Optional[List[UUID]] = None,
+    max_seconds: Optional[float] = None,
+    optimize: bool = False,
+    optimize_seconds: Optional[float] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Background job target: solve every candidate concurrently in a process pool. Metrics
+    go into the job result; each candidate's slots stay in ``job.artifacts`` so the one
+    picked can be saved with ``persist_candidate`` without solving it again.
+    """
+    workers = min(len(candidates), settings.TIMETABLE_PARALLEL_WORKERS or os.cpu_count() or 1)
+    job.progress = {"completed": 0, "total": len(candidates), "candidates": []}
+    results: Dict[str, Dict[str, Any]] = {}
+
+    pool, stop_event = start_worker_pool(workers)
+    finished = False
+    try:
+        futures = [
+            pool.submit(
+                solve_candidate, academic_year_id, candidate, class_ids, max_seconds, optimize, optimize_seconds
+            )
+            for candidate in candidates
+        ]
+        for future in completed_unless_stopped(futures, job.cancel_requested):
+            outcome = future.result()
+            rows = outcome.pop("rows", None)
+            if rows is not None:
+                job.artifacts[outcome["name"]] = {
+                    "academic_year_id": academic_year_id,
+                    "overrides": outcome["overrides"],
+                    "rows": rows,
+                }
+            results[outcome["name"]] = outcome
+            # Replace rather than mutate: the status endpoint may be serializing the old dict
+            job.progress = {
+                "completed": len(results),
+                "total": len(candidates),
+                "candidates": list(results),
+            }
+        if job.cancel_requested():
+            return None
+        finished = True
+    finally:
+        if finished:
+            pool.shutdown()
+        else:
+            # Cancelled or failed: stop the running workers instead of waiting out their budgets
+            stop_worker_pool(pool, stop_event)
+
+    return {"candidates": [results[candidate["name"]] for candidate in candidates]}
+
+
+def persist_candidate(db: Session, job: Job, name: str, version_name: str) -> TimetableVersion:
+    """
+    Save a solved what-if candidate as a new (inactive) version and apply its configuration
+    overrides to the academic year, so the saved slots match the configuration.
+    """
+    artifact = job.artifacts.get(name)
+    if not artifact:
+        raise ValueError(f"Candidate '{name}' has no solved timetable in this run")
+
+    academic_year_id = artifact["academic_year_id"]
+    if artifact["overrides"]:
+        config = db.query(TimetableConfig).filter(
+            TimetableConfig.academic_year_id == academic_year_id
+        ).first()
+        if not config:
+            raise ValueError("Timetable configuration not found for this academic year")
+        for key, value in artifact["overrides"].items():
+            setattr(config, key, value)
+
+    version = TimetableVersion(name=version_name, academic_year_id=academic_year_id, is_active=False)
+    db.add(version)
+    db.flush()
+    rows = [{**row, "id": uuid4(), "version_id": version.id} for row in artifact["rows"]]
+    if rows:
+        db.execute(TimetableSlot.__table__.insert(), rows)
+    db.commit()
+    db.refresh(version)
+    return version
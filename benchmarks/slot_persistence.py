@@ -0,0 +1,114 @@
+"""
+Benchmark: writing a version's timetable slots one ORM object at a time vs. one bulk INSERT.
+
+    python -m benchmarks.slot_persistence --slots 5000 --repeat 3
+    DATABASE_URL=postgresql://... python -m benchmarks.slot_persistence
+
+Runs against DATABASE_URL (an in-memory SQLite database when unset, with the schema
+created on the fly; a real database must already be migrated). Everything is written
+inside a transaction that is rolled back, so nothing is left behind.
+"""
+import argparse
+import os
+import time
+from datetime import time as dtime
+from uuid import uuid4
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.core.database import Base, SessionLocal, engine
+from app.models.lms import AcademicYear, Class, Section, Subject
+from app.models.timetable import Room, TimetableSlot, TimetableVersion
+from app.models.users import EnrolledEmployee
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+
+def _parents(db):
+    """One row of every table a slot points to."""
+    year = AcademicYear(name="Benchmark", start_year=2000, end_year=2001)
+    db.add(year)
+    db.flush()
+    cls = Class(name="Benchmark", academic_year_id=year.id)
+    subject = Subject(name="Benchmark", code=f"BENCH-{uuid4().hex[:8]}")
+    room = Room(name="Benchmark")
+    teacher = EnrolledEmployee(
+        employee_id=f"BENCH-{uuid4().hex[:8]}", first_name="Bench", last_name="Mark", gender="-",
+        date_of_birth="-", phone="-", email="bench@example.com", cnic="-", employee_type="teaching",
+        functional_role="-", system_role="teacher", highest_qualification="-", experience_years="0",
+    )
+    version = TimetableVersion(name="Benchmark", academic_year_id=year.id)
+    db.add_all([cls, subject, room, teacher, version])
+    db.flush()
+    section = Section(name="A", class_id=cls.id)
+    db.add(section)
+    db.flush()
+    return {
+        "version_id": version.id,
+        "class_id": cls.id,
+        "section_id": section.id,
+        "subject_id": subject.id,
+        "teacher_id": teacher.id,
+        "room_id": room.id,
+    }
+
+
+def _rows(parents, count):
+    return [
+        {
+            **parents,
+            "id": uuid4(),
+            "day": DAYS[i % len(DAYS)],
+            "period_index": i % 8,
+            "start_time": dtime(8),
+            "end_time": dtime(8, 40),
+            "is_manual": False,
+            "is_locked": False,
+            "is_double_period": False,
+        }
+        for i in range(count)
+    ]
+
+
+def orm_objects(db, rows):
+    for row in rows:
+        db.add(TimetableSlot(**row))
+    db.flush()
+
+
+def bulk_insert(db, rows):
+    # Same statement as SchedulingEngine._insert_slots
+    db.execute(TimetableSlot.__table__.insert(), rows)
+
+
+def run(slots: int, repeat: int):
+    if engine.url.get_backend_name() == "sqlite":
+        Base.metadata.create_all(engine)
+
+    results = {}
+    for name, write in (("orm_objects", orm_objects), ("bulk_insert", bulk_insert)):
+        timings = []
+        for _ in range(repeat):
+            db = SessionLocal()
+            try:
+                rows = _rows(_parents(db), slots)
+                started = time.perf_counter()
+                write(db, rows)
+                timings.append(time.perf_counter() - started)
+            finally:
+                db.rollback()
+                db.close()
+        results[name] = min(timings)
+        print(f"{name:12s} {slots} slots: best {min(timings):.3f}s of {repeat}")
+
+    print(f"speedup      {results['orm_objects'] / results['bulk_insert']:.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--slots", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.slots, args.repeat)
@@ -0,0 +1,290 @@
+"""
+Benchmark: SchedulingEngine.generate on synthetic schools.
+
+    python -m benchmarks.timetable_generation                       # every preset, 3 runs each
+    python -m benchmarks.timetable_generation --scenario medium --runs 5 --output results.json
+    python -m benchmarks.timetable_generation --scenario large --parallel --optimize
+
+Each run builds a fresh school (classes, sections, subjects, specialist teachers,
+rooms/labs, teacher constraints, breaks) into its own database, generates a timetable
+and records wall time, nodes explored, peak memory and how much of the school got
+placed. Runs use seeds 0..runs-1, so the same command builds the same schools.
+
+Databases are temporary SQLite files unless --database-url is given; that database
+must be a scratch one, since every table is created and dropped around each run.
+Peak memory comes from tracemalloc, which slows Python down; pass --no-memory for
+timings without that overhead.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, time as dtime
+from typing import Any, Dict, List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.lms import AcademicYear, Class, ClassSubject, Section, Subject
+from app.models.timetable import Room, SubjectConstraint, TeacherConstraint, TimetableConfig
+from app.models.users import EnrolledEmployee
+from app.services.scheduling_engine import SchedulingEngine
+
+SUBJECT_NAMES = [
+    "Mathematics", "Physics", "Chemistry", "Biology", "English", "Urdu", "Islamiat",
+    "Computer Science", "Statistics", "History", "Geography", "Economics",
+]
+# How teachers write their specialization, to exercise alias matching
+SPECIALIZATION_ALIASES = {"Mathematics": "Math", "Chemistry": "Chem", "Computer Science": "CS", "Biology": "Bio"}
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "small": {
+        "classes": 4, "sections": 2, "subjects": 8, "teachers": 14, "rooms": 10, "labs": 2,
+        "days": 5, "periods_per_day": 7, "breaks": [3],
+    },
+    "medium": {
+        "classes": 10, "sections": 4, "subjects": 10, "teachers": 60, "rooms": 45, "labs": 4,
+        "days": 5, "periods_per_day": 8, "breaks": [4],
+    },
+    "large": {
+        "classes": 20, "sections": 5, "subjects": 12, "teachers": 150, "rooms": 110, "labs": 8,
+        "days": 6, "periods_per_day": 8, "breaks": [4],
+    },
+    # Few teachers with tight caps and many unavailable periods
+    "tight": {
+        "classes": 10, "sections": 4, "subjects": 10, "teachers": 40, "rooms": 45, "labs": 4,
+        "days": 5, "periods_per_day": 8, "breaks": [4], "teacher_max_day": 6, "teacher_max_week": 26,
+        "constrained_teachers": 0.5, "unavailable_periods": 6,
+    },
+}
+
+DEFAULTS = {
+    "fill": 0.85,  # share of each section's free periods that subjects require
+    "lab_subjects": 1,  # first N subjects are double-period labs
+    "core_subjects": 2,  # first N subjects are core / difficult
+    "teacher_max_day": 6,
+    "teacher_max_week": 30,
+    "constrained_teachers": 0.2,  # share of teachers with a TeacherConstraint
+    "unavailable_periods": 3,  # per constrained teacher
+}
+
+
+def build_school(db, spec: Dict[str, Any], seed: int):
+    """Fill an empty database with a synthetic school. Returns the academic year id."""
+    spec = {**DEFAULTS, **spec}
+    rng = random.Random(seed)
+    days = DAYS[:spec["days"]]
+    periods_per_day = spec["periods_per_day"]
+
+    year = AcademicYear(name=f"Benchmark {seed}", start_year=2000, end_year=2001, is_current=True)
+    db.add(year)
+    db.flush()
+    db.add(TimetableConfig(
+        academic_year_id=year.id, working_days=days, start_time=dtime(8), end_time=dtime(15),
+        slot_duration=40, periods_per_day=periods_per_day,
+        break_details=[{"after_period": p, "duration": 20} for p in spec["breaks"]],
+        max_periods_per_teacher_day=spec["teacher_max_day"],
+        max_periods_per_teacher_week=spec["teacher_max_week"],
+    ))
+
+    subjects = []
+    for i in range(spec["subjects"]):
+        name = SUBJECT_NAMES[i % len(SUBJECT_NAMES)] + ("" if i < len(SUBJECT_NAMES) else f" {i}")
+        subjects.append(Subject(name=name, code=f"SUB-{i}"))
+    db.add_all(subjects)
+
+    teachers = []
+    for i in range(spec["teachers"]):
+        subject = subjects[i % len(subjects)].name
+        specialization = SPECIALIZATION_ALIASES.get(subject, subject) if rng.random() < 0.5 else subject
+        if rng.random() < 0.2:
+            specialization += "; " + rng.choice(subjects).name
+        teachers.append(EnrolledEmployee(
+            employee_id=f"EMP-{i:04d}", first_name="Teacher", last_name=str(i), gender="-",
+            date_of_birth="-", phone="-", email=f"teacher{i}@example.com", cnic=str(i),
+            employee_type="teaching", functional_role="teacher", system_role="teacher",
+            subject=specialization, highest_qualification="-", experience_years="1",
+        ))
+    db.add_all(teachers)
+    db.add_all(
+        Room(name=f"Room {i}", is_lab=i < spec["labs"], is_active=True) for i in range(spec["rooms"])
+    )
+    db.flush()
+
+    for teacher in rng.sample(teachers, int(len(teachers) * spec["constrained_teachers"])):
+        cells = rng.sample(
+            [(d, p) for d in days for p in range(periods_per_day) if p not in spec["breaks"]],
+            spec["unavailable_periods"],
+        )
+        db.add(TeacherConstraint(
+            teacher_id=teacher.id, academic_year_id=year.id,
+            max_periods_per_day=spec["teacher_max_day"] - 1,
+            unavailable_slots=[{"day": d, "period_index": p} for d, p in cells],
+        ))
+
+    # Spread the required periods over the subjects, largest quotas first
+    free = len(days) * (periods_per_day - len(spec["breaks"]))
+    required = int(free * spec["fill"])
+    quotas = [required // len(subjects) + (1 if i < required % len(subjects) else 0) for i in range(len(subjects))]
+
+    for c in range(spec["classes"]):
+        cls = Class(name=f"Class {c + 1}", code=f"CLS-{c + 1}", academic_year_id=year.id)
+        db.add(cls)
+        db.flush()
+        db.add_all(Section(name=chr(65 + s), class_id=cls.id) for s in range(spec["sections"]))
+        for i, subject in enumerate(subjects):
+            cs = ClassSubject(class_id=cls.id, subject_id=subject.id, academic_year_id=year.id, periods_per_week=quotas[i])
+            db.add(cs)
+            db.flush()
+            is_lab = i < spec["lab_subjects"]
+            is_core = i < spec["core_subjects"]
+            if is_lab or is_core:
+                db.add(SubjectConstraint(
+                    class_subject_id=cs.id, is_lab=is_lab, requires_double_period=is_lab,
+                    is_core=is_core, difficulty_level=3 if is_core else 1,
+                ))
+    db.commit()
+    return year.id
+
+
+def run_once(spec: Dict[str, Any], seed: int, database_url: Optional[str], options: Dict[str, Any], memory: bool) -> Dict[str, Any]:
+    temp_path = None
+    if not database_url:
+        handle, temp_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{temp_path}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        academic_year_id = build_school(db, spec, seed)
+        sections = spec["classes"] * spec["sections"]
+
+        if memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        # The engine logs every decision; keep the benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler = SchedulingEngine(db, academic_year_id, search_mode=options["search_mode"])
+            version = scheduler.generate(
+                f"Benchmark {seed}",
+                parallel=options["parallel"],
+                optimize=options["optimize"],
+                optimize_seconds=options["optimize_seconds"],
+            )
+        wall = time.perf_counter() - started
+        peak = None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        placed = sum(len(rooms) for _, placements in scheduler.solved_sections for _, _, rooms in placements)
+        unplaced = sum(2 if u["type"] == "double" else 1 for u in scheduler.unplaced)
+        return {
+            "seed": seed,
+            "wall_seconds": round(wall, 3),
+            "nodes_explored": scheduler.solver.nodes,
+            "peak_memory_mb": round(peak / 2**20, 1) if peak is not None else None,
+            "sections": sections,
+            "periods_placed": placed,
+            "periods_unplaced": unplaced,
+            "placement_rate": round(placed / (placed + unplaced), 4) if placed + unplaced else 1.0,
+            "complete": version is not None and not scheduler.unplaced,
+            "optimization": scheduler.optimization,
+        }
+    finally:
+        db.close()
+        if temp_path:
+            engine.dispose()
+            os.remove(temp_path)
+        else:
+            Base.metadata.drop_all(engine)
+            engine.dispose()
+
+
+def run_scenario(name: str, spec: Dict[str, Any], runs: int, database_url: Optional[str], options: Dict[str, Any], memory: bool) -> Dict[str, Any]:
+    results = [run_once(spec, seed, database_url, options, memory) for seed in range(runs)]
+    walls = [r["wall_seconds"] for r in results]
+    summary = {
+        "scenario": name,
+        "spec": {**DEFAULTS, **spec},
+        "runs": results,
+        "wall_seconds_median": round(statistics.median(walls), 3),
+        "wall_seconds_max": max(walls),
+        "nodes_explored_median": statistics.median(r["nodes_explored"] for r in results),
+        "peak_memory_mb_max": max((r["peak_memory_mb"] or 0) for r in results) if memory else None,
+        "placement_rate_mean": round(statistics.mean(r["placement_rate"] for r in results), 4),
+        "success_rate": round(sum(r["complete"] for r in results) / len(results), 4),
+    }
+    print(
+        f"{name:8s} median {summary['wall_seconds_median']:.3f}s  nodes {summary['nodes_explored_median']:.0f}  "
+        f"placed {summary['placement_rate_mean']:.2%}  complete {summary['success_rate']:.0%}",
+        file=sys.stderr,
+    )
+    return summary
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="repeatable; default: all")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--search-mode", default="mrv")
+    parser.add_argument("--parallel", action="store_true")
+    parser.add_argument("--optimize", action="store_true")
+    parser.add_argument("--optimize-seconds", type=float, default=2.0)
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc")
+    parser.add_argument("--database-url", help="scratch database; tables are dropped after each run")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    options = {
+        "search_mode": args.search_mode,
+        "parallel": args.parallel,
+        "optimize": args.optimize,
+        "optimize_seconds": args.optimize_seconds,
+    }
+    report = {
+        "benchmark": "timetable_generation",
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "options": options,
+        "scenarios": [
+            run_scenario(name, SCENARIOS[name], args.runs, args.database_url, options, not args.no_memory)
+            for name in (args.scenario or list(SCENARIOS))
+        ],
+    }
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
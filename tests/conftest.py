@@ -0,0 +1,97 @@
+"""
+Shared fixtures. The suite runs against a throwaway SQLite database, with bcrypt
+inline and staged imports in a temporary directory; the settings are read when the
+app package is first imported, so they are set here before anything imports it.
+"""
+import os
+import tempfile
+from datetime import time as dtime
+
+_tmp = tempfile.mkdtemp(prefix="sms-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["BULK_ENROLL_STAGING_DIR"] = os.path.join(_tmp, "imports")
+os.environ["AUTH_SESSION_SWEEP_INTERVAL_SECONDS"] = "0"
+
+import pytest  # noqa: E402
+
+import app.models  # noqa: F401,E402  (registers every table on Base.metadata)
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.lms import AcademicYear, Class, ClassSubject, Section, Subject  # noqa: E402
+from app.models.timetable import Room, SubjectConstraint, TimetableConfig  # noqa: E402
+from app.models.users import EnrolledEmployee  # noqa: E402
+
+SUBJECT_NAMES = ["Mathematics", "Physics", "Chemistry", "Biology", "English", "Urdu", "Islamiat", "History"]
+
+
+@pytest.fixture
+def db():
+    """A session on freshly created tables, dropped again after the test."""
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def school(db):
+    """
+    A small school: 4 classes of 2 sections, 8 subjects (the first a double-period lab,
+    the first two core), 14 specialist teachers and 10 rooms, 2 of them labs, on a
+    5-day week of 7 periods with a break after the third. Returns the academic year id.
+    """
+    year = AcademicYear(name="Test", start_year=2000, end_year=2001, is_current=True)
+    db.add(year)
+    db.flush()
+    db.add(TimetableConfig(
+        academic_year_id=year.id, working_days=["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+        start_time=dtime(8), end_time=dtime(14), slot_duration=40, periods_per_day=7,
+        break_details=[{"after_period": 3, "duration": 20}],
+        max_periods_per_teacher_day=6, max_periods_per_teacher_week=30,
+    ))
+    subjects = [Subject(name=name, code=f"SUB-{i}") for i, name in enumerate(SUBJECT_NAMES)]
+    db.add_all(subjects)
+    db.add_all(
+        EnrolledEmployee(
+            employee_id=f"EMP-{i:04d}", first_name="Teacher", last_name=str(i), gender="-",
+            date_of_birth="-", phone="-", email=f"teacher{i}@example.com", cnic=str(i),
+            employee_type="teaching", functional_role="teacher", system_role="teacher",
+            subject=SUBJECT_NAMES[i % len(SUBJECT_NAMES)], highest_qualification="-", experience_years="1",
+        )
+        for i in range(14)
+    )
+    db.add_all(Room(name=f"Room {i}", is_lab=i < 2, is_active=True) for i in range(10))
+    db.flush()
+
+    # 25 of the 30 teaching periods a week
+    quotas = [4, 4, 3, 3, 3, 3, 3, 2]
+    for c in range(4):
+        cls = Class(name=f"Class {c + 1}", code=f"CLS-{c + 1}", academic_year_id=year.id)
+        db.add(cls)
+        db.flush()
+        db.add_all(Section(name=chr(65 + s), class_id=cls.id) for s in range(2))
+        for i, subject in enumerate(subjects):
+            class_subject = ClassSubject(
+                class_id=cls.id, subject_id=subject.id, academic_year_id=year.id, periods_per_week=quotas[i]
+            )
+            db.add(class_subject)
+            db.flush()
+            if i < 2:
+                db.add(SubjectConstraint(
+                    class_subject_id=class_subject.id, is_lab=i == 0, requires_double_period=i == 0,
+                    is_core=True, difficulty_level=3,
+                ))
+    db.commit()
+    return year.id
+
+
+@pytest.fixture
+def fast_hashing(monkeypatch):
+    """Replace bcrypt with a cheap reversible stand-in for tests that create users."""
+    from app.core import security
+
+    monkeypatch.setattr(security, "_hash_password", lambda password: "plain:" + password)
+    monkeypatch.setattr(security, "_check_password", lambda password, hashed: hashed == "plain:" + password)
@@ -0,0 +1,67 @@
+"""Login, refresh-token rotation (each refresh token works once) and password reset."""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.main import app
+from app.models.auth import PasswordResetOTP, User
+
+
+@pytest.fixture
+def client(db, fast_hashing):
+    db.add(User(email="admin@example.com", password_hash=security.get_password_hash("secret"), role="admin"))
+    db.commit()
+    return TestClient(app)
+
+
+def _login(client, password="secret"):
+    response = client.post("/api/v1/auth/login", data={"username": "admin@example.com", "password": password})
+    assert response.status_code == 200
+    return response.cookies["refresh_token"]
+
+
+def test_refresh_rotates_and_rejects_reuse(client):
+    old = _login(client)
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": old})
+    assert response.status_code == 200
+    new = response.json()["refresh_token"]
+    assert new != old
+
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": old}).status_code == 401
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": new}).status_code == 200
+
+
+def test_refresh_rejects_access_tokens_and_logged_out_sessions(client):
+    token = _login(client)
+    access = client.post("/api/v1/auth/refresh", json={"refresh_token": token}).json()["access_token"]
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": access}).status_code == 401
+
+    token = _login(client)
+    assert client.post("/api/v1/auth/logout", json=token).status_code == 200
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": token}).status_code == 401
+
+
+def test_login_rejects_wrong_password(client):
+    response = client.post("/api/v1/auth/login", data={"username": "admin@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+
+def test_password_reset_replaces_password_and_ends_sessions(client, db):
+    token = _login(client)
+    db.add(PasswordResetOTP(
+        email="admin@example.com", otp_code="123456", expires_at=datetime.utcnow() + timedelta(minutes=5)
+    ))
+    db.commit()
+
+    response = client.post(
+        "/api/v1/auth/password-reset/reset",
+        json={"email": "Admin@example.com", "otp_code": "123456", "new_password": "changed"},
+    )
+    assert response.status_code == 200
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": token}).status_code == 401
+    assert client.post("/api/v1/auth/login", data={"username": "admin@example.com", "password": "secret"}).status_code == 401
+    _login(client, "changed")
+    db.expire_all()
+    assert db.query(PasswordResetOTP).one().is_used
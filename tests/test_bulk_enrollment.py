@@ -0,0 +1,140 @@
+"""Chunked bulk-enroll imports: resuming from a checkpoint and claiming an import for one job."""
+import io
+
+import pytest
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.imports import BulkImport
+from app.models.users import EnrolledEmployee
+from app.services import bulk_enrollment
+from app.services.background_jobs import Job, JobStatus, job_runner
+
+HEADER = "first_name,last_name,date_of_birth,phone,email,cnic,system_role"
+
+
+def _employee_csv(count):
+    # Blank lines and a quoted multi-line value: file lines and data rows no longer line up
+    lines = [HEADER]
+    for i in range(count):
+        last_name = f'"Line\nbreak {i}"' if i % 3 == 0 else f"Emp {i}"
+        lines.append(f"T,{last_name},1990-01-01,0300{i},emp{i}@example.com,{35200 + i},teacher")
+        if i % 2 == 0:
+            lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+@pytest.mark.parametrize("skip_rows", [0, 1, 2, 3, 5, 7, 8])
+def test_read_chunks_skips_parsed_rows(skip_rows):
+    text = _employee_csv(8)
+    every = [r for chunk in bulk_enrollment.read_chunks(io.StringIO(text), "csv", 3) for r in chunk["email"]]
+    assert len(every) == 8
+
+    resumed = [
+        r for chunk in bulk_enrollment.read_chunks(io.StringIO(text), "csv", 3, skip_rows=skip_rows)
+        for r in chunk["email"]
+    ]
+    assert resumed == every[skip_rows:]
+
+
+def _staged_import(db, text):
+    return bulk_enrollment.create_import(db, io.BytesIO(text.encode()), "staff.csv", "teacher")
+
+
+@pytest.fixture
+def inline_jobs(monkeypatch):
+    """Run each queued job on the calling thread, as if a worker picked it up before enqueue returned."""
+    def enqueue(job, target, *args, **kwargs):
+        job_runner._run(job, target, args, kwargs)
+        return job
+
+    monkeypatch.setattr(job_runner, "enqueue", enqueue)
+
+
+@pytest.fixture
+def parked_jobs(monkeypatch):
+    """Queue jobs that no worker picks up until the test runs them."""
+    def enqueue(job, target, *args, **kwargs):
+        monkeypatch.setitem(job_runner._jobs, job.id, job)
+        return job
+
+    monkeypatch.setattr(job_runner, "enqueue", enqueue)
+
+
+def test_resume_after_failure_imports_each_row_once(db, fast_hashing, inline_jobs, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_ENROLL_CHUNK_ROWS", 2)
+    record = _staged_import(db, _employee_csv(9))
+
+    original = bulk_enrollment.EmployeeImporter.import_frame
+    calls = {"count": 0}
+
+    def failing_third_chunk(self, df, first_row=1):
+        calls["count"] += 1
+        if calls["count"] == 3:
+            raise RuntimeError("database went away")
+        return original(self, df, first_row)
+
+    monkeypatch.setattr(bulk_enrollment.EmployeeImporter, "import_frame", failing_third_chunk)
+    job = bulk_enrollment.start_import(db, record)
+    assert job.status == JobStatus.failed
+    db.refresh(record)
+    assert (record.status, record.rows_done) == (JobStatus.failed, 4)
+
+    bulk_enrollment.start_import(db, record)
+    db.refresh(record)
+    assert record.status == JobStatus.completed
+    assert (record.rows_done, record.created_count, record.failed_count) == (9, 9, 0)
+    assert db.query(EnrolledEmployee).count() == 9
+
+
+def test_resume_does_not_overwrite_worker_status(db, fast_hashing, inline_jobs):
+    record = _staged_import(db, _employee_csv(2))
+    record.status = JobStatus.failed
+    db.commit()
+    db.refresh(record)
+
+    job = bulk_enrollment.start_import(db, record)
+
+    db.refresh(record)
+    assert record.status == JobStatus.completed
+    assert record.job_id == job.id
+
+
+def test_concurrent_resumes_start_one_job(db, fast_hashing, parked_jobs):
+    record = _staged_import(db, _employee_csv(2))
+    record.status = JobStatus.failed
+    db.commit()
+    other_db = SessionLocal()
+    try:
+        # Both requests read the failed import before either queues a job
+        stale = other_db.get(BulkImport, record.id)
+        db.refresh(record)
+        job = bulk_enrollment.start_import(db, record)
+        assert job is not None
+        assert bulk_enrollment.start_import(other_db, stale) is None
+    finally:
+        other_db.close()
+
+    # A worker holding any other job leaves the import alone
+    assert bulk_enrollment.run_import(Job("bulk_enrollment"), record.id) is None
+    db.refresh(record)
+    assert (record.status, record.job_id, record.rows_done) == (JobStatus.queued, job.id, 0)
+
+    bulk_enrollment.run_import(job, record.id)
+    db.refresh(record)
+    assert (record.status, record.rows_done) == (JobStatus.completed, 2)
+    # ...including the same job delivered twice
+    assert bulk_enrollment.run_import(job, record.id) is None
+
+
+def test_cancelling_queued_job_cancels_import(db, fast_hashing, parked_jobs):
+    record = _staged_import(db, _employee_csv(2))
+    job = bulk_enrollment.start_import(db, record)
+
+    assert bulk_enrollment.cancel_import(db, job.id).status == JobStatus.cancelled
+    db.refresh(record)
+    assert record.status == JobStatus.cancelled
+
+    # The cancelled import can be resumed, and the old job can no longer run it
+    assert bulk_enrollment.run_import(job, record.id) is None
+    assert bulk_enrollment.start_import(db, record) is not None
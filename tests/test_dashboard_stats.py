@@ -0,0 +1,38 @@
+"""Monthly dashboard counters kept in step with inserts and deletes on flush."""
+from datetime import date, datetime
+
+from app.models.dashboard import MonthlyEnrollmentStat
+from app.models.users import EnrolledEmployee
+from app.services import dashboard_stats
+
+
+def _counts(db):
+    db.expire_all()
+    return {(s.month, s.kind): s.count for s in db.query(MonthlyEnrollmentStat) if s.count}
+
+
+def _employee(i, joined_at=None):
+    return EnrolledEmployee(
+        employee_id=f"EMP-{i:04d}", first_name="Teacher", last_name=str(i), gender="-",
+        date_of_birth="-", phone="-", email=f"teacher{i}@example.com", cnic=str(i),
+        employee_type="teaching", functional_role="teacher", system_role="teacher",
+        highest_qualification="-", experience_years="1", joined_at=joined_at,
+    )
+
+
+def test_insert_and_delete_count_against_the_row_month(db):
+    this_month = dashboard_stats.month_start(None)
+    db.add_all([_employee(0, datetime(2023, 6, 15)), _employee(1)])
+    db.commit()
+    assert _counts(db) == {(date(2023, 6, 1), "employees"): 1, (this_month, "employees"): 1}
+
+    # With joined_at expired when the row is deleted, the deletion still belongs to June 2023
+    old = db.query(EnrolledEmployee).filter(EnrolledEmployee.employee_id == "EMP-0000").one()
+    db.expire(old, ["joined_at"])
+    db.delete(old)
+    db.commit()
+    assert _counts(db) == {(this_month, "employees"): 1}
+
+    dashboard_stats.rebuild_monthly_stats(db)
+    db.commit()
+    assert _counts(db) == {(this_month, "employees"): 1}
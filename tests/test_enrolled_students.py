@@ -0,0 +1,55 @@
+"""Keyset paging of the enrolled-student listing."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from app.api.v1.admin import get_enrolled_students_page
+from app.models.lms import AcademicYear, Class, Section
+from app.models.users import EnrolledStudent
+
+
+def _page(db, cursor=None, limit=2):
+    return get_enrolled_students_page(
+        class_id=None, section_id=None, group_id=None, is_active=None, search=None,
+        fields="id", cursor=cursor, limit=limit, db=db,
+    )
+
+
+def test_pages_return_every_student_once_in_enrollment_order(db):
+    year = AcademicYear(name="Test", start_year=2000, end_year=2001, is_current=True)
+    db.add(year)
+    db.flush()
+    cls = Class(name="Class 1", code="CLS-1", academic_year_id=year.id)
+    db.add(cls)
+    db.flush()
+    section = Section(name="A", class_id=cls.id)
+    db.add(section)
+    db.flush()
+    # Ties on enrolled_at, and one row left to the column default
+    enrolled = [datetime(2024, 1, 1), datetime(2024, 1, 1), datetime(2024, 1, 1), datetime(2023, 6, 1), None]
+    for i, enrolled_at in enumerate(enrolled):
+        db.add(EnrolledStudent(
+            system_student_id=f"STU-{i}", admission_number=f"ADM-{i}", first_name="S", last_name=str(i),
+            gender="-", date_of_birth="-", b_form_number=str(i), guardian_name="-", guardian_cnic="-",
+            guardian_phone="-", guardian_email="-", class_id=cls.id, section_id=section.id,
+            lms_email=f"s{i}@example.com", lms_login=f"s{i}", enrolled_at=enrolled_at,
+        ))
+    db.commit()
+
+    seen = []
+    page = _page(db)
+    while True:
+        seen += [row["id"] for row in page["data"]]
+        if not page["pagination"]["has_more"]:
+            break
+        page = _page(db, page["pagination"]["next_cursor"])
+
+    expected = [s.id for s in db.query(EnrolledStudent).order_by(EnrolledStudent.enrolled_at, EnrolledStudent.id)]
+    assert seen == expected
+
+    # A row without enrolled_at would have no keyset position
+    with pytest.raises(IntegrityError):
+        db.execute(update(EnrolledStudent).values(enrolled_at=None))
+    db.rollback()
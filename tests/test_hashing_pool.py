@@ -0,0 +1,48 @@
+"""HashingPool admission: interactive calls are bounded, bulk work never crowds them out."""
+import threading
+import time
+
+import pytest
+
+from app.core.hashing_pool import HashingPool, HashingPoolBusy
+
+
+@pytest.fixture
+def pool():
+    pool = HashingPool(workers=2, max_pending=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_interactive_calls_beyond_max_pending_are_rejected(pool):
+    first = pool.submit(time.sleep, 0.5)
+    with pytest.raises(HashingPoolBusy):
+        pool.submit(abs, -1)
+    first.result()
+    assert pool.metrics()["rejected"] == 1
+    assert pool.run(abs, -1) == 1
+
+
+def test_bulk_work_does_not_block_logins(pool):
+    pool.map(time.sleep, [0.1, 0.1])  # start both workers
+    assert pool.bulk_workers == 1
+
+    bulk = threading.Thread(target=pool.map, args=(time.sleep, [0.3] * 8))
+    bulk.start()
+    time.sleep(0.2)
+    metrics = pool.metrics()
+    assert (metrics["pending"], metrics["bulk_pending"]) == (0, 8)
+
+    # Far more bulk work is queued than max_pending, yet a login is admitted and runs at once
+    started = time.perf_counter()
+    assert pool.run(abs, -5) == 5
+    assert time.perf_counter() - started < 1.0
+    assert bulk.is_alive()
+    bulk.join()
+    assert pool.metrics()["bulk_pending"] == 0
+
+
+def test_bulk_results_keep_input_order():
+    pool = HashingPool(workers=0, max_pending=1)
+    assert pool.map(abs, [-3, 2, -1]) == [3, 2, 1]
+    assert pool.metrics()["submitted"] == 3
@@ -0,0 +1,94 @@
+"""
+SchedulingEngine on a small synthetic school: generated, optimized and repaired
+versions never double-book a teacher, room or section, and repair keeps pinned slots.
+"""
+import time
+import uuid
+from collections import Counter
+
+import pytest
+
+from app.models.timetable import TimetableSlot
+from app.services.scheduling_engine import SchedulingEngine
+from app.services.timetable_solver import solve_sections, start_worker_pool, stop_worker_pool
+
+
+def _slots(db, version_id):
+    db.expire_all()
+    return db.query(TimetableSlot).filter(TimetableSlot.version_id == version_id).all()
+
+
+def _assert_no_double_booking(slots):
+    for key in (
+        lambda s: (s.teacher_id, s.day, s.period_index),
+        lambda s: (s.room_id, s.day, s.period_index),
+        lambda s: (s.class_id, s.section_id, s.day, s.period_index),
+    ):
+        counts = Counter(key(s) for s in slots if key(s)[0] is not None)
+        clashes = [k for k, n in counts.items() if n > 1]
+        assert not clashes
+
+
+@pytest.mark.parametrize("optimize", [False, True])
+def test_generated_version_has_no_double_booking(db, school, optimize):
+    engine = SchedulingEngine(db, school)
+    version = engine.generate("Test", optimize=optimize, optimize_seconds=0.5)
+
+    slots = _slots(db, version.id)
+    assert slots
+    _assert_no_double_booking(slots)
+
+
+def test_repair_moves_teacher_off_and_keeps_pinned_slots(db, school):
+    version = SchedulingEngine(db, school).generate("Test")
+    slots = _slots(db, version.id)
+    teacher_id, other_id = [t for t, _ in Counter(s.teacher_id for s in slots).most_common(2)]
+    locked = [s for s in slots if s.teacher_id == teacher_id][::2]
+    for slot in locked:
+        slot.is_locked = True
+    manual = [s for s in slots if s.teacher_id == other_id]
+    for slot in manual:
+        slot.is_manual = True
+    db.commit()
+    locked_cells = {(s.section_id, s.day, s.period_index) for s in locked}
+    manual_count = len(manual)
+
+    engine = SchedulingEngine(db, school)
+    engine.repair(version.id, teacher_id=teacher_id, replacement_teacher_id=other_id)
+
+    after = _slots(db, version.id)
+    _assert_no_double_booking(after)
+    by_cell = {(s.section_id, s.day, s.period_index): s for s in after}
+    # Every pinned period is still there and still locked, re-taught or (if it could not stay) untouched
+    for cell in locked_cells:
+        assert cell in by_cell and by_cell[cell].is_locked
+    kept = sum(1 for u in engine.unplaced if u["reason"] == "locked_slot")
+    assert sum(1 for s in after if s.teacher_id == teacher_id) == kept
+    # The replacement's own manual periods keep their flag
+    assert sum(1 for s in after if s.teacher_id == other_id and s.is_manual) >= manual_count
+
+
+def test_room_repair_keeps_version_clash_free(db, school):
+    version = SchedulingEngine(db, school).generate("Test")
+    room_id = Counter(s.room_id for s in _slots(db, version.id) if s.room_id).most_common(1)[0][0]
+
+    engine = SchedulingEngine(db, school)
+    engine.repair(version.id, room_id=room_id)
+
+    after = _slots(db, version.id)
+    _assert_no_double_booking(after)
+    assert not any(s.room_id == room_id for s in after)
+
+
+def test_stopping_worker_pool_ends_running_search():
+    solver_kwargs = {"working_days": ["Mon"], "periods_per_day": 12, "rooms": []}
+    # Thirteen periods for twelve cells, each with its own teacher: plain backtracking runs for ages
+    items = [{"teacher_id": uuid.uuid4(), "subject_id": uuid.uuid4(), "type": "single"} for _ in range(13)]
+    pool, stop_event = start_worker_pool(1)
+    future = pool.submit(solve_sections, solver_kwargs, [(items, 0), (items, 0)], "backtrack")
+    time.sleep(1)
+    assert not future.done()
+
+    stop_worker_pool(pool, stop_event)
+    results, _ = future.result(timeout=10)
+    assert [{reason for _, reason in unplaced} for _, unplaced in results] == [{"cancelled"}, {"cancelled"}]
@@ -0,0 +1,105 @@
+"""
+TimetableOptimizer moves keep the timetable legal: after every relocate, swap and undo
+no section, teacher or room is double-booked, and the optimizer's bookkeeping matches
+the solver state.
+"""
+import random
+import uuid
+from collections import Counter
+
+import pytest
+
+from app.services.timetable_optimizer import TimetableOptimizer
+from app.services.timetable_solver import TimetableSolver
+
+DAYS = ["Mon", "Tue", "Wed"]
+PERIODS_PER_DAY = 6
+BREAK_PERIOD = 3
+
+
+def _timetable(seed):
+    rng = random.Random(seed)
+    rooms = [(uuid.uuid4(), i == 0) for i in range(4)]
+    solver = TimetableSolver(DAYS, PERIODS_PER_DAY, rooms, max_periods_per_day=4, seed=seed)
+    teachers = [uuid.uuid4() for _ in range(5)]
+    subjects = [uuid.uuid4() for _ in range(6)]
+    breaks = solver.periods_mask([BREAK_PERIOD])
+
+    sections = []
+    for _ in range(3):
+        pool = [
+            {
+                "teacher_id": rng.choice(teachers), "subject_id": subjects[i % len(subjects)],
+                "type": "double" if i == 0 else "single", "is_lab": i == 0,
+                "is_core": i < 2, "difficulty": 3 if i < 2 else 1,
+            }
+            for i in range(rng.randint(6, 9))
+        ]
+        result = solver.solve(pool, breaks)
+        sections.append((result.placements, breaks))
+    return solver, sections
+
+
+def _assert_consistent(optimizer, blocked):
+    solver = optimizer.solver
+    teacher_cells = Counter()
+    room_cells = Counter()
+    for s, placements in enumerate(optimizer.placements):
+        cells = 0
+        lessons = Counter()
+        for item, start, rooms in placements:
+            mask = ((1 << len(rooms)) - 1) << start
+            assert not cells & mask, "two periods share a section cell"
+            assert not blocked & mask, "a period sits in a break"
+            cells |= mask
+            lessons[(item["subject_id"], start // PERIODS_PER_DAY)] += 1
+            for offset, room_id in enumerate(rooms):
+                teacher_cells[(item["teacher_id"], start + offset)] += 1
+                room_cells[(room_id, start + offset)] += 1
+        assert optimizer.section_busy[s] == blocked | cells
+        for (subject_id, day), count in lessons.items():
+            assert optimizer.day_lessons[(s, subject_id)][day] == count
+
+    assert max(teacher_cells.values()) == 1, "a teacher is double-booked"
+    assert max(room_cells.values()) == 1, "a room is double-booked"
+    for teacher_id, busy in solver.teacher_busy.items():
+        expected = sum(1 << cell for (t, cell) in teacher_cells if t == teacher_id)
+        assert busy == expected
+    for cell, busy in enumerate(solver.room_busy):
+        expected = sum(1 << solver.room_index[r] for (r, c) in room_cells if c == cell)
+        assert busy == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_moves_and_undo_never_double_book(seed):
+    solver, sections = _timetable(seed)
+    blocked = sections[0][1]
+    optimizer = TimetableOptimizer(solver, sections, morning_periods=3, break_mask=blocked, seed=seed)
+    _assert_consistent(optimizer, blocked)
+
+    rng = random.Random(seed)
+    swaps = undone = 0
+    for _ in range(2000):
+        s, k = rng.choice(optimizer.movable)
+        if rng.random() < 0.5:
+            outcome = optimizer._swap(s, k, rng.randrange(len(optimizer.placements[s])))
+            swaps += outcome is not None
+        else:
+            outcome = optimizer._relocate(s, k)
+        if outcome is not None and rng.random() < 0.5:
+            optimizer._undo(outcome[1])
+            undone += 1
+        _assert_consistent(optimizer, blocked)
+    assert swaps and undone
+
+
+def test_optimize_keeps_timetable_legal_and_never_worsens_it():
+    solver, sections = _timetable(0)
+    blocked = sections[0][1]
+    optimizer = TimetableOptimizer(solver, sections, morning_periods=3, break_mask=blocked, seed=0)
+
+    report = optimizer.optimize(max_seconds=5, max_iterations=3000)
+
+    _assert_consistent(optimizer, blocked)
+    assert report["final_score"] <= report["initial_score"]
+    assert report["final_score"] == optimizer.score()
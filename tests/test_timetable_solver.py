@@ -0,0 +1,142 @@
+"""
+TimetableSolver against an exhaustive search on small random sections: every
+placement it returns must be legal, and it must find a timetable exactly when one
+exists (in ``mrv`` mode "infeasible" is a proof).
+"""
+import random
+import uuid
+
+import pytest
+
+from app.services.timetable_solver import TimetableSolver
+
+DAYS = ["Mon", "Tue"]
+PERIODS_PER_DAY = 4
+CELLS = len(DAYS) * PERIODS_PER_DAY
+
+
+def _instance(seed):
+    """
+    A solver with other sections' periods already committed, and one section's pool.
+    The same seed always builds the same instance, ids included.
+    """
+    rng = random.Random(seed)
+
+    def new_id():
+        return uuid.UUID(int=rng.getrandbits(128))
+
+    teachers = [new_id() for _ in range(rng.randint(1, 3))]
+    rooms = [(new_id(), i == 0 and rng.random() < 0.7) for i in range(rng.randint(1, 2))]
+    constraints = {
+        t: {
+            "unavailable_slots": [
+                {"day": DAYS[c // PERIODS_PER_DAY], "period_index": c % PERIODS_PER_DAY}
+                for c in rng.sample(range(CELLS), rng.randint(0, 2))
+            ],
+            "max_periods_per_day": rng.choice([None, 2, 3]),
+        }
+        for t in teachers
+    }
+    solver = TimetableSolver(
+        DAYS, PERIODS_PER_DAY, rooms, teacher_constraints=constraints,
+        max_periods_per_week=rng.choice([None, 4, 6]), seed=seed,
+    )
+
+    def item(teacher_id, double=False, lab=False):
+        return {
+            "teacher_id": teacher_id, "subject_id": new_id(),
+            "type": "double" if double else "single", "is_lab": lab,
+        }
+
+    # Other sections: teachers and rooms already busy at some cells
+    for _ in range(rng.randint(0, 3)):
+        other = item(rng.choice(teachers))
+        starts = solver.legal_starts(other, 0)
+        if starts:
+            cells = [c for c in range(CELLS) if starts >> c & 1]
+            solver.place(other, rng.choice(cells))
+
+    pool = [
+        item(rng.choice(teachers), double=rng.random() < 0.25, lab=rng.random() < 0.2)
+        for _ in range(rng.randint(1, 5))
+    ]
+    section_busy = 0
+    for c in rng.sample(range(CELLS), rng.randint(0, 2)):
+        section_busy |= 1 << c
+    for pool_item in pool:
+        solver.legal_starts(pool_item, section_busy)  # sets up each teacher's state
+    return solver, pool, section_busy
+
+
+def _fits(solver, item, start, section_busy):
+    """Whether ``item`` may start at ``start``, checked from the constraints themselves."""
+    width = 2 if item["type"] == "double" else 1
+    day, period = divmod(start, PERIODS_PER_DAY)
+    if period + width > PERIODS_PER_DAY:
+        return False
+    teacher_id = item["teacher_id"]
+    max_day, max_week = solver.teacher_limits[teacher_id]
+    if max_week and solver.teacher_week_load[teacher_id] + width > max_week:
+        return False
+    if max_day and solver.teacher_day_load[teacher_id][day] + width > max_day:
+        return False
+    for cell in range(start, start + width):
+        if section_busy >> cell & 1:
+            return False
+        if (solver.teacher_busy[teacher_id] | solver.teacher_blocked[teacher_id]) >> cell & 1:
+            return False
+        free_rooms = [
+            i for i, room_id in enumerate(solver.room_ids)
+            if not solver.room_busy[cell] >> i & 1 and (not item["is_lab"] or solver.lab_rooms_mask >> i & 1)
+        ]
+        if not free_rooms:
+            return False
+    return True
+
+
+def _exists(solver, pool, section_busy):
+    """Exhaustive search: can every item of ``pool`` be placed?"""
+    if not pool:
+        return True
+    item, rest = pool[0], pool[1:]
+    for start in range(CELLS):
+        if _fits(solver, item, start, section_busy):
+            width = 2 if item["type"] == "double" else 1
+            rooms = solver.place(item, start)
+            found = _exists(solver, rest, section_busy | ((1 << width) - 1) << start)
+            solver.remove(item, start, rooms)
+            if found:
+                return True
+    return False
+
+
+def _assert_legal(seed, placements):
+    """Replay the placements one by one on a fresh copy of the instance."""
+    solver, _, section_busy = _instance(seed)
+    for item, start, rooms in placements:
+        assert _fits(solver, item, start, section_busy), (item, start)
+        for offset, room_id in enumerate(rooms):
+            room_idx = solver.room_index[room_id]
+            assert not solver.room_busy[start + offset] >> room_idx & 1
+            if item["is_lab"]:
+                assert solver.lab_rooms_mask >> room_idx & 1
+        # Rooms are picked deterministically, so the replay takes the same ones
+        assert solver.place(item, start) == tuple(rooms)
+        section_busy |= ((1 << len(rooms)) - 1) << start
+
+
+@pytest.mark.parametrize("mode", ["backtrack", "mrv"])
+def test_solver_matches_exhaustive_search(mode):
+    outcomes = set()
+    for seed in range(300):
+        solver, pool, section_busy = _instance(seed)
+        expected = _exists(solver, pool, section_busy)
+
+        solver, pool, section_busy = _instance(seed)
+        result = solver.solve(pool, section_busy, mode=mode)
+        assert result.complete == expected, f"seed {seed}: {[reason for _, reason in result.unplaced]}"
+        assert len(result.placements) + len(result.unplaced) == len(pool)
+        _assert_legal(seed, result.placements)
+        outcomes.add(expected)
+    # The generator produces both feasible and infeasible sections
+    assert outcomes == {True, False}